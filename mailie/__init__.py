@@ -1,25 +1,171 @@
+import importlib
 import logging
+import typing
 
-import importlib_metadata
-
-from ._attachments import Attachable
-from ._attachments import FileAttachment
-from ._client import SyncClient
-from ._email import Email
+from ._exceptions import AuthenticationException
+from ._exceptions import DeadlineExceededException
+from ._exceptions import DKIMSigningException
 from ._exceptions import EmptyAttachmentFolderException
 from ._exceptions import FilePathNotAttachmentException
 from ._exceptions import InvalidAttachmentException
+from ._exceptions import InvalidEmailAddressException
 from ._exceptions import MailieException
+from ._exceptions import RelaysUnavailableException
 from ._exceptions import SMTPException
-from ._policy import POLICIES
-from ._response import SMTPResponse
+
+if typing.TYPE_CHECKING:
+    from ._address import AddressValidationResult
+    from ._address import EmailAddress
+    from ._address import parse_address
+    from ._address import validate_addresses
+    from ._attachments import Attachable
+    from ._attachments import FileAttachment
+    from ._attachments import ZipDirectoryStrategy
+    from ._auth import AccessToken
+    from ._auth import Auth
+    from ._auth import LoginAuth
+    from ._auth import OAuth2Auth
+    from ._auth import OAuth2TokenProvider
+    from ._auth import PlainAuth
+    from ._auth import TokenProvider
+    from ._campaign import Campaign
+    from ._campaign import CampaignLog
+    from ._campaign import CampaignResult
+    from ._campaign import FileSource
+    from ._campaign import RecipientSource
+    from ._capabilities import Capabilities
+    from ._capabilities import CapabilityCache
+    from ._capabilities import capability_cache
+    from ._client import SyncClient
+    from ._deadline import Deadline
+    from ._dkim import DKIMSigner
+    from ._email import Email
+    from ._encoding import Negotiation
+    from ._encoding import negotiate
+    from ._hooks import HookDispatcher
+    from ._hooks import ThreadedHookDispatcher
+    from ._inline import InlineImage
+    from ._inline import InlineImageCache
+    from ._inline import inline_image_cache
+    from ._logging import JSONFormatter
+    from ._logging import LogSampler
+    from ._logging import log_sampler
+    from ._mailbox import MailboxWriter
+    from ._mailbox import MaildirWriter
+    from ._mailbox import MboxWriter
+    from ._mailbox import open_mailbox
+    from ._mailbox import write_messages
+    from ._metrics import Counter
+    from ._metrics import Gauge
+    from ._metrics import Histogram
+    from ._metrics import MetricsRegistry
+    from ._metrics import metrics
+    from ._policy import POLICIES
+    from ._profiling import Profiler
+    from ._profiling import ProfileReport
+    from ._relays import Relay
+    from ._relays import RelayClient
+    from ._relays import RelayHealth
+    from ._response import SMTPResponse
+    from ._results import NDJSONResultSink
+    from ._results import ResultSink
+    from ._scheduler import Lane
+    from ._scheduler import Scheduler
+    from ._tls import ResumingSSLContext
+    from ._tls import TLSSessionCache
+    from ._tls import create_resuming_context
+
+    version: str
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
+# The public API is loaded lazily (PEP-562) so that `import mailie` does not pay for `smtplib`, `ssl` and the
+# `email` package until they are actually used, this keeps short lived processes & the CLI fast to start.
+_LAZY_ATTRIBUTES = {
+    "AddressValidationResult": "._address",
+    "EmailAddress": "._address",
+    "parse_address": "._address",
+    "validate_addresses": "._address",
+    "AccessToken": "._auth",
+    "Auth": "._auth",
+    "LoginAuth": "._auth",
+    "OAuth2Auth": "._auth",
+    "OAuth2TokenProvider": "._auth",
+    "PlainAuth": "._auth",
+    "TokenProvider": "._auth",
+    "Attachable": "._attachments",
+    "FileAttachment": "._attachments",
+    "ZipDirectoryStrategy": "._attachments",
+    "HookDispatcher": "._hooks",
+    "ThreadedHookDispatcher": "._hooks",
+    "JSONFormatter": "._logging",
+    "LogSampler": "._logging",
+    "log_sampler": "._logging",
+    "Campaign": "._campaign",
+    "CampaignLog": "._campaign",
+    "CampaignResult": "._campaign",
+    "FileSource": "._campaign",
+    "RecipientSource": "._campaign",
+    "Capabilities": "._capabilities",
+    "CapabilityCache": "._capabilities",
+    "capability_cache": "._capabilities",
+    "SyncClient": "._client",
+    "Deadline": "._deadline",
+    "DKIMSigner": "._dkim",
+    "Email": "._email",
+    "Negotiation": "._encoding",
+    "InlineImage": "._inline",
+    "InlineImageCache": "._inline",
+    "inline_image_cache": "._inline",
+    "negotiate": "._encoding",
+    "MailboxWriter": "._mailbox",
+    "MaildirWriter": "._mailbox",
+    "MboxWriter": "._mailbox",
+    "open_mailbox": "._mailbox",
+    "write_messages": "._mailbox",
+    "Counter": "._metrics",
+    "Gauge": "._metrics",
+    "Histogram": "._metrics",
+    "MetricsRegistry": "._metrics",
+    "metrics": "._metrics",
+    "POLICIES": "._policy",
+    "ProfileReport": "._profiling",
+    "Profiler": "._profiling",
+    "Relay": "._relays",
+    "RelayClient": "._relays",
+    "RelayHealth": "._relays",
+    "NDJSONResultSink": "._results",
+    "ResultSink": "._results",
+    "Lane": "._scheduler",
+    "Scheduler": "._scheduler",
+    "SMTPResponse": "._response",
+    "ResumingSSLContext": "._tls",
+    "TLSSessionCache": "._tls",
+    "create_resuming_context": "._tls",
+}
+
+
+def _version() -> str:
+    # importlib_metadata is necessary here for backwards compat with mkdocs.
+    import importlib_metadata
+
+    return importlib_metadata.version("mailie")  # type: ignore [attr-defined]
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name == "version":
+        value = _version()
+    elif name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # Subsequent lookups bypass `__getattr__` entirely.
+    return value
+
 
-# importlib_metadata is necessary here for backwards compat with mkdocs.
-version = importlib_metadata.version("mailie")  # type: ignore [attr-defined]
+def __dir__() -> typing.List[str]:
+    return sorted({*globals(), *__all__})
 
 
 __all__ = [
@@ -35,4 +181,63 @@ __all__ = [
     "MailieException",
     "FilePathNotAttachmentException",
     "SMTPException",
+    "InvalidEmailAddressException",
+    "EmailAddress",
+    "AddressValidationResult",
+    "parse_address",
+    "validate_addresses",
+    "DKIMSigner",
+    "DKIMSigningException",
+    "Negotiation",
+    "negotiate",
+    "Capabilities",
+    "CapabilityCache",
+    "capability_cache",
+    "ResumingSSLContext",
+    "TLSSessionCache",
+    "create_resuming_context",
+    "Auth",
+    "PlainAuth",
+    "LoginAuth",
+    "OAuth2Auth",
+    "TokenProvider",
+    "OAuth2TokenProvider",
+    "AccessToken",
+    "AuthenticationException",
+    "Campaign",
+    "CampaignLog",
+    "CampaignResult",
+    "FileSource",
+    "RecipientSource",
+    "MailboxWriter",
+    "MaildirWriter",
+    "MboxWriter",
+    "open_mailbox",
+    "write_messages",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "metrics",
+    "ProfileReport",
+    "Profiler",
+    "NDJSONResultSink",
+    "ResultSink",
+    "Lane",
+    "Scheduler",
+    "Deadline",
+    "DeadlineExceededException",
+    "Relay",
+    "RelayClient",
+    "RelayHealth",
+    "RelaysUnavailableException",
+    "InlineImage",
+    "InlineImageCache",
+    "inline_image_cache",
+    "ZipDirectoryStrategy",
+    "HookDispatcher",
+    "ThreadedHookDispatcher",
+    "JSONFormatter",
+    "LogSampler",
+    "log_sampler",
 ]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import ipaddress
+import re
+import typing
+
+from ._exceptions import InvalidEmailAddressException
+
+# RFC-5321 4.5.3.1 size limits (in octets).
+MAX_LOCAL_PART_LENGTH = 64
+MAX_DOMAIN_LENGTH = 255
+MAX_ADDRESS_LENGTH = 254
+
+# RFC-5322 `atext`, extended with UTF8-non-ascii per RFC-6531 so SMTPUTF8 local parts are permitted.
+_ATEXT = r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~\-\u0080-\U0010ffff]"
+_DOT_ATOM = re.compile(rf"{_ATEXT}+(?:\.{_ATEXT}+)*")
+_QUOTED_STRING = re.compile(r'"(?:[\x20\x21\x23-\x5b\x5d-\x7e\u0080-\U0010ffff]|\\[\x20-\x7e])*"')
+_LABEL = re.compile(r"[a-z0-9](?:[a-z0-9\-]{0,61}[a-z0-9])?")
+
+
+@dataclasses.dataclass(frozen=True)
+class EmailAddress:
+    """
+    A parsed and normalised RFC-5321 mailbox.  The local part is retained exactly as provided (it is
+    case sensitive per the RFC), the domain is IDNA encoded and lower cased.
+    """
+
+    local_part: str
+    domain: str
+
+    def __str__(self) -> str:
+        return f"{self.local_part}@{self.domain}"
+
+
+@dataclasses.dataclass(frozen=True)
+class AddressValidationResult:
+    """
+    The outcome of validating a batch of addresses.  `valid` contains the distinct, normalised addresses
+    in the order they were first seen; `invalid` maps each rejected input to the reason it was rejected.
+    """
+
+    valid: typing.List[str]
+    invalid: typing.Dict[str, str]
+
+    def __bool__(self) -> bool:
+        return not self.invalid
+
+
+@functools.lru_cache(maxsize=4096)
+def normalise_domain(domain: str) -> str:
+    """
+    Validate and normalise the domain portion of an address.  Internationalised domains are converted
+    to their ASCII compatible (IDNA) form and the result is lower cased.  Address literals such as
+    `[127.0.0.1]` & `[IPv6:::1]` are supported, as are single label domains (e.g `localhost`) which
+    RFC-5321 permits and local relays commonly rely upon.  Results are memoized as the same handful of domains
+    typically make up the bulk of any recipient list.
+
+    :raises ValueError: If the domain is not valid.
+    """
+    if domain.startswith("[") and domain.endswith("]"):
+        literal = domain[1:-1]
+        if literal[:5].lower() == "ipv6:":
+            return f"[IPv6:{ipaddress.IPv6Address(literal[5:]).compressed}]"
+        return f"[{ipaddress.IPv4Address(literal)}]"
+    if not domain.isascii():
+        try:
+            domain = domain.encode("idna").decode("ascii")
+        except UnicodeError:
+            raise ValueError(f"domain: {domain} cannot be IDNA encoded") from None
+    domain = domain.lower()
+    if len(domain) > MAX_DOMAIN_LENGTH:
+        raise ValueError(f"domain exceeds {MAX_DOMAIN_LENGTH} characters")
+    labels = domain.split(".")
+    if not all(_LABEL.fullmatch(label) for label in labels):
+        raise ValueError(f"domain: {domain} is not a valid hostname")
+    return domain
+
+
+def parse_address(address: str) -> EmailAddress:
+    """
+    Parse a single address into an `EmailAddress`.  In keeping with `smtplib`, addresses wrapped in angle
+    brackets (optionally with a display name, e.g `Foo <foo@bar.com>`) have the addr-spec extracted.
+
+    :raises InvalidEmailAddressException: If the address is not RFC-5321 compliant.
+    """
+    try:
+        return _parse(address)
+    except ValueError as exc:
+        raise InvalidEmailAddressException(f"{address!r} is not a valid email address: {exc}", {address: str(exc)})
+
+
+def _parse(address: str) -> EmailAddress:
+    candidate = address.strip()
+    if candidate.endswith(">") and "<" in candidate:
+        candidate = candidate[:-1].rpartition("<")[2]
+    local_part, at, domain = candidate.rpartition("@")
+    if not at or not local_part or not domain:
+        raise ValueError("address must be of the form local-part@domain")
+    if len(local_part.encode("utf-8")) > MAX_LOCAL_PART_LENGTH:
+        raise ValueError(f"local part exceeds {MAX_LOCAL_PART_LENGTH} octets")
+    if not (_DOT_ATOM.fullmatch(local_part) or _QUOTED_STRING.fullmatch(local_part)):
+        raise ValueError(f"local part: {local_part} is not a valid dot-atom or quoted-string")
+    domain = normalise_domain(domain)
+    if len(local_part.encode("utf-8")) + len(domain) + 1 > MAX_ADDRESS_LENGTH:
+        raise ValueError(f"address exceeds {MAX_ADDRESS_LENGTH} octets")
+    return EmailAddress(local_part, domain)
+
+
+def is_email(address: str) -> bool:
+    """
+    Return `True` if the address is RFC-5321 compliant, otherwise `False`.
+    """
+    try:
+        _parse(address)
+    except ValueError:
+        return False
+    return True
+
+
+def validate_addresses(addresses: typing.Iterable[str]) -> AddressValidationResult:
+    """
+    Validate and normalise a batch of addresses in a single pass.  Duplicates (after normalisation) are
+    removed while retaining the order in which addresses were first seen.  Invalid addresses do not
+    raise, they are collected in the `invalid` mapping of the result.
+    """
+    valid: typing.Dict[str, None] = {}
+    invalid: typing.Dict[str, str] = {}
+    for address in addresses:
+        try:
+            valid[str(_parse(address))] = None
+        except ValueError as exc:
+            invalid[address] = str(exc)
+    return AddressValidationResult(list(valid), invalid)
+
+
+def normalise_addresses(addresses: typing.Iterable[str]) -> typing.List[str]:
+    """
+    Validate, normalise and order-preserving dedupe the addresses, raising if any are invalid.
+
+    :raises InvalidEmailAddressException: If any of the addresses are invalid, all offending addresses
+    are included in the exception.
+    """
+    result = validate_addresses(addresses)
+    if result.invalid:
+        raise InvalidEmailAddressException(
+            f"Invalid email address(es): {', '.join(map(repr, result.invalid))}", result.invalid
+        )
+    return result.valid
@@ -1,13 +1,19 @@
+import io
 import mimetypes
 import os
 import pathlib
 import typing
+import zipfile
 from dataclasses import dataclass
 
 from ._exceptions import EmptyAttachmentFolderException
 from ._exceptions import FilePathNotAttachmentException
+from ._metrics import AttachmentMetrics
+from ._metrics import metrics
 from ._types import EMAIL_ATTACHMENT_PATH_ALIAS
 
+_METRICS = AttachmentMetrics.register(metrics)
+
 
 @dataclass(repr=True, frozen=True, eq=True)
 class FileAttachment:
@@ -96,12 +102,81 @@ class AllFilesStrategy(Attachable):
         and return it.
         """
         with open(path, "rb") as binary:
-            return FileAttachment(
-                path=path,
-                name=path.name,
-                extension=path.suffix,  # Todo: what about multiple extension files?
-                data=binary.read(),
-            )
+            data = binary.read()
+        _METRICS.attachments.inc()
+        _METRICS.attachment_bytes.inc(len(data))
+        return FileAttachment(
+            path=path,
+            name=path.name,
+            extension=path.suffix,  # Todo: what about multiple extension files?
+            data=data,
+        )
+
+
+class ZipDirectoryStrategy(AllFilesStrategy):
+    """
+    A strategy which packs each directory into a single (deflate compressed) ZIP attachment, named after the
+    directory, rather than attaching its files individually.  Explicit file paths are attached as is.
+
+    Files are compressed in chunks as they are read, so the files themselves are never held in memory, only the
+    compressed archive which (like any attachment) is kept as bytes on the `FileAttachment`.  Files that are
+    already compressed (images, archives, etc) are stored rather than deflated again.
+
+    :param recursive: Include the files of sub folders, their relative paths are retained in the archive.
+    :param threshold: Directories whose files total fewer bytes than this are attached file by file, as
+    compression of small attachments saves little.
+    :param compresslevel: The deflate level, `0` (none) to `9` (smallest, slowest).
+    """
+
+    STORED_SUFFIXES = frozenset(
+        (".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4")
+    )
+
+    def __init__(self, *, recursive: bool = False, threshold: int = 0, compresslevel: int = 6) -> None:
+        self.recursive = recursive
+        self.threshold = threshold
+        self.compresslevel = compresslevel
+
+    def _squash(self, paths: typing.List[pathlib.Path]) -> typing.List[FileAttachment]:
+        attachments = []
+        for path in paths:
+            if not path.is_dir():
+                attachments.extend(super()._squash([path]))
+                continue
+            files = sorted(sub_path for sub_path in self._walk(path) if sub_path.is_file())
+            if not files:
+                raise EmptyAttachmentFolderException(f"Directory: {path} does not contain any suitable files") from None
+            if sum(file.stat().st_size for file in files) < self.threshold:
+                attachments.extend([self._generate_file_attachment(f) for f in files])
+            else:
+                attachments.append(self._generate_zip_attachment(path, files))
+        return attachments
+
+    def _walk(self, path: pathlib.Path) -> typing.Iterator[pathlib.Path]:
+        return path.rglob("*") if self.recursive else path.iterdir()
+
+    def _generate_zip_attachment(self, directory: pathlib.Path, files: typing.List[pathlib.Path]) -> FileAttachment:
+        """
+        Compress the files into a ZIP archive, with paths relative to the directory, and build it into a
+        `FileAttachment` instance.
+        """
+        loaded = 0
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=self.compresslevel) as archive:
+            for file in files:
+                stored = file.suffix.lower() in self.STORED_SUFFIXES
+                # ZipFile.write streams the file in chunks through the compressor.
+                archive.write(
+                    file,
+                    file.relative_to(directory).as_posix(),
+                    compress_type=zipfile.ZIP_STORED if stored else None,
+                )
+                loaded += file.stat().st_size
+        data = buffer.getvalue()
+        _METRICS.attachments.inc()
+        _METRICS.attachment_bytes.inc(loaded)
+        path = directory.with_name(f"{directory.name}.zip")
+        return FileAttachment(path=path, name=path.name, extension=path.suffix, data=data)
 
 
 class AsyncAllFilesStrategy(Attachable):
@@ -1,13 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import json
+import smtplib
+import threading
+import time
+import typing
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from ._deadline import bounded_timeout
+from ._exceptions import AuthenticationException
+
+SMTP_REPLY_ALIAS = typing.Tuple[int, bytes]
+
+
 class Auth:
     """
-    Base class for authentication schemes.
+    Base class for authentication schemes.  Subclasses implement `synchronous_auth` which performs the
+    SMTP AUTH exchange (RFC-4954) on an already greeted (and ideally encrypted) connection.
     """
 
-    def auth(self):
-        ...
+    mechanism: str = ""
+
+    def auth(self, client: smtplib.SMTP) -> SMTP_REPLY_ALIAS:
+        """
+        Authenticate the connection, raising `smtplib.SMTPNotSupportedError` if the server does not
+        advertise AUTH and `smtplib.SMTPAuthenticationError` if the credentials are rejected.
+        """
+        if not client.has_extn("auth"):
+            raise smtplib.SMTPNotSupportedError("SMTP AUTH extension not supported by server.")
+        return self.synchronous_auth(client)
+
+    def synchronous_auth(self, client: smtplib.SMTP) -> SMTP_REPLY_ALIAS:
+        raise NotImplementedError
+
+    async def asynchronous_auth(self, client: smtplib.SMTP) -> SMTP_REPLY_ALIAS:
+        return await asyncio.get_running_loop().run_in_executor(None, self.auth, client)
+
+
+class PlainAuth(Auth):
+    """
+    AUTH PLAIN (RFC-4616), the credentials are sent as the initial response in a single round trip.
+    """
+
+    mechanism = "PLAIN"
+
+    def __init__(self, username: str, password: str) -> None:
+        self.username = username
+        self.password = password
+
+    def synchronous_auth(self, client: smtplib.SMTP) -> SMTP_REPLY_ALIAS:
+        return client.auth(self.mechanism, self.respond, initial_response_ok=True)
+
+    def respond(self, challenge: typing.Optional[bytes] = None) -> str:
+        return f"\0{self.username}\0{self.password}"
+
+
+class LoginAuth(PlainAuth):
+    """
+    The legacy AUTH LOGIN mechanism, the username & password are each sent in response to a challenge.
+    """
+
+    mechanism = "LOGIN"
+
+    def respond(self, challenge: typing.Optional[bytes] = None) -> str:
+        if challenge is None or challenge.decode("ascii", "replace").lower().startswith("username"):
+            return self.username
+        return self.password
+
+
+@dataclasses.dataclass(frozen=True)
+class AccessToken:
+    """
+    An OAuth2 bearer token.  `expires_at` is measured against `time.monotonic()`.
+    """
+
+    value: str
+    expires_at: float
+
+    @property
+    def expires_in(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+class TokenProvider:
+    """
+    Base class for OAuth2 access token sources.  Tokens are cached per account; a token that is within
+    `refresh_ahead` seconds of expiring is still handed out while a replacement is fetched on a background
+    thread, so senders only ever block on the very first fetch (or after a token has fully expired).
+    Subclasses implement `fetch`.
+
+    :param refresh_ahead: Seconds before expiry at which a background refresh is started, at most half the
+    lifetime of the token so that short lived tokens are not refreshed on every use.
+    """
+
+    def __init__(self, *, refresh_ahead: float = 60.0) -> None:
+        self.refresh_ahead = refresh_ahead
+        self.fetch_count = 0
+        self._tokens: typing.Dict[str, AccessToken] = {}
+        # The `time.monotonic()` at which each cached token is due to be refreshed.
+        self._refresh_at: typing.Dict[str, float] = {}
+        self._refreshing: typing.Dict[str, threading.Thread] = {}
+        self._locks: typing.Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, account: str) -> AccessToken:
+        """
+        Obtain a new access token for the account from the identity provider.
+
+        :raises AuthenticationException: If a token could not be obtained.
+        """
+        raise NotImplementedError
+
+    def token(self, account: str) -> str:
+        """
+        Return a valid access token for the account, from the cache where possible.
+        """
+        cached = self._tokens.get(account)
+        if cached is not None and cached.expires_in > 0:
+            if self._refresh_due(account):
+                self._refresh_in_background(account)
+            return cached.value
+        return self._refresh(account).value
+
+    def invalidate(self, account: str) -> None:
+        """
+        Discard the cached token for the account, e.g after the server rejected it.
+        """
+        with self._lock:
+            self._tokens.pop(account, None)
+
+    def _refresh_due(self, account: str) -> bool:
+        return time.monotonic() >= self._refresh_at.get(account, 0.0)
+
+    def _account_lock(self, account: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def _refresh(self, account: str) -> AccessToken:
+        with self._account_lock(account):
+            # Another thread may have refreshed the token while this one was waiting on the lock.
+            cached = self._tokens.get(account)
+            if cached is not None and not self._refresh_due(account):
+                return cached
+            token = self.fetch(account)
+            self.fetch_count += 1
+            self._refresh_at[account] = token.expires_at - min(self.refresh_ahead, token.expires_in / 2)
+            self._tokens[account] = token
+            return token
+
+    def _refresh_in_background(self, account: str) -> None:
+        with self._lock:
+            if account in self._refreshing:
+                return
+            thread = threading.Thread(
+                target=self._background_refresh, args=(account,), name=f"mailie-token-{account}", daemon=True
+            )
+            self._refreshing[account] = thread
+        thread.start()
+
+    def _background_refresh(self, account: str) -> None:
+        try:
+            self._refresh(account)
+        except AuthenticationException:
+            pass  # The cached token remains usable until it expires; the next caller retries synchronously.
+        finally:
+            with self._lock:
+                self._refreshing.pop(account, None)
+
+
+class OAuth2TokenProvider(TokenProvider):
+    """
+    Fetch access tokens from an OAuth2 token endpoint (RFC-6749).  Accounts with a refresh token use the
+    `refresh_token` grant, all others use `client_credentials`.  `token_url` can be pointed at any endpoint,
+    including a local stub when testing.
+
+    :param token_url: The token endpoint, e.g `https://oauth2.googleapis.com/token`.
+    :param client_id: The OAuth2 client id.
+    :param client_secret: The OAuth2 client secret (if any).
+    :param refresh_tokens: A mapping of account to refresh token.
+    :param scope: The (space separated) scopes to request.
+    :param timeout: Seconds to wait on the token endpoint, capped at the remaining budget of a send deadline.
+    :param refresh_ahead: Seconds before expiry at which a background refresh is started.
+    """
+
+    def __init__(
+        self,
+        token_url: str,
+        client_id: str,
+        client_secret: str = "",
+        *,
+        refresh_tokens: typing.Optional[typing.Mapping[str, str]] = None,
+        scope: str = "",
+        timeout: float = 10.0,
+        refresh_ahead: float = 60.0,
+    ) -> None:
+        super().__init__(refresh_ahead=refresh_ahead)
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_tokens = dict(refresh_tokens or {})
+        self.scope = scope
+        self.timeout = timeout
+
+    def fetch(self, account: str) -> AccessToken:
+        form = {"client_id": self.client_id}
+        if self.client_secret:
+            form["client_secret"] = self.client_secret
+        if self.scope:
+            form["scope"] = self.scope
+        if account in self.refresh_tokens:
+            form.update(grant_type="refresh_token", refresh_token=self.refresh_tokens[account])
+        else:
+            form["grant_type"] = "client_credentials"
+        request = urllib.request.Request(self.token_url, data=urllib.parse.urlencode(form).encode("ascii"))
+        requested_at, timeout = time.monotonic(), bounded_timeout(self.timeout)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                payload = json.load(response)
+            return AccessToken(payload["access_token"], requested_at + float(payload.get("expires_in", 3600)))
+        except (urllib.error.URLError, OSError, ValueError, KeyError) as exc:
+            raise AuthenticationException(f"Unable to obtain an access token for {account}: {exc}") from exc
+
+
+class OAuth2Auth(Auth):
+    """
+    AUTH XOAUTH2 using bearer tokens from a `TokenProvider`.  If the server rejects the token it is
+    evicted from the providers cache so that the next connection fetches a fresh one.
+    """
+
+    mechanism = "XOAUTH2"
+
+    def __init__(self, username: str, provider: TokenProvider) -> None:
+        self.username = username
+        self.provider = provider
+
+    def synchronous_auth(self, client: smtplib.SMTP) -> SMTP_REPLY_ALIAS:
+        token = self.provider.token(self.username)
 
-    def synchronous_auth(self):
-        ...
+        def respond(challenge: typing.Optional[bytes] = None) -> str:
+            # On failure the server sends a 334 with error details, which must be answered with an empty line.
+            return f"user={self.username}\1auth=Bearer {token}\1\1" if challenge is None else ""
 
-    async def asynchronous_auth(self):
-        ...
+        try:
+            return client.auth(self.mechanism, respond, initial_response_ok=True)
+        except smtplib.SMTPAuthenticationError:
+            self.provider.invalidate(self.username)
+            raise
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import dataclasses
+import itertools
+import os
+import smtplib
+import typing
+
+from ._client import SyncClient
+from ._email import Email
+from ._exceptions import InvalidEmailAddressException
+
+SENT = "sent"
+REFUSED = "refused"
+FAILED = "failed"
+_STATUSES = (SENT, REFUSED, FAILED)
+
+
+class RecipientSource:
+    """
+    A source of recipients that can be resumed from an opaque integer `cursor` without re-reading the
+    recipients that precede it.  `resume` yields (cursor, address) pairs where cursor is the position
+    immediately *after* that address.
+    """
+
+    def resume(self, cursor: int) -> typing.Iterator[typing.Tuple[int, str]]:
+        raise NotImplementedError
+
+
+class SequenceSource(RecipientSource):
+    """
+    Recipients held in memory, the cursor is the list index.
+    """
+
+    def __init__(self, recipients: typing.Sequence[str]) -> None:
+        self.recipients = recipients
+
+    def resume(self, cursor: int) -> typing.Iterator[typing.Tuple[int, str]]:
+        for index in range(cursor, len(self.recipients)):
+            yield index + 1, self.recipients[index]
+
+
+class FileSource(RecipientSource):
+    """
+    A newline delimited file of recipients, the cursor is a byte offset so resuming is a single seek.
+    Blank lines and lines beginning with `#` are ignored.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike[str]], encoding: str = "utf-8") -> None:
+        self.path = path
+        self.encoding = encoding
+
+    def resume(self, cursor: int) -> typing.Iterator[typing.Tuple[int, str]]:
+        with open(self.path, "rb") as file:
+            file.seek(cursor)
+            for line in iter(file.readline, b""):
+                address = line.decode(self.encoding).strip()
+                if address and not address.startswith("#"):
+                    yield file.tell(), address
+
+
+class IterableSource(RecipientSource):
+    """
+    An arbitrary iterable of recipients, the cursor is a count.  Iterables cannot seek so resuming
+    consumes (without sending) the recipients before the cursor; prefer `FileSource` for large lists.
+    """
+
+    def __init__(self, recipients: typing.Iterable[str]) -> None:
+        self.recipients = recipients
+
+    def resume(self, cursor: int) -> typing.Iterator[typing.Tuple[int, str]]:
+        yield from enumerate(itertools.islice(self.recipients, cursor, None), start=cursor + 1)
+
+
+@dataclasses.dataclass(frozen=True)
+class Checkpoint:
+    """
+    A single log record, the outcome of sending to `address` and the source cursor after it.
+    """
+
+    cursor: int
+    status: str
+    code: int
+    address: str
+
+    def encode(self) -> bytes:
+        return f"{self.cursor}\t{self.status}\t{self.code}\t{self.address}\n".encode("utf-8")
+
+    @classmethod
+    def decode(cls, line: bytes) -> Checkpoint:
+        cursor, status, code, address = line.decode("utf-8").rstrip("\n").split("\t")
+        if status not in _STATUSES:
+            raise ValueError(f"unknown status: {status}")
+        return cls(int(cursor), status, int(code), address)
+
+
+class CampaignLog:
+    """
+    An append-only, tab separated log of checkpoints.  On open the log is replayed into an in-memory index
+    of address -> `Checkpoint` so that lookups are O(1), and the cursor of the final record is the resume
+    position.  A torn final record (e.g the process died mid write) is truncated away.
+
+    :param path: The log file, created if it does not exist.
+    :param fsync_every: `os.fsync` the log after this many records; `1` is the most durable, `0` never syncs
+    (records are still flushed to the OS after every write).
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike[str]], *, fsync_every: int = 100) -> None:
+        self.path = path
+        self.fsync_every = fsync_every
+        self.cursor = 0
+        self._index: typing.Dict[str, Checkpoint] = {}
+        self._unsynced = 0
+        self._file = open(path, "ab+")
+        self._replay()
+
+    def __enter__(self) -> CampaignLog:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, address: object) -> bool:
+        return address in self._index
+
+    def get(self, address: str) -> typing.Optional[Checkpoint]:
+        return self._index.get(address)
+
+    def _replay(self) -> None:
+        self._file.seek(0)
+        valid_to = 0
+        for line in iter(self._file.readline, b""):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("torn record")
+                checkpoint = Checkpoint.decode(line)
+            except ValueError:
+                break
+            self._index[checkpoint.address] = checkpoint
+            self.cursor = checkpoint.cursor
+            valid_to = self._file.tell()
+        self._file.truncate(valid_to)
+        self._file.seek(valid_to)
+
+    def append(self, checkpoint: Checkpoint) -> None:
+        self._file.write(checkpoint.encode())
+        self._file.flush()
+        self._index[checkpoint.address] = checkpoint
+        self.cursor = checkpoint.cursor
+        self._unsynced += 1
+        if self.fsync_every and self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+@dataclasses.dataclass
+class CampaignResult:
+    """
+    Tallies for a single `Campaign.run()`, recipients completed by earlier runs are not included.
+    """
+
+    sent: int = 0
+    refused: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+class Campaign:
+    """
+    Send an individually rendered email to every recipient of a (potentially very large) list, recording
+    the outcome of each send in a `CampaignLog`.  If the run is interrupted, running a campaign with the
+    same log resumes immediately after the last recorded recipient, nothing is sent twice and the
+    recipients already processed are not re-read (for seekable sources).
+
+    Permanent (5xx) failures are recorded and the campaign moves on; transient errors and disconnects
+    propagate, leaving the log ready to resume.  Invalid addresses are recorded with a 553, as `refused`
+    when the recipient itself is invalid and `failed` otherwise (e.g the rendered sender).
+
+    :param client: The `SyncClient` used for every send.
+    :param render: A callable returning the `Email` for a recipient.
+    :param recipients: A `RecipientSource`, a sequence or any iterable of addresses.
+    :param log: The path of the campaign log (or an open `CampaignLog`).
+    :param fsync_every: See `CampaignLog`.
+    """
+
+    def __init__(
+        self,
+        client: SyncClient,
+        render: typing.Callable[[str], Email],
+        recipients: typing.Union[RecipientSource, typing.Sequence[str], typing.Iterable[str]],
+        log: typing.Union[str, os.PathLike[str], CampaignLog],
+        *,
+        fsync_every: int = 100,
+    ) -> None:
+        self.client = client
+        self.render = render
+        self.source = self._as_source(recipients)
+        self.log = log if isinstance(log, CampaignLog) else CampaignLog(log, fsync_every=fsync_every)
+
+    @staticmethod
+    def _as_source(recipients: typing.Any) -> RecipientSource:
+        if isinstance(recipients, RecipientSource):
+            return recipients
+        if isinstance(recipients, typing.Sequence) and not isinstance(recipients, str):
+            return SequenceSource(recipients)
+        return IterableSource(recipients)
+
+    def __enter__(self) -> Campaign:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.log.close()
+
+    def status(self, address: str) -> typing.Optional[str]:
+        """
+        The recorded outcome for the address, `None` if it has not been attempted.
+        """
+        checkpoint = self.log.get(address)
+        return checkpoint.status if checkpoint is not None else None
+
+    def run(self, limit: typing.Optional[int] = None) -> CampaignResult:
+        """
+        Send to every remaining recipient (or at most `limit` of them).
+        """
+        result = CampaignResult()
+        for cursor, address in itertools.islice(self.source.resume(self.log.cursor), limit):
+            if address in self.log:
+                # Duplicate in the source; only the first occurrence is sent.
+                self.log.cursor = cursor
+                result.skipped += 1
+                continue
+            status, code = self._send(address)
+            self.log.append(Checkpoint(cursor, status, code, address))
+            setattr(result, status, getattr(result, status) + 1)
+        self.log.sync()
+        return result
+
+    def _send(self, address: str) -> typing.Tuple[str, int]:
+        try:
+            self.client.send(email=self.render(address), to_addrs=[address])
+        except InvalidEmailAddressException as exc:
+            return REFUSED if address in exc.invalid else FAILED, 553
+        except smtplib.SMTPRecipientsRefused as exc:
+            code = exc.recipients.get(address, (550, b""))[0]
+            if code < 500:
+                raise
+            return REFUSED, code
+        except smtplib.SMTPResponseException as exc:
+            if exc.smtp_code < 500:
+                raise
+            return FAILED, exc.smtp_code
+        return SENT, 250
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import dataclasses
+import smtplib
+import threading
+import time
+import types
+import typing
+
+CAPABILITY_KEY_ALIAS = typing.Tuple[str, int]
+
+
+@dataclasses.dataclass(frozen=True)
+class Capabilities:
+    """
+    A snapshot of the (E)SMTP features a server advertised in response to EHLO.  Feature keywords are
+    lower cased, in keeping with `smtplib.SMTP.esmtp_features`.
+    """
+
+    host: str
+    port: int
+    features: typing.Mapping[str, str]
+    does_esmtp: bool
+    fetched_at: float = dataclasses.field(default_factory=time.monotonic)
+
+    def supports(self, extension: str) -> bool:
+        return extension.lower() in self.features
+
+    @property
+    def max_size(self) -> typing.Optional[int]:
+        """
+        The servers SIZE limit in bytes, `None` if it is not advertised (or is advertised as unlimited).
+        """
+        size = self.features.get("size", "")
+        return int(size) if size.isdigit() and int(size) > 0 else None
+
+
+class CapabilityCache:
+    """
+    A thread safe, process wide cache of server capabilities keyed on (host, port).  Entries expire after
+    `ttl` seconds.  The cache allows message encoding, size checks and batching to be planned before a
+    connection is made and stops clients from re-probing capabilities they have already discovered.
+
+    EHLO is still sent once at the start of every SMTP session, as required by RFC-5321; what the cache
+    removes are dedicated probe connections and repeated EHLOs within a session.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self.ttl = ttl
+        self._entries: typing.Dict[CAPABILITY_KEY_ALIAS, Capabilities] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, host: str, port: int) -> typing.Optional[Capabilities]:
+        """
+        Return the cached capabilities for (host, port), `None` if unknown or expired.
+        """
+        entry = self._entries.get((host.lower(), port))
+        if entry is None or time.monotonic() - entry.fetched_at > self.ttl:
+            return None
+        return entry
+
+    def put(self, host: str, port: int, features: typing.Mapping[str, str], does_esmtp: bool = True) -> Capabilities:
+        """
+        Store the features advertised by (host, port), returning the cached `Capabilities`.
+        """
+        entry = Capabilities(host.lower(), port, types.MappingProxyType(dict(features)), does_esmtp)
+        with self._lock:
+            self._entries[(entry.host, port)] = entry
+        return entry
+
+    def update_from(self, host: str, port: int, client: smtplib.SMTP) -> typing.Optional[Capabilities]:
+        """
+        Cache the features of an `smtplib.SMTP` instance that has already greeted the server.
+        """
+        if client.ehlo_resp is None and client.helo_resp is None:
+            return None
+        return self.put(host, port, client.esmtp_features, bool(client.does_esmtp))
+
+    def invalidate(self, host: typing.Optional[str] = None, port: typing.Optional[int] = None) -> None:
+        """
+        Evict the entry for (host, port), every entry for the host if no port is provided, or every entry if
+        no host is provided.
+        """
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            elif port is None:
+                for key in [key for key in self._entries if key[0] == host.lower()]:
+                    del self._entries[key]
+            else:
+                self._entries.pop((host.lower(), port), None)
+
+    def probe(
+        self,
+        host: str,
+        port: int,
+        *,
+        delegate_client: typing.Type[smtplib.SMTP] = smtplib.SMTP,
+        timeout: float = 30.0,
+        **client_kwargs: typing.Any,
+    ) -> Capabilities:
+        """
+        Connect to (host, port), send EHLO and cache the advertised features.  The connection is closed
+        immediately afterwards.
+        """
+        with delegate_client(host=host, port=port, timeout=timeout, **client_kwargs) as client:
+            client.ehlo_or_helo_if_needed()
+            return typing.cast(Capabilities, self.update_from(host, port, client))
+
+    def lookup(self, host: str, port: int, **probe_kwargs: typing.Any) -> Capabilities:
+        """
+        Return the cached capabilities for (host, port), probing the server if they are unknown or stale.
+        """
+        return self.get(host, port) or self.probe(host, port, **probe_kwargs)
+
+
+capability_cache = CapabilityCache()
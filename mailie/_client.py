@@ -1,28 +1,66 @@
 from __future__ import annotations
 
+import contextlib
+import copy
 import enum
 import functools
 import logging
+import os
 import smtplib
+import ssl
+import time
 import typing
+from email.message import EmailMessage
 
+from ._capabilities import Capabilities
+from ._capabilities import CapabilityCache
+from ._capabilities import capability_cache as default_capability_cache
+from ._deadline import Deadline
+from ._deadline import current_deadline
+from ._dkim import DKIM_SIGNATURE_HEADER
+from ._dkim import DKIMSigner
 from ._email import Email
+from ._encoding import flatten
+from ._encoding import flatten_binary
+from ._encoding import has_base64_parts
+from ._encoding import iter_chunks
+from ._encoding import negotiate
+from ._encoding import set_mail_option
+from ._exceptions import DeadlineExceededException
 from ._exceptions import MailieClientClosedException
+from ._exceptions import StartTLSNotSupportedException
+from ._hooks import HookDispatcher
+from ._hooks import validate_hooks
+from ._logging import LogSampler
+from ._logging import log_event
+from ._logging import log_sampler as default_log_sampler
+from ._metrics import ClientMetrics
+from ._metrics import MetricsRegistry
+from ._metrics import metrics as default_metrics
+from ._profiling import Profiler
+from ._response import SMTP_REPLY_ALIAS
 from ._response import SMTPResponse
+from ._results import ResultSink
+from ._results import build_record
+from ._tls import ResumingSSLContext
+from ._tls import TLSSessionCache
+from ._tls import default_tls_context
+from ._tls import tls_session_key
 from ._types import EMAIL_FROM_TO_TYPES
-from ._types import HOOKS_ALIAS
 from ._types import SMTP_AUTH_ALIAS
 
 # Todo: Async support here; can we work around duplicating the API?
 # Todo: How do we encapsulate sending plain vs SSL?
 # Todo: plaintext -> :: TLS :: -> plaintext upgraded via startTLS -> user defined commands?
-# Todo: Handle `auth` & `login` in the conversation gracefully?
 # Todo: Consider enforcing port 587 if starttls=True?
-# Todo: Auth should be encapsulated; consider a function/callable too for user defined auth?
 # Todo: This is massively WIP and quite an information overload; break it down into atomic pieces and tackle?
 # Todo: Consider a 'transport' layer to split sync/async?
 log = logging.getLogger(__name__)
 
+_SMTPLIB_UTF8_OPTIONS = ("SMTPUTF8", "BODY=8BITMIME")
+
+_T = typing.TypeVar("_T")
+
 
 def raise_on_closed(fn):
     """
@@ -52,6 +90,63 @@ class SyncClient:
     A simple mail client that supports SMTP, SMTP_SSL & LMTP as well as any subclasses of
     smtplib.SMTP.  This client is synchronous and will dispatch mails sequentially (if
     multiple are provided).
+
+    With `delegate_client=smtplib.LMTP` the client speaks LMTP (RFC-2033), i.e to deliver straight into a
+    local mailstore; `host` may be the path of a unix socket.  The MAIL, RCPT and DATA commands are pipelined
+    and after the content the server replies once per accepted recipient.  Those replies are recorded in
+    `SMTPResponse.deliveries` and recipients whose delivery failed are refused (see `result`), so only they
+    need to be sent again.  Content is always sent with DATA in LMTP mode.
+
+    Optionally a `DKIMSigner` can be provided via `dkim=`, every email is then signed immediately
+    before it is sent.
+
+    When the server advertises both CHUNKING and BINARYMIME (RFC-3030) emails with base64 encoded
+    parts (attachments) are sent with those parts in their raw binary form using `BDAT` chunks of
+    `chunk_size` bytes, avoiding base64 inflation and dot stuffing.  Pass `binary_transfer=False`
+    to always use DATA.  Binary transfer is not used for DKIM signed mail.
+
+    The features advertised by the server are recorded in `capability_cache` (the process wide
+    `mailie.capability_cache` by default) keyed on host & port, see `SyncClient.capabilities`.
+
+    Encrypted connections, either implicit TLS (`delegate_client=smtplib.SMTP_SSL`) or `starttls=True`, use
+    `ssl_context`.  By default every client shares a single process wide `ResumingSSLContext` so that
+    subsequent connections to the same server resume the previous TLS session rather than performing a
+    full handshake, see `SyncClient.tls_sessions` for the resumption hit rate.  The default context verifies
+    the servers certificate and hostname, for implicit TLS too (`smtplib.SMTP_SSL` alone does not); to
+    connect to a server with a self-signed certificate, pass an `ssl_context` trusting it.
+
+    When `auth` is provided (e.g `PlainAuth`, `LoginAuth` or `OAuth2Auth`) each session authenticates once,
+    immediately after the greeting (and STARTTLS upgrade).
+
+    Messages sent & failed, refused recipients, bytes written and the time spent connecting, greeting and
+    sending are recorded in `metrics` (the process wide `mailie.metrics` registry by default).
+
+    When a `result_sink` (e.g `NDJSONResultSink`) is provided the outcome of every send, successful or not,
+    is recorded to it; useful for bulk sends where holding every `SMTPResponse` in memory is not an option.
+
+    `timeout` applies to each blocking socket operation.  To bound the total time of a send, `deadline` sets
+    a budget in seconds covering every operation the send performs (connecting, TLS, EHLO, AUTH, the envelope
+    and the content); each operation is given at most the remaining budget.  When the deadline passes the
+    connection is closed, `DeadlineExceededException` is raised and the next send reconnects.  It can be
+    overridden per send with `send(deadline=...)`, the initial connection is bounded by the client deadline.
+
+    Recipients are split across transactions of at most `max_recipients` (or the RCPTMAX the server
+    advertises), each transaction uploading the content once, with the results merged into one response.
+    When the server defers recipients with a 452 (too many recipients) they are sent in a further
+    transaction and the limit is learnt for subsequent sends.  If a later transaction fails the exception
+    propagates, the recipients of earlier transactions have already been sent the email.
+
+    `hooks` are called at points of every send (see `mailie._hooks.HOOK_POINTS`); `pre` with the email,
+    `recipient` with each address and its RCPT reply, then `post` with the response or `error` with the email
+    and exception.  By default hooks are called inline, pass `hook_dispatcher=ThreadedHookDispatcher()` to call
+    them on background threads, off the send path, with bounded queueing.  Exceptions raised by hooks called
+    after a failed send are logged, the exception of the send is the one raised.
+
+    Every send logs a structured event to the `mailie._client` logger; `sent` / `partial` at INFO and `failed`
+    at WARNING, with the envelope, replies, bytes written and timings attached as `record.mailie` (see
+    `JSONFormatter`).  Events are only built when the level is enabled and `log_sampler` selects them, i.e
+    `LogSampler(successes=1000)` logs one in a thousand successes and every failure.  `debug` remains the
+    way to trace the protocol itself.
     """
 
     def __init__(
@@ -65,20 +160,64 @@ class SyncClient:
         timeout: float = 30.00,
         auth: typing.Optional[SMTP_AUTH_ALIAS] = None,
         debug: int = 0,
-        hooks: typing.Optional[typing.Dict[str, typing.Callable[[typing.Any], typing.Any]]] = None,
+        hooks: typing.Optional[typing.Dict[str, typing.Callable[..., typing.Any]]] = None,
+        dkim: typing.Optional[DKIMSigner] = None,
+        binary_transfer: bool = True,
+        chunk_size: int = 1048576,
+        capability_cache: CapabilityCache = default_capability_cache,
+        metrics: MetricsRegistry = default_metrics,
+        ssl_context: typing.Optional[ssl.SSLContext] = None,
+        starttls: bool = False,
+        result_sink: typing.Optional[ResultSink] = None,
+        deadline: typing.Optional[float] = None,
+        max_recipients: typing.Optional[int] = None,
+        hook_dispatcher: typing.Optional[HookDispatcher] = None,
+        log_sampler: LogSampler = default_log_sampler,
         **client_kwargs,
     ) -> None:
         client_kwargs = self._merge_client_arguments(client_kwargs, host, port, local_hostname, source_address)
+        client_kwargs.setdefault("timeout", timeout)
+        implicit_tls = issubclass(delegate_client, smtplib.SMTP_SSL)
+        if ssl_context is None and (starttls or implicit_tls):
+            ssl_context = client_kwargs.get("context") or default_tls_context()
+        if implicit_tls:
+            client_kwargs["context"] = ssl_context
+        self.ssl_context = ssl_context
+        self.starttls = starttls and not implicit_tls
+        self.lmtp = issubclass(delegate_client, smtplib.LMTP)
         self.debug = debug
-        self.hooks = hooks
+        self.hooks = validate_hooks(hooks)
+        self.hook_dispatcher = hook_dispatcher or HookDispatcher()
         self.timeout = timeout
         self.auth = auth
-        self.delegate = delegate_client(**client_kwargs)
+        self.dkim = dkim
+        self.binary_transfer = binary_transfer
+        self.chunk_size = chunk_size
+        self.host = host
+        self.port = port
+        self.capability_cache = capability_cache
+        self.metrics = ClientMetrics.register(metrics)
+        self.result_sink = result_sink
+        self.deadline = deadline
+        self.max_recipients = max_recipients
+        self.log_sampler = log_sampler
+        self._bytes_sent = 0
+        self._deliveries: typing.Dict[str, SMTP_REPLY_ALIAS] = {}
+        self._cancelled = False
+        self._replies: typing.Dict[str, SMTP_REPLY_ALIAS] = {}
+        self._final_reply: typing.Optional[SMTP_REPLY_ALIAS] = None
+        self._timings: typing.Dict[str, float] = {}
+        self._transactions: typing.List[typing.Optional[SMTP_REPLY_ALIAS]] = []
+        self._accepted: typing.List[str] = []
+        # Connect once the delegate is instrumented, so the greeting is read within the deadline.
+        self.delegate = delegate_client(**{**client_kwargs, "host": ""})
+        self._count_written_bytes()
+        self._record_replies()
+        self._enforce_deadlines()
+        with self._deadline(None):
+            self._connect()
         self.state = ClientState.NOT_YET_OPENED
         self.delegate.set_debuglevel(self.debug)
-        hooks = hooks or {}
-        self.before: typing.Optional[HOOKS_ALIAS] = hooks.get("pre")
-        self.after: typing.Optional[HOOKS_ALIAS] = hooks.get("post")
 
     @staticmethod
     def _merge_client_arguments(
@@ -115,6 +254,8 @@ class SyncClient:
         mail_options: typing.Optional[typing.Sequence[str]] = None,
         rcpt_options: typing.Optional[typing.Sequence[str]] = None,
         enforce_all: bool = False,
+        deadline: typing.Optional[float] = None,
+        batch_size: typing.Optional[int] = None,
     ) -> SMTPResponse:
         """
         Synchronously send an email.  from_addr & to_addrs are envelope senders, not to be confused with actual
@@ -126,6 +267,8 @@ class SyncClient:
         :param mail_options: ESMTP options that should be passed with all MAIL FROM commands. (i.e 8bitmime)
         :param rcpt_options: ESMTP options that should be passed with all RCPT commands. (i.e DSN)
         :param enforce_all: Raise an exception if ALL to_addrs did not successfully receive the message.
+        :param deadline: (optional) The total seconds the send may take, defaults to the clients `deadline`.
+        :param batch_size: (optional) The most recipients per transaction, defaults to the clients `max_recipients`.
 
         Right now mailie only supports high level sending APIs.  In future an Email obj will be 'aware' of the
         rcpt and mail options it can provide here.  Mailie only supports sending `Email` instances for a simpler
@@ -142,19 +285,184 @@ class SyncClient:
 
         Typically, by default only ASCII is permitted for to/from addresses, however if mail_options contains
         `SMTPUTF8` then non ascii characters will be permitted (if the server supports it).
+
+        Before sending, the transfer encoding is negotiated against the servers EHLO features (see
+        `mailie.negotiate`): text parts are sent as 8bit when 8BITMIME is available (downgraded when it is
+        not) and SMTPUTF8 is requested for international envelopes, the mail options are amended to suit.
+
+        Emails loaded with `Email.from_bytes(..., headers_only=True)` whose body has not been parsed are sent
+        with their original body bytes, without building the MIME tree, provided the envelope is explicit and
+        the server can accept the content as-is.
         """
         self.state = ClientState.OPENED
+        from_addr = from_addr or email.mail_from
+        to_addrs = to_addrs or email.rcpt_to
+        envelope = [from_addr or "", *([to_addrs] if isinstance(to_addrs, str) else to_addrs)]
+        self._replies, self._final_reply, self._timings, self._transactions = {}, None, {}, []
+        self._deliveries, self._bytes_sent, self._accepted = {}, 0, []
+        self._hook("pre", email)
+        started = time.perf_counter()
+        try:
+            with self._deadline(deadline):
+                if self._cancelled:
+                    self._connect()
+                refused = self._transact(email, envelope, from_addr, to_addrs, mail_options, rcpt_options, batch_size)
+        except Exception as exc:
+            self._observe_send(started)
+            self.metrics.messages_failed.inc(error=type(exc).__name__)
+            if isinstance(exc, smtplib.SMTPRecipientsRefused):
+                self.metrics.recipients_refused.inc(len(exc.recipients))
+            if self.result_sink is not None:
+                self.result_sink.record(self._response(email, envelope, {}, enforce_all), exc)
+
+            def failure_fields(error: BaseException = exc) -> typing.Dict[str, typing.Any]:
+                return self._log_fields(self._response(email, envelope, {}, enforce_all), error)
+
+            log_event(log, logging.WARNING, "send failed", failure_fields, sampler=self.log_sampler, failed=True)
+            try:
+                self._hook_recipients()
+                self._hook("error", email, exc)
+            except Exception:
+                log.exception("A hook raised handling the failure of a send")
+            raise
+        self._observe_send(started)
+        self.metrics.messages_sent.inc()
+        if refused:
+            self.metrics.recipients_refused.inc(len(refused))
+        response = self._response(email, envelope, refused, enforce_all)
+        if self.result_sink is not None:
+            self.result_sink.record(response)
+        log_event(log, logging.INFO, "send completed", lambda: self._log_fields(response), sampler=self.log_sampler)
+        self._hook_recipients()
+        self._hook("post", response)
+        return response
+
+    def _log_fields(
+        self, response: SMTPResponse, error: typing.Optional[BaseException] = None
+    ) -> typing.Dict[str, typing.Any]:
+        return {**build_record(response, error), "host": self.host, "port": self.port, "bytes": self._bytes_sent}
+
+    def _hook(self, point: str, *args: typing.Any) -> None:
+        hook = self.hooks.get(point)
+        if hook is not None:
+            self.hook_dispatcher.dispatch(point, hook, *args)
+
+    def _hook_recipients(self) -> None:
+        if "recipient" in self.hooks:
+            for address, reply in self._replies.items():
+                self._hook("recipient", address, reply)
+
+    def _deadline(self, budget: typing.Optional[float]) -> typing.ContextManager[typing.Any]:
+        budget = self.deadline if budget is None else budget
+        return Deadline(budget) if budget is not None else contextlib.nullcontext()
+
+    def _connect(self) -> None:
+        """
+        (Re)connect the delegate, starting a new session.  `smtplib` only records the host (used as the TLS
+        server name) when constructed with one.
+        """
+        self.delegate._host = self.host  # type: ignore[attr-defined]
+        with self.metrics.phase_duration.time(phase="connect"):
+            deadline = current_deadline()
+            try:
+                self.delegate.timeout = self.timeout if deadline is None else deadline.timeout(self.timeout)
+                with tls_session_key(self.host, self.port):
+                    self.delegate.connect(self.host, self.port)
+            except OSError as exc:
+                if deadline is None or not deadline.expired:
+                    raise
+                self.delegate.close()
+                raise DeadlineExceededException(f"Deadline of {deadline.budget}s exceeded connecting") from exc
+            finally:
+                self.delegate.timeout = self.timeout
+        self.delegate.ehlo_resp = self.delegate.helo_resp = None
+        self.delegate.esmtp_features, self.delegate.does_esmtp = {}, False
+        self._cancelled = False
+
+    def _observe_send(self, started: float) -> None:
+        self._timings["send"] = elapsed = time.perf_counter() - started
+        self.metrics.phase_duration.observe(elapsed, phase="send")
+
+    def _response(
+        self,
+        email: Email,
+        envelope: typing.Sequence[str],
+        refused: typing.Dict[str, SMTP_REPLY_ALIAS],
+        enforce_all: bool,
+    ) -> SMTPResponse:
+        return SMTPResponse(
+            refused,
+            enforce_all,
+            envelope=envelope,
+            message_id=email.get("Message-ID"),
+            recipients=self._replies,
+            reply=self._final_reply,
+            timings=self._timings,
+            transactions=self._transactions,
+            deliveries=self._deliveries,
+        )
+
+    def _transact(
+        self,
+        email: Email,
+        envelope: typing.Sequence[str],
+        from_addr: typing.Optional[str],
+        to_addrs: EMAIL_FROM_TO_TYPES,
+        mail_options: typing.Optional[typing.Sequence[str]],
+        rcpt_options: typing.Optional[typing.Sequence[str]],
+        batch_size: typing.Optional[int],
+    ) -> typing.Dict[str, typing.Tuple[int, bytes]]:
+        """
+        Greet the server (if necessary) and send the email, returning the refused recipients.
+        """
         # Todo: Decide what needs handled and what can be bubbled etc.
         try:
-            return SMTPResponse(
-                self.delegate.send_message(
-                    msg=email.email_message,  # type: ignore[arg-type]
-                    from_addr=from_addr or email.mail_from,
-                    to_addrs=to_addrs or email.rcpt_to,
-                    mail_options=mail_options or (),
+            self._greet()
+            deliver: typing.Callable[[typing.List[str]], typing.Dict[str, SMTP_REPLY_ALIAS]]
+            if self.lmtp:
+                content, options = self._lmtp_content(email, envelope, mail_options or ())
+                deliver = functools.partial(
+                    self._send_lmtp, content, envelope[0], mail_options=options, rcpt_options=rcpt_options or ()
+                )
+                return self._deliver_in_batches(deliver, envelope[1:], batch_size)
+            raw = email.raw_bytes()
+            if raw is not None and self._supports_raw_transfer(raw, envelope):
+                deliver = functools.partial(
+                    self._send_raw, raw, envelope[0], mail_options=mail_options or (), rcpt_options=rcpt_options or ()
+                )
+                return self._deliver_in_batches(deliver, envelope[1:], batch_size)
+            negotiated = negotiate(
+                email.email_message, self.delegate.esmtp_features, envelope=envelope, mail_options=mail_options or ()
+            )
+            if self._supports_binary_transfer(negotiated.message):
+                # Re-encoded and flattened once, every batch transmits the same content.
+                content = flatten_binary(negotiated.message, negotiated.message.policy, utf8=negotiated.utf8)
+                deliver = functools.partial(
+                    self._send_binary,
+                    content,
+                    envelope[0],
+                    mail_options=negotiated.mail_options,
+                    rcpt_options=rcpt_options or (),
+                )
+                return self._deliver_in_batches(deliver, envelope[1:], batch_size)
+            if self.dkim is not None:
+                self.dkim.sign_message(negotiated.message, utf8=negotiated.utf8)
+            # smtplib appends SMTPUTF8 & BODY=8BITMIME itself for international envelopes.
+            options = [
+                option
+                for option in negotiated.mail_options
+                if not negotiated.utf8 or option.upper() not in _SMTPLIB_UTF8_OPTIONS
+            ]
+            return self._deliver_in_batches(
+                lambda batch: self.delegate.send_message(
+                    msg=negotiated.message,  # type: ignore[arg-type]
+                    from_addr=from_addr,
+                    to_addrs=batch,
+                    mail_options=options,
                     rcpt_options=rcpt_options or (),
                 ),
-                enforce_all,
+                envelope[1:],
+                batch_size,
             )
         # All recipients got refused.
         except smtplib.SMTPRecipientsRefused:
@@ -162,6 +470,9 @@ class SyncClient:
         # The server failed to respond to HELO (After EHLO)
         except smtplib.SMTPHeloError:
             raise
+        # The server rejected the credentials provided by `auth`.
+        except smtplib.SMTPAuthenticationError:
+            raise
         # The server refused the from_address.
         except smtplib.SMTPSenderRefused:
             raise
@@ -172,6 +483,363 @@ class SyncClient:
         except smtplib.SMTPNotSupportedError:
             raise
 
+    def _recipient_limit(self) -> typing.Optional[int]:
+        """
+        The most recipients per transaction; `max_recipients` if set (or learnt), otherwise the RCPTMAX
+        advertised by the LIMITS extension (RFC-9422), if any.
+        """
+        if self.max_recipients:
+            return self.max_recipients
+        for limit in self.delegate.esmtp_features.get("limits", "").split():
+            name, _, value = limit.partition("=")
+            if name.upper() == "RCPTMAX" and value.isdigit() and int(value) > 0:
+                return int(value)
+        return None
+
+    def _deliver_in_batches(
+        self,
+        deliver: typing.Callable[[typing.List[str]], typing.Dict[str, SMTP_REPLY_ALIAS]],
+        recipients: typing.Sequence[str],
+        batch_size: typing.Optional[int],
+    ) -> typing.Dict[str, SMTP_REPLY_ALIAS]:
+        """
+        Deliver identical content to the recipients in as many transactions as the recipient limit requires,
+        merging the refused recipients.  Recipients deferred with a 452 (too many recipients) are carried
+        into the next transaction and the number accepted before the first 452 becomes `max_recipients`.
+        Raises `SMTPRecipientsRefused` (with every refusal) only if no recipient was accepted at all.
+        """
+        limit = batch_size or self._recipient_limit()
+        pending, refused, accepted = list(recipients), {}, False
+        while pending:
+            size = limit or len(pending)
+            batch, pending = pending[:size], pending[size:]
+            try:
+                batch_refused, delivered = deliver(batch), True
+            except smtplib.SMTPRecipientsRefused as exc:
+                if self.delegate.sock is None:  # 421, the server closed the session.
+                    raise
+                batch_refused, delivered = exc.recipients, False
+            if delivered:
+                self._transactions.append(self._final_reply)
+                self._accepted.extend(address for address in batch if address not in batch_refused)
+            # Only RCPT deferrals, an LMTP delivery failing with a 452 (i.e over quota) is a refusal.
+            deferred = [
+                address
+                for address in batch
+                if batch_refused.get(address, (0,))[0] == 452 and address not in self._deliveries
+            ]
+            if delivered and deferred:
+                limit = len(batch) - len(batch_refused)
+                self.max_recipients = min(self.max_recipients or limit, limit)
+                pending = deferred + pending
+                batch_refused = {a: reply for a, reply in batch_refused.items() if a not in deferred}
+            refused.update(batch_refused)
+            accepted = accepted or delivered
+        if not accepted:
+            raise smtplib.SMTPRecipientsRefused(refused)
+        return refused
+
+    def _greet(self) -> None:
+        """
+        Send EHLO (falling back to HELO) if this session has not yet greeted the server, caching the
+        advertised features.  When `starttls=True` the connection is upgraded and EHLO is re-issued, as
+        required by RFC-3207, the session is then authenticated if `auth` was provided.  Later calls on the
+        same session are free.
+        """
+        if self.delegate.ehlo_resp is None and self.delegate.helo_resp is None:
+            started = time.perf_counter()
+            with self.metrics.phase_duration.time(phase="greet"):
+                self.delegate.ehlo_or_helo_if_needed()
+                if self.starttls and not isinstance(self.delegate.sock, ssl.SSLSocket):
+                    if not self.delegate.has_extn("starttls"):
+                        raise StartTLSNotSupportedException(f"{self.host}:{self.port} does not support STARTTLS")
+                    with tls_session_key(self.host, self.port):
+                        self.delegate.starttls(context=self.ssl_context)
+                    self.delegate.ehlo()
+                self.capability_cache.update_from(self.host, self.port, self.delegate)
+                if self.auth is not None:
+                    self.auth.auth(self.delegate)
+            self._timings["greet"] = time.perf_counter() - started
+
+    def _count_written_bytes(self) -> None:
+        """
+        Count the bytes written through the delegate.  Every write `smtplib` makes goes through `send()`, which
+        is wrapped on the instance so that any `smtplib.SMTP` subclass can be used as the delegate.
+        """
+        send, bytes_written = self.delegate.send, self.metrics.bytes_written
+
+        def counting_send(data: typing.Union[str, bytes, memoryview]) -> None:
+            bytes_written.inc(len(data))
+            self._bytes_sent += len(data)
+            send(data)
+
+        self.delegate.send = counting_send  # type: ignore[assignment]
+
+    def _record_replies(self) -> None:
+        """
+        Record the reply to every RCPT and the final reply to the message content for the current send, in
+        the same way as `_count_written_bytes`.  `smtplib` discards these once the transaction succeeds.
+        """
+        rcpt, data = self.delegate.rcpt, self.delegate.data
+
+        def recording_rcpt(recip: str, options: typing.Sequence[str] = ()) -> SMTP_REPLY_ALIAS:
+            self._replies[recip] = reply = rcpt(recip, options)
+            return reply
+
+        def recording_data(msg: typing.Union[str, bytes]) -> SMTP_REPLY_ALIAS:
+            self._final_reply = reply = data(msg)
+            return reply
+
+        self.delegate.rcpt = recording_rcpt  # type: ignore[assignment]
+        self.delegate.data = recording_data  # type: ignore[assignment]
+
+    def _enforce_deadlines(self) -> None:
+        """
+        Bound every write & read by the remaining budget of the current `Deadline`, in the same way as
+        `_count_written_bytes`.  STARTTLS is bounded as a whole so that the TLS handshake, which inherits the
+        socket timeout, is too.  Once the deadline passes the connection is closed; the session is in an
+        unknown state, so the next send reconnects.  `smtplib` reports timeouts reading replies as
+        disconnects, either way `DeadlineExceededException` is raised.
+        """
+
+        def bounded(operation: typing.Callable[..., _T]) -> typing.Callable[..., _T]:
+            def wrapper(*args: typing.Any, **kwargs: typing.Any) -> _T:
+                deadline, sock = current_deadline(), self.delegate.sock
+                if deadline is None or sock is None:
+                    return operation(*args, **kwargs)
+                # Restored to the timeout in effect, the deadline bound when nested within `starttls`.
+                previous = sock.gettimeout()
+                try:
+                    sock.settimeout(deadline.timeout(self.timeout))
+                    return operation(*args, **kwargs)
+                except OSError as exc:
+                    if not deadline.expired:
+                        raise
+                    self._cancelled = True
+                    self.delegate.close()
+                    if isinstance(exc, DeadlineExceededException):
+                        raise
+                    raise DeadlineExceededException(f"Deadline of {deadline.budget}s exceeded") from exc
+                finally:
+                    if self.delegate.sock is not None:
+                        self.delegate.sock.settimeout(previous)
+
+            return wrapper
+
+        self.delegate.send = bounded(self.delegate.send)  # type: ignore[assignment]
+        self.delegate.getreply = bounded(self.delegate.getreply)  # type: ignore[assignment]
+        self.delegate.starttls = bounded(self.delegate.starttls)  # type: ignore[assignment]
+
+    def _supports_raw_transfer(self, raw: bytes, envelope: typing.Sequence[str]) -> bool:
+        """
+        Returns `True` if a lazily loaded emails raw bytes can be transmitted verbatim; the envelope must be
+        known and ASCII and 8bit content requires 8BITMIME.  Otherwise the body is parsed and negotiated.
+        """
+        if not envelope[0] or len(envelope) < 2 or not all(address.isascii() for address in envelope):
+            return False
+        return raw.isascii() or self.delegate.has_extn("8bitmime")
+
+    def _send_raw(
+        self,
+        raw: bytes,
+        from_addr: str,
+        to_addrs: typing.Sequence[str],
+        mail_options: typing.Sequence[str],
+        rcpt_options: typing.Sequence[str],
+    ) -> typing.Dict[str, typing.Tuple[int, bytes]]:
+        raw, options = self._prepare_raw(raw, mail_options)
+        return self.delegate.sendmail(from_addr, list(to_addrs), raw, options, rcpt_options)
+
+    def _prepare_raw(self, raw: bytes, mail_options: typing.Sequence[str]) -> typing.Tuple[bytes, typing.List[str]]:
+        options = list(mail_options)
+        if not raw.isascii():
+            set_mail_option(options, "BODY=8BITMIME")
+        if self.dkim is not None:
+            raw = f"{DKIM_SIGNATURE_HEADER}: {self.dkim.sign(raw)}\r\n".encode("ascii") + raw
+        return raw, options
+
+    def _lmtp_content(
+        self, email: Email, envelope: typing.Sequence[str], mail_options: typing.Sequence[str]
+    ) -> typing.Tuple[bytes, typing.List[str]]:
+        """
+        Serialize the email for an LMTP transaction, returning the content and the MAIL options it requires.
+        As with `smtplib.SMTP.send_message` Bcc headers are not transmitted.
+        """
+        raw = email.raw_bytes()
+        if raw is not None and self._supports_raw_transfer(raw, envelope):
+            return self._prepare_raw(raw, mail_options)
+        negotiated = negotiate(
+            email.email_message, self.delegate.esmtp_features, envelope=envelope, mail_options=mail_options
+        )
+        if self.dkim is not None:
+            self.dkim.sign_message(negotiated.message, utf8=negotiated.utf8)
+        message = copy.copy(negotiated.message)
+        del message["Bcc"]
+        del message["Resent-Bcc"]
+        return flatten(message, message.policy, utf8=negotiated.utf8), list(negotiated.mail_options)
+
+    def _send_lmtp(
+        self,
+        content: bytes,
+        from_addr: str,
+        to_addrs: typing.Sequence[str],
+        mail_options: typing.Sequence[str],
+        rcpt_options: typing.Sequence[str],
+    ) -> typing.Dict[str, typing.Tuple[int, bytes]]:
+        """
+        Send an LMTP (RFC-2033) transaction.  LMTP servers must support PIPELINING, so MAIL, every RCPT and
+        DATA are written at once before their replies are read.  After the content the server replies once
+        per accepted recipient, in RCPT order; these are recorded in `_deliveries` and failures are refused
+        alongside RCPT refusals.  Raises `SMTPRecipientsRefused` if no recipient was delivered.
+        """
+        options = list(mail_options)
+        if self.delegate.has_extn("size"):
+            set_mail_option(options, f"SIZE={len(content)}")
+        encoding = "utf-8" if any(option.upper() == "SMTPUTF8" for option in options) else "ascii"
+        commands = [
+            f"MAIL FROM:{smtplib.quoteaddr(from_addr)}{''.join(f' {option}' for option in options)}",
+            *(
+                f"RCPT TO:{smtplib.quoteaddr(address)}{''.join(f' {option}' for option in rcpt_options)}"
+                for address in to_addrs
+            ),
+            "DATA",
+        ]
+        self.delegate.send("".join(f"{command}\r\n" for command in commands).encode(encoding))
+        mail_code, mail_response = self.delegate.getreply()
+        refused: typing.Dict[str, SMTP_REPLY_ALIAS] = {}
+        for address in to_addrs:
+            self._replies[address] = reply = self.delegate.getreply()
+            if reply[0] not in (250, 251):
+                refused[address] = reply
+        code, response = self.delegate.getreply()
+        if code == 354 and (mail_code != 250 or len(refused) == len(to_addrs)):
+            # The server should have rejected DATA, end the (empty) content to resynchronise.
+            self.delegate.send(b".\r\n")
+            code, response = self.delegate.getreply()
+        if mail_code != 250:
+            self._abort_transaction(mail_code)
+            raise smtplib.SMTPSenderRefused(mail_code, mail_response, from_addr)
+        if len(refused) == len(to_addrs):
+            self._abort_transaction(None)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if code != 354:
+            self._abort_transaction(code)
+            raise smtplib.SMTPDataError(code, response)
+        data = smtplib._quote_periods(content)  # type: ignore[attr-defined]
+        if data[-2:] != b"\r\n":
+            data += b"\r\n"
+        self.delegate.send(data + b".\r\n")
+        accepted = [address for address in to_addrs if address not in refused]
+        for address in accepted:
+            self._deliveries[address] = self._final_reply = reply = self.delegate.getreply()
+            if reply[0] != 250:
+                refused[address] = reply
+        if all(address in refused for address in accepted):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        return refused
+
+    def _supports_binary_transfer(self, message: EmailMessage) -> bool:
+        """
+        Returns `True` if the email has base64 encoded parts that can be sent as binary with BDAT.  DKIM
+        signed mail is never sent as binary; verifiers normalise bare CR/LF octets, breaking body hashes.
+        """
+        if not self.binary_transfer or self.dkim is not None or not has_base64_parts(message):
+            return False
+        return self.delegate.has_extn("chunking") and self.delegate.has_extn("binarymime")
+
+    def _send_binary(
+        self,
+        data: bytes,
+        from_addr: str,
+        to_addrs: typing.Sequence[str],
+        mail_options: typing.Sequence[str],
+        rcpt_options: typing.Sequence[str],
+    ) -> typing.Dict[str, typing.Tuple[int, bytes]]:
+        """
+        Send the content of an email with its base64 parts re-encoded as binary (see `flatten_binary`), transmitting
+        it in BDAT chunks (RFC-3030) rather than DATA.  When PIPELINING is available all chunks are written
+        before the replies are read.  Mirrors the error handling semantics of `smtplib.SMTP.sendmail`.
+        """
+        options = list(mail_options)
+        set_mail_option(options, "BODY=BINARYMIME")
+        if self.delegate.has_extn("size"):
+            set_mail_option(options, f"SIZE={len(data)}")
+        code, response = self.delegate.mail(from_addr, options)
+        if code != 250:
+            self._abort_transaction(code)
+            raise smtplib.SMTPSenderRefused(code, response, from_addr)
+        refused = {}
+        for address in to_addrs:
+            code, response = self.delegate.rcpt(address, rcpt_options)
+            if code not in (250, 251):
+                refused[address] = (code, response)
+        if len(refused) == len(to_addrs):
+            self._abort_transaction(None)
+            raise smtplib.SMTPRecipientsRefused(refused)
+        pipelining, pending = self.delegate.has_extn("pipelining"), 0
+        for chunk, last in iter_chunks(data, self.chunk_size):
+            self.delegate.send(f"BDAT {len(chunk)}{' LAST' if last else ''}\r\n".encode("ascii"))
+            self.delegate.send(chunk)
+            pending += 1
+            if not pipelining or last:
+                self._read_chunk_replies(pending)
+                pending = 0
+        return refused
+
+    def _read_chunk_replies(self, pending: int) -> None:
+        """
+        Read the replies to `pending` (pipelined) BDAT chunks.  Every reply is read before the transaction is
+        aborted on the first refusal, otherwise the replies still in flight would be taken as the replies to
+        later commands.  If they can not be read the session is out of sync, so the connection is closed.
+        """
+        failure: typing.Optional[typing.Tuple[int, bytes]] = None
+        for _ in range(pending):
+            try:
+                reply = self.delegate.getreply()
+            except OSError as exc:
+                if failure is None:
+                    raise
+                self.delegate.close()
+                raise smtplib.SMTPDataError(*failure) from exc
+            if failure is None:
+                self._final_reply = reply
+                if reply[0] != 250:
+                    failure = reply
+        if failure is not None:
+            self._abort_transaction(failure[0])
+            raise smtplib.SMTPDataError(*failure)
+
+    def _abort_transaction(self, code: typing.Optional[int]) -> None:
+        """
+        Reset the session after a failed transaction, or close it if the server is shutting down (421).
+        """
+        if code == 421:
+            self.delegate.close()
+            return
+        try:
+            self.delegate.rset()
+        except smtplib.SMTPServerDisconnected:
+            # The connection was lost (and closed by smtplib), the failure of the transaction is raised.
+            pass
+
+    def profile(
+        self,
+        *,
+        memory: bool = True,
+        frames: int = 1,
+        dump: typing.Optional[typing.Union[str, os.PathLike[str]]] = None,
+    ) -> Profiler:
+        """
+        Profile CPU time and allocations for the duration of a `with` block, e.g:
+
+            with client.profile(dump="send.prof") as profiler:
+                client.send(email=email)
+            print(profiler.report.summary())
+
+        The summary attributes CPU time to network, MIME building and attachment loading.  See `Profiler`.
+        """
+        return Profiler(memory=memory, frames=frames, dump=dump)
+
     @raise_on_closed
     def has_extn(self, opt: str) -> bool:
         """
@@ -180,10 +848,41 @@ class SyncClient:
         return self.delegate.has_extn(opt)
 
     @raise_on_closed
-    def smtp_options(self, name: str = "") -> typing.Dict[str, str]:
+    def smtp_options(self, name: str = "", refresh: bool = False) -> typing.Dict[str, str]:
         """
         Perform a check for the (E)smtp options available on the host.  If name is empty then
         the fully qualified domain name of the local host.
+
+        EHLO is only sent if this session has not already greeted the server, or a new `name` or
+        `refresh=True` is provided.  The result is stored in the capability cache.
         """
-        self.delegate.ehlo(name)
+        if self.delegate.ehlo_resp is None and not name:
+            self._greet()
+        elif refresh or name:
+            self.delegate.ehlo(name)
+            self.capability_cache.update_from(self.host, self.port, self.delegate)
         return self.delegate.esmtp_features
+
+    @property
+    def capabilities(self) -> typing.Optional[Capabilities]:
+        """
+        The cached capabilities of this clients host & port, `None` if they are not yet known (or have expired).
+        This does not communicate with the server and can be used to plan a send before connecting.
+        """
+        return self.capability_cache.get(self.host, self.port)
+
+    @property
+    def accepted_recipients(self) -> typing.List[str]:
+        """
+        The recipients accepted by the completed transactions of the last send.  When a send fails part way
+        through its batches these recipients already have the message and must not be sent it again.
+        """
+        return list(self._accepted)
+
+    @property
+    def tls_sessions(self) -> typing.Optional[TLSSessionCache]:
+        """
+        The TLS session cache (and resumption statistics) of `ssl_context`, `None` if the context does not
+        support resumption.
+        """
+        return self.ssl_context.sessions if isinstance(self.ssl_context, ResumingSSLContext) else None
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import contextvars
+import time
+import typing
+
+from ._exceptions import DeadlineExceededException
+
+_CURRENT: contextvars.ContextVar[typing.Optional[Deadline]] = contextvars.ContextVar("mailie_deadline", default=None)
+
+
+class Deadline:
+    """
+    A time budget in seconds shared by every blocking operation performed while it is active (inside its
+    `with` block).  Each operation is given at most the remaining budget as its timeout, see `timeout()`
+    and `current_deadline()`.
+    """
+
+    def __init__(self, budget: float) -> None:
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self._tokens: typing.List[contextvars.Token[typing.Optional[Deadline]]] = []
+
+    def __enter__(self) -> Deadline:
+        self._tokens.append(_CURRENT.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        _CURRENT.reset(self._tokens.pop())
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, ceiling: typing.Optional[float] = None) -> float:
+        """
+        The timeout for the next blocking operation; the remaining budget, capped at `ceiling`.
+
+        :raises DeadlineExceededException: If the budget has been spent.
+        """
+        remaining = self.expires_at - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceededException(f"Deadline of {self.budget}s exceeded")
+        return remaining if ceiling is None else min(ceiling, remaining)
+
+
+def current_deadline() -> typing.Optional[Deadline]:
+    """
+    The deadline active in the current context, if any.
+    """
+    return _CURRENT.get()
+
+
+def bounded_timeout(timeout: typing.Optional[float]) -> typing.Optional[float]:
+    """
+    Cap a timeout at the remaining budget of the current deadline, for blocking work outside the SMTP
+    connection (e.g fetching OAuth2 tokens).
+    """
+    deadline = _CURRENT.get()
+    return timeout if deadline is None else deadline.timeout(timeout)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import base64
+import collections
+import functools
+import hashlib
+import os
+import pathlib
+import re
+import textwrap
+import threading
+import time
+import typing
+from email.message import EmailMessage
+from email.policy import EmailPolicy
+
+from ._exceptions import DKIMSigningException
+from ._headers import replace_headers
+
+if typing.TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+
+    from ._email import Email
+
+DKIM_SIGNATURE_HEADER = "DKIM-Signature"
+DEFAULT_SIGNED_HEADERS = (
+    "From",
+    "Sender",
+    "Reply-To",
+    "Subject",
+    "Date",
+    "Message-ID",
+    "To",
+    "Cc",
+    "MIME-Version",
+    "Content-Type",
+    "Content-Transfer-Encoding",
+    "In-Reply-To",
+    "References",
+)
+
+_WSP_RUN = re.compile(rb"[ \t]+")
+_TRAILING_WSP = re.compile(rb"[ \t]+\r\n")
+_FOLD = re.compile(rb"\r\n(?=[ \t])")
+_TRAILING_LINES = re.compile(rb"(?:\r\n)+\Z")
+
+DKIM_KEY_ALIAS = typing.Union[bytes, str, "os.PathLike[str]"]
+
+
+@functools.lru_cache(maxsize=32)
+def load_private_key(domain: str, selector: str, key_data: bytes) -> RSAPrivateKey:
+    """
+    Load a PEM (or DER) encoded PKCS#1 or PKCS#8 RSA private key with `cryptography`.  Loaded keys are
+    cached per domain & selector so the (relatively) costly decode happens once per process.
+
+    :raises DKIMSigningException: If `cryptography` is not installed, or the key is not a supported RSA
+    private key.
+    """
+    try:
+        from cryptography.exceptions import UnsupportedAlgorithm
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+    except ImportError:
+        raise DKIMSigningException("DKIM signing requires cryptography, install it with `pip install mailie[dkim]`")
+    loader = serialization.load_pem_private_key if b"-----BEGIN" in key_data else serialization.load_der_private_key
+    try:
+        key = loader(key_data, password=None)
+    except (ValueError, TypeError, UnsupportedAlgorithm) as exc:
+        raise DKIMSigningException(f"Unable to load the DKIM private key for {selector}._domainkey.{domain}: {exc}")
+    # RFC-8301 4.2, signers must use RSA keys of at least 1024 bits.
+    if not isinstance(key, rsa.RSAPrivateKey) or key.key_size < 1024:
+        raise DKIMSigningException(f"The DKIM key for {selector}._domainkey.{domain} is not a 1024+ bit RSA key")
+    return key
+
+
+def canonicalize_body(body: bytes, canonicalization: str = "relaxed") -> bytes:
+    """
+    Canonicalize a message body per RFC-6376 3.4.3 (simple) or 3.4.4 (relaxed).
+    """
+    if canonicalization == "relaxed":
+        body = _TRAILING_LINES.sub(b"", _TRAILING_WSP.sub(b"\r\n", _WSP_RUN.sub(b" ", body)))
+        return body + b"\r\n" if body else b""
+    return _TRAILING_LINES.sub(b"", body) + b"\r\n"
+
+
+def canonicalize_header(name: bytes, value: bytes, canonicalization: str = "relaxed") -> bytes:
+    """
+    Canonicalize a single header field per RFC-6376 3.4.1 (simple) or 3.4.2 (relaxed).  `value` is the
+    raw (possibly folded) field value without the trailing CRLF.
+    """
+    if canonicalization == "relaxed":
+        return name.strip().lower() + b":" + _WSP_RUN.sub(b" ", _FOLD.sub(b"", value)).strip() + b"\r\n"
+    return name + b":" + value + b"\r\n"
+
+
+def _split_headers(header_block: bytes) -> typing.List[typing.Tuple[bytes, bytes]]:
+    """
+    Split a raw CRLF delimited header block into (name, raw value) pairs, folding is retained so that
+    `simple` canonicalization remains exact.
+    """
+    fields: typing.List[typing.Tuple[bytes, bytes]] = []
+    for line in header_block.split(b"\r\n"):
+        if line[:1] in (b" ", b"\t") and fields:
+            name, value = fields[-1]
+            fields[-1] = (name, value + b"\r\n" + line)
+        else:
+            name, _, value = line.partition(b":")
+            fields.append((name, value))
+    return fields
+
+
+class DKIMSigner:
+    """
+    An RFC-6376 DKIM signer (rsa-sha256) that can be used as an optional stage of the mailie send
+    pipeline, `SyncClient(dkim=DKIMSigner(...))`, or directly via `sign(...)` & `sign_email(...)`.
+
+    Signing is optimised for bulk sending: the private key is parsed once and cached per domain and
+    selector.  Callers that know bodies repeat (e.g template rendered mail where only the recipient
+    headers differ) can pass a `body_key` identifying the body, i.e the template and its version, and
+    the canonicalized body hash is computed once per key, so that per message only the header hash and
+    the RSA signature are computed.  The key is trusted: two different bodies signed under one key get
+    the same (for one of them, wrong) body hash.
+
+    Keys are loaded and signatures computed with `cryptography`, which is an optional dependency
+    (`pip install mailie[dkim]`).
+
+    :param domain: The signing domain (d=).
+    :param selector: The selector (s=) the public key is published under.
+    :param private_key: PEM/DER bytes of the RSA private key, or a path to a file containing it.
+    :param headers: The header fields to sign, fields absent from a message are skipped.
+    :param canonicalization: A `(header, body)` tuple of `relaxed` or `simple`.
+    :param identity: Optional agent or user identifier (i=).
+    :param body_cache_size: The number of `body_key` hashes retained.
+    """
+
+    def __init__(
+        self,
+        *,
+        domain: str,
+        selector: str,
+        private_key: DKIM_KEY_ALIAS,
+        headers: typing.Iterable[str] = DEFAULT_SIGNED_HEADERS,
+        canonicalization: typing.Tuple[str, str] = ("relaxed", "relaxed"),
+        identity: typing.Optional[str] = None,
+        body_cache_size: int = 128,
+    ) -> None:
+        if not all(c in ("relaxed", "simple") for c in canonicalization):
+            raise DKIMSigningException(f"Unsupported canonicalization: {canonicalization}")
+        if not isinstance(private_key, bytes):
+            private_key = pathlib.Path(private_key).read_bytes()
+        self.domain = domain.lower()
+        self.selector = selector
+        self.headers = tuple(headers)
+        self.header_canonicalization, self.body_canonicalization = canonicalization
+        self.identity = identity
+        self.body_cache_size = body_cache_size
+        self._key = load_private_key(self.domain, selector, private_key)
+        self._body_hashes: typing.OrderedDict[typing.Hashable, bytes] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def body_hash(self, body: bytes, body_key: typing.Optional[typing.Hashable] = None) -> bytes:
+        """
+        Return the base64 encoded SHA-256 hash of the canonicalized body, memoized per `body_key` if given.
+        """
+        if body_key is not None:
+            with self._lock:
+                cached = self._body_hashes.get(body_key)
+                if cached is not None:
+                    self._body_hashes.move_to_end(body_key)
+                    return cached
+        digest = base64.b64encode(hashlib.sha256(canonicalize_body(body, self.body_canonicalization)).digest())
+        if body_key is not None:
+            with self._lock:
+                self._body_hashes[body_key] = digest
+                if len(self._body_hashes) > self.body_cache_size:
+                    self._body_hashes.popitem(last=False)
+        return digest
+
+    def sign(
+        self,
+        message: bytes,
+        timestamp: typing.Optional[int] = None,
+        body_key: typing.Optional[typing.Hashable] = None,
+    ) -> str:
+        """
+        Sign the serialized (CRLF delimited) `message`, returning the folded DKIM-Signature header value.
+        `body_key` optionally identifies the body for memoizing its hash, see the class documentation.
+        """
+        header_block, _, body = message.partition(b"\r\n\r\n")
+        fields = _split_headers(header_block)
+        signed: typing.List[bytes] = []
+        names: typing.List[str] = []
+        for name in self.headers:
+            lowered = name.lower().encode("ascii")
+            # Multiple instances of a header are signed from the bottom up, RFC-6376 5.4.2.
+            for field_name, field_value in reversed(fields):
+                if field_name.strip().lower() == lowered:
+                    signed.append(canonicalize_header(field_name, field_value, self.header_canonicalization))
+                    names.append(name.lower())
+        tags = [
+            "v=1",
+            "a=rsa-sha256",
+            f"c={self.header_canonicalization}/{self.body_canonicalization}",
+            f"d={self.domain}",
+            f"s={self.selector}",
+            f"t={int(time.time()) if timestamp is None else timestamp}",
+        ]
+        if self.identity:
+            tags.append(f"i={self.identity}")
+        if "from" not in names:
+            raise DKIMSigningException("Unable to DKIM sign a message without a From header")
+        tags.extend(f"{'h=' if index == 0 else ''}{name}:" for index, name in enumerate(names[:-1]))
+        tags.append(f"{'h=' if len(names) == 1 else ''}{names[-1]};")
+        tags.append(f"bh={self.body_hash(body, body_key).decode('ascii')}")
+        value = self._fold(tags) + "\r\n\tb="
+        header = canonicalize_header(
+            DKIM_SIGNATURE_HEADER.encode("ascii"), b" " + value.encode("ascii"), self.header_canonicalization
+        )
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        signature_bytes = self._key.sign(b"".join(signed) + header[:-2], padding.PKCS1v15(), hashes.SHA256())
+        signature = base64.b64encode(signature_bytes).decode("ascii")
+        return value + "\r\n\t ".join(textwrap.wrap(signature, 72))
+
+    def sign_email(
+        self, email: Email, *, utf8: bool = False, body_key: typing.Optional[typing.Hashable] = None
+    ) -> Email:
+        """
+        Sign the `Email` in place, adding a DKIM-Signature header as the first header of the message.
+        Previous signatures for this domain and selector are replaced.  `utf8` should reflect whether the
+        message will be sent with SMTPUTF8, as that changes how headers are serialized.
+        """
+        self.sign_message(email.email_message, utf8=utf8, body_key=body_key)
+        return email
+
+    def sign_message(
+        self, message: EmailMessage, *, utf8: bool = False, body_key: typing.Optional[typing.Hashable] = None
+    ) -> EmailMessage:
+        """
+        Sign the underlying `EmailMessage` in place, see `sign_email(...)`.
+        """
+        replace_headers(message, [header for header in message.raw_items() if not self._is_own_signature(*header)])
+        policy = message.policy.clone(linesep="\r\n")
+        if isinstance(policy, EmailPolicy):
+            policy = policy.clone(utf8=utf8)
+        # Serializing may change the headers (i.e when a multipart boundary is generated), so sign first.
+        value = self.sign(message.as_bytes(policy=policy), body_key=body_key)
+        # The header value is pre-folded, it is set raw so the email policy emits it verbatim.
+        replace_headers(message, [(DKIM_SIGNATURE_HEADER, value), *message.raw_items()])
+        return message
+
+    def _is_own_signature(self, name: str, value: typing.Any) -> bool:
+        if name.lower() != DKIM_SIGNATURE_HEADER.lower():
+            return False
+        tags = _WSP_RUN.sub(b"", _FOLD.sub(b"", str(value).encode("ascii", "replace"))).split(b";")
+        return f"d={self.domain}".encode() in tags and f"s={self.selector}".encode() in tags
+
+    @staticmethod
+    def _fold(tags: typing.List[str]) -> str:
+        """
+        Fold the tag list into lines comfortably within the 78 character limit.  Tags are separated by `;`,
+        the `h=` tag is provided as individual `name:` tokens so that it can be folded between field names.
+        """
+        lines, line = [], ""
+        for tag in tags:
+            token = tag if tag.endswith((":", ";")) else f"{tag};"
+            if line and len(line) + len(token) > 64:
+                lines.append(line)
+                line = ""
+            line = f"{line}{'' if line.endswith(':') or not line else ' '}{token}"
+        lines.append(line)
+        return "\r\n\t".join(lines)
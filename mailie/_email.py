@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import logging
+import os
+import pathlib
+import re
+import time
 import typing
 from email.contentmanager import ContentManager
 from email.errors import MessageDefect
 from email.message import EmailMessage
 from email.message import Message
+from email.message import MIMEPart
+from email.parser import BytesHeaderParser
+from email.parser import BytesParser
 from email.policy import SMTP as SMTP_DEFAULT_POLICY
 from email.policy import Policy
 
+from ._address import parse_address
 from ._attachments import AllFilesStrategy
 from ._attachments import Attachable
 from ._attachments import FileAttachment  # noqa
@@ -16,10 +24,17 @@ from ._constants import CONTENT_TYPE_HEADER
 from ._constants import NON_MIME_AWARE_CLIENT_MESSAGE
 from ._constants import SUBJECT_HEADER
 from ._constants import UTF_8
+from ._headers import HeaderIndex
+from ._headers import replace_headers
+from ._inline import InlineImageCache
+from ._inline import inline_image_cache
+from ._logging import log_event
+from ._logging import log_sampler
 from ._policy import policy_factory
 from ._types import EMAIL_ATTACHMENT_PATH_ALIAS
 from ._types import EMAIL_CHARSET_ALIAS
 from ._types import EMAIL_HEADER_TYPE_ALIAS
+from ._types import EMAIL_HTML_ALIAS
 from ._types import EMAIL_PARAM_TYPE_ALIAS
 from ._types import EMAIL_PAYLOAD_ALIAS
 from ._utility import emails_to_list
@@ -29,6 +44,8 @@ from ._utility import split_headers_per_rfc
 log = logging.getLogger(__name__)
 
 _T = typing.TypeVar("_T")
+_HEADER_END = re.compile(rb"(?:\A|\r?\n)\r?\n")
+_BARE_LF = re.compile(rb"(?<!\r)\n")
 
 
 class Email:
@@ -46,7 +63,9 @@ class Email:
     allows overriding this value at runtime.  When specified mailie will NOT include this in the email headers
     as a `From` header.  smtplib cares not about email headers.  In order to add a From header to the email
     pass it explicitly into headers=.  When calling send() on the client without specifying the optional mail_from
-    argument, mailie will attempt to fetch the value from the `Email` instance.
+    argument, mailie will attempt to fetch the value from the `Email` instance.  Envelope addresses are validated
+    and normalised (IDNA encoded, lower cased domains) upfront; `InvalidEmailAddressException` is raised for
+    non-compliant addresses rather than waiting for the server to refuse them.
 
     :param rcpt_to: (Optional) The envelope recipient(s) of the email, a compliant email address or a Sequence
     of compliant email addresses.  If provided this can be automatically defrred when sending the email through
@@ -102,7 +121,12 @@ class Email:
     iterable of attachment paths can be provided; these will be have CID's generated implicitly
     and be formatted into the html content provided in the order in which they are provided.
     For that reason, a tuple is preferred; using a set cannot guarantee the CID for img src
-    tags in the html template post-format processing.
+    tags in the html template post-format processing.  The content is formatted with `str.format`,
+    e.g `<img src="cid:{0}">`, literal braces (CSS) must be doubled.  The images are embedded in a
+    multipart/related part alongside the HTML, once per distinct image.  Content ids are derived from the
+    image content and encoded images are reused from `inline_cache` (the process wide
+    `mailie.inline_image_cache` by default), so images repeated across messages are only read and encoded
+    once.
 
     A string of html content to include in the payload (body) of the email.
     By default, html is omitted and a simple plain text mail is built, if provided the mail is
@@ -149,7 +173,7 @@ class Email:
         bcc: typing.Optional[typing.Iterable[str]] = None,
         subject: typing.Optional[str] = None,
         text: typing.Optional[str] = None,
-        html: typing.Optional[str] = None,
+        html: typing.Optional[EMAIL_HTML_ALIAS] = None,
         charset: EMAIL_CHARSET_ALIAS = UTF_8,
         headers: typing.Optional[typing.Union[typing.List[str], typing.MutableMapping[str, str]]] = None,
         attachments: typing.Optional[EMAIL_ATTACHMENT_PATH_ALIAS] = None,
@@ -157,13 +181,20 @@ class Email:
         preamble: str = NON_MIME_AWARE_CLIENT_MESSAGE,
         epilogue: str = NON_MIME_AWARE_CLIENT_MESSAGE,
         boundary: typing.Optional[str] = None,
+        inline_cache: InlineImageCache = inline_image_cache,
     ):
-        self.email_message = EmailMessage(policy=policy_factory(policy))
-        self.mail_from = mail_from
+        started = time.perf_counter()
+        self._message = EmailMessage(policy=policy_factory(policy))
+        self._header_index = HeaderIndex()
+        self._raw_body: typing.Optional[memoryview] = None
+        self.mail_from = str(parse_address(mail_from)) if mail_from else mail_from
         self.rcpt_to = emails_to_list(rcpt_to)
         self.cc = emails_to_list(cc)
         self.bcc = emails_to_list(bcc)
-        self.html = html
+        self.html, inline_paths = self._split_html(html)
+        self.inline_images = [inline_cache.get(path) for path in inline_paths]
+        if self.html and self.inline_images:
+            self.html = self.html.format(*(image.cid for image in self.inline_images))
         self.text = text
         self.subject = subject
         self.preamble = preamble
@@ -189,12 +220,143 @@ class Email:
 
         if self.html:
             # multipart/alternative.
-            # Todo: Handle content ids and inline attachments within this.
             self.email_message.add_alternative(self.html, subtype="html")
+            if self.inline_images:
+                # multipart/alternative -> multipart/related (text/html, image/*...)
+                # The html alternative was added just above, the body lookup always finds it.
+                related = typing.cast(MIMEPart, self.email_message.get_body(("html",)))
+                related.make_related()
+                # An image referenced more than once is embedded once, content ids must be unique (RFC-2392).
+                for image in {image.cid: image for image in self.inline_images}.values():
+                    related.attach(image.copy())
 
         for attachment in self.attachments:
             # Todo: We need to handle async file IO, on linux at least?
             self.add_attachment(attachment)
+        log_event(log, logging.DEBUG, "email built", lambda: self._log_fields(started), sampler=log_sampler)
+
+    def _log_fields(self, started: float) -> typing.Dict[str, typing.Any]:
+        return {
+            "mail_from": self.mail_from,
+            "rcpt_to": self.rcpt_to,
+            "subject": self.subject,
+            "attachments": [attachment.name for attachment in self.attachments],
+            "attachment_bytes": sum(len(attachment.data) for attachment in self.attachments),
+            "inline_images": len(self.inline_images),
+            "elapsed": round(time.perf_counter() - started, 6),
+        }
+
+    @staticmethod
+    def _split_html(
+        html: typing.Optional[EMAIL_HTML_ALIAS],
+    ) -> typing.Tuple[typing.Optional[str], typing.Sequence[typing.Union[str, os.PathLike[str]]]]:
+        """
+        Split the html argument into the content and the paths of its inline images.
+        """
+        if html is None or isinstance(html, str):
+            return html, ()
+        content, *paths = html
+        return content, list(paths[0]) if paths else ()
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: typing.Union[bytes, bytearray, memoryview],
+        *,
+        headers_only: bool = False,
+        policy: typing.Union[str, Policy] = SMTP_DEFAULT_POLICY,
+        mail_from: typing.Optional[str] = None,
+        rcpt_to: typing.Optional[typing.Union[typing.Sequence[str], str]] = None,
+    ) -> Email:
+        """
+        Load an existing RFC-5322 message, e.g the contents of an `.eml` file, into an `Email`.
+
+        With `headers_only=True` only the header block is parsed (via `BytesHeaderParser`), the body is
+        retained as an unparsed `memoryview` over `data` (see `Email.raw_body`) and the MIME tree is only
+        built the first time something touches the body, e.g `walk()` or `get_payload()`.  Headers can be
+        read and modified without ever parsing the body; a lazily loaded email that is re-sent by the
+        client is transmitted with its original body bytes untouched.
+
+        :param mail_from: (Optional) The envelope sender, see `Email`.
+        :param rcpt_to: (Optional) The envelope recipient(s), see `Email`.
+        """
+        policy = policy_factory(policy)
+        view = memoryview(data)
+        email = cls.__new__(cls)
+        email._raw_body = None
+        email._header_index = HeaderIndex()
+        if headers_only:
+            match = _HEADER_END.search(view)
+            end = match.end() if match is not None else len(view)
+            message = BytesHeaderParser(_class=EmailMessage, policy=policy).parsebytes(view[:end].tobytes())
+            email._raw_body = view[end:]
+        else:
+            message = BytesParser(_class=EmailMessage, policy=policy).parsebytes(view.tobytes())
+        email._message = typing.cast(EmailMessage, message)
+        email.mail_from = str(parse_address(mail_from)) if mail_from else mail_from
+        email.rcpt_to = emails_to_list(rcpt_to)
+        email.cc, email.bcc = [], []
+        email.html = email.text = None
+        subject = email._message.get(SUBJECT_HEADER)
+        email.subject = str(subject) if subject is not None else None
+        email.preamble = email.epilogue = NON_MIME_AWARE_CLIENT_MESSAGE
+        email.boundary = None
+        email.attachments = []
+        return email
+
+    @classmethod
+    def from_file(cls, path: typing.Union[str, os.PathLike[str]], **kwargs: typing.Any) -> Email:
+        """
+        Load an `.eml` file into an `Email`, see `Email.from_bytes` for the supported keyword arguments.
+        """
+        return cls.from_bytes(pathlib.Path(path).read_bytes(), **kwargs)
+
+    @property
+    def email_message(self) -> EmailMessage:
+        """
+        The underlying `EmailMessage`.  For lazily loaded emails accessing this parses the body.
+        """
+        if self._raw_body is not None:
+            self._load_body()
+        return self._message
+
+    @email_message.setter
+    def email_message(self, message: EmailMessage) -> None:
+        self._message = message
+        self._raw_body = None
+
+    @property
+    def raw_body(self) -> typing.Optional[memoryview]:
+        """
+        The unparsed body of an email loaded with `headers_only=True`, `None` once the body has been parsed.
+        """
+        return self._raw_body
+
+    def _load_body(self) -> None:
+        headers = self._message
+        data = b"".join(headers.policy.fold_binary(name, value) for name, value in headers.raw_items())
+        message = BytesParser(_class=EmailMessage, policy=headers.policy).parsebytes(
+            data + b"\r\n" + typing.cast(memoryview, self._raw_body).tobytes()
+        )
+        replace_headers(message, headers.raw_items())  # Retain the header objects, including any modifications.
+        message.set_unixfrom(headers.get_unixfrom())
+        self._message, self._raw_body = typing.cast(EmailMessage, message), None
+
+    def raw_bytes(self) -> typing.Optional[bytes]:
+        """
+        For lazily loaded emails, the current headers followed by the untouched body with CRLF line endings,
+        ready for transmission.  As with `smtplib.SMTP.send_message` Bcc and Resent-Bcc headers are omitted.
+        `None` if the body has already been parsed.
+        """
+        if self._raw_body is None:
+            return None
+        policy = self._message.policy.clone(linesep="\r\n")
+        headers = b"".join(
+            policy.fold_binary(name, value)
+            for name, value in self._message.raw_items()
+            if name.lower() not in ("bcc", "resent-bcc")
+        )
+        return headers + b"\r\n" + _BARE_LF.sub(b"\r\n", self._raw_body)
 
     def as_string(self, unixfrom: bool = False, maxheaderlen: int = 0, policy: typing.Optional[Policy] = None) -> str:
         """Return the entire email message flattened as a string.  If `unixfrom` is True, the envelope sender
@@ -233,14 +395,14 @@ class Email:
         """
         Retrieve the `envelope sender` header.
         """
-        return self.email_message.get_unixfrom()
+        return self._message.get_unixfrom()
 
     def set_unixfrom(self, unixfrom: str) -> Email:
         """
         Set the messages `envelope sender` header to `unixfrom`.  This is not a property just to keep
         API delegation with the underlying `EmailMessage`.
         """
-        self.email_message.set_unixfrom(unixfrom)
+        self._message.set_unixfrom(unixfrom)
         return self
 
     def attach(self, payload: Message) -> None:
@@ -271,14 +433,14 @@ class Email:
         """
         Return the total number of headers in the message, this tally includes duplicate headers.
         """
-        return len(self.email_message)
+        return len(self._message)
 
     def __contains__(self, name: str) -> bool:
         """
         Check if a particular header is present in the email headers.  This check is case insensitive
         and name should omit the trailing colon `:`.
         """
-        return name in self.email_message
+        return bool(self._header_index.positions(self._message, name))
 
     def __getitem__(self, name: str) -> typing.Any:
         """
@@ -296,46 +458,53 @@ class Email:
         field name, then appending this header.  `Email.replace_header(name, value)` can be used as
         a convenience method for replacing a single headers value.
         """
-        self.email_message[name] = value
+        self._message[name] = value
 
     def replace_header(self, _name: str, _value: typing.Any) -> Email:
         """
         Convenience method for overwriting an existing header with a new value.  This method will replace
         the first instance of the header with `_name`.  This method returns the Email instance for fluency.
-        """
-        self.email_message.replace_header(_name, _value)
+        Raises `KeyError` if there is no such header.
+        """
+        positions = self._header_index.positions(self._message, _name)
+        if not positions:
+            raise KeyError(_name)
+        headers = self._message._headers  # type: ignore[attr-defined]
+        name = headers[positions[0]][0]
+        headers[positions[0]] = self._message.policy.header_store_parse(name, _value)
         return self
 
     def __delitem__(self, name: str) -> typing.Any:
         """
         Deletes all headers of `name`.  If no headers are present this implicitly does nothing.
         """
-        del self.email_message[name]
+        del self._message[name]
 
     def keys(self) -> typing.List[str]:
         """
         Return a list of all the messages header field names.
         """
-        return self.email_message.keys()
+        return self._message.keys()
 
     def values(self) -> typing.List[EMAIL_HEADER_TYPE_ALIAS]:
         """
         Return a list of all the messages header values.
         """
-        return self.email_message.values()
+        return self._message.values()
 
     def items(self) -> typing.List[typing.Tuple[str, EMAIL_HEADER_TYPE_ALIAS]]:
         """
         Return a list of 2-tuples containing all the messages header field and head values respectively.
         """
-        return self.email_message.items()
+        return self._message.items()
 
     def get(self, name: str, failobj: typing.Optional[_T] = None) -> _T:
         """
         Return the value of the header named `name`.  If the header is not present in the message
         then failobj is returned.  Invoked by `__getitem__`
         """
-        return self.email_message.get(name, failobj)  # type: ignore [arg-type]
+        positions = self._header_index.positions(self._message, name)
+        return self._header_index.fetch(self._message, positions[0]) if positions else failobj
 
     def get_all(
         self, name: str, failobj: typing.Optional[_T] = None
@@ -345,10 +514,13 @@ class Email:
         that name in the message, then `failobj` is returned.  If the header exists multiple times all
         of it's values are retruend.
         """
-        return self.email_message.get_all(name, failobj)  # type: ignore [arg-type]
+        positions = self._header_index.positions(self._message, name)
+        if not positions:
+            return failobj  # type: ignore [return-value]
+        return [self._header_index.fetch(self._message, position) for position in positions]
 
     def add_header(self, _name: str, _value: str, **_params: typing.Any) -> Email:
-        self.email_message.add_header(_name, _value, **_params)
+        self._message.add_header(_name, _value, **_params)
         return self
 
     def get_content_type(self) -> str:
@@ -357,31 +529,31 @@ class Email:
         `get_content_type()` is used to determine it.  If the `Content-Type` header is invalid,
         `plain/text` is returned.
         """
-        return self.email_message.get_content_type()
+        return self._message.get_content_type()
 
     def get_content_maintype(self) -> str:
         """
         Return the maintype resolved via `get_content_type()` e.g `plain`
         """
-        return self.email_message.get_content_maintype()
+        return self._message.get_content_maintype()
 
     def get_content_subtype(self) -> str:
         """
         Return the subtype resolved via `get_content_type()` e.g `text`
         """
-        return self.email_message.get_content_subtype()
+        return self._message.get_content_subtype()
 
     def get_default_type(self) -> str:
         """
         Return the default content type.
         """
-        return self.email_message.get_default_type()
+        return self._message.get_default_type()
 
     def set_default_type(self, ctype: str) -> Email:
         """
         Sets the default content type. Returns the `Email` instance for fluency
         """
-        self.email_message.set_default_type(ctype)
+        self._message.set_default_type(ctype)
         return self
 
     def get_params(
@@ -393,15 +565,15 @@ class Email:
         in the instance where there is no `Content-Type` header, header can be provided
         to change the search context from `Content-Type` to that particular header.
         """
-        return self.email_message.get_params(failobj, header, unquote)  # type: ignore [arg-type]
+        return self._message.get_params(failobj, header, unquote)  # type: ignore [arg-type]
 
     def get_param(
         self, param: str, failobj: typing.Optional[_T] = None, header: str = CONTENT_TYPE_HEADER, unquote: bool = True
     ) -> typing.Union[_T, EMAIL_PARAM_TYPE_ALIAS]:
-        return self.email_message.get_param(param, failobj, header, unquote)  # type: ignore [arg-type]
+        return self._message.get_param(param, failobj, header, unquote)  # type: ignore [arg-type]
 
     def del_param(self, param: str, header: str, requote: bool) -> Email:
-        self.email_message.del_param(param, header, requote)
+        self._message.del_param(param, header, requote)
         return self
 
     def set_param(
@@ -414,24 +586,24 @@ class Email:
         language: str = "",
         replace: bool = True,
     ) -> None:
-        self.email_message.set_param(param, value, header, requote, charset, language, replace)
+        self._message.set_param(param, value, header, requote, charset, language, replace)
 
     def set_type(self, type: str, header: str = CONTENT_TYPE_HEADER, requote: bool = True) -> Email:
-        self.email_message.set_type(type, header, requote)
+        self._message.set_type(type, header, requote)
         return self
 
     def get_filename(self, failobj: typing.Optional[_T] = None) -> typing.Union[str, _T]:
-        return self.email_message.get_filename(failobj)  # type: ignore [arg-type]
+        return self._message.get_filename(failobj)  # type: ignore [arg-type]
 
     def get_boundary(self, failobj: typing.Optional[_T] = None) -> typing.Union[str, _T]:
-        return self.email_message.get_boundary(failobj)  # type: ignore [arg-type]
+        return self._message.get_boundary(failobj)  # type: ignore [arg-type]
 
     def set_boundary(self, boundary: str) -> Email:
-        self.email_message.set_boundary(boundary)
+        self._message.set_boundary(boundary)
         return self
 
     def get_content_charset(self, failobj: _T) -> typing.Union[str, _T]:
-        return self.email_message.get_content_charset(failobj)
+        return self._message.get_content_charset(failobj)
 
     def get_charsets(self, failobj: _T) -> typing.Union[_T, typing.List[str]]:
         return self.email_message.get_charsets(failobj)
@@ -440,10 +612,12 @@ class Email:
         yield from self.email_message.walk()
 
     def get_content_disposition(self) -> typing.Optional[str]:
-        return self.email_message.get_content_disposition()
+        return self._message.get_content_disposition()
 
-    def get_body(self, preferencelist: typing.Literal["related", "html", "plain"]) -> typing.Optional[EmailMessage]:
-        return self.get_body(preferencelist)
+    def get_body(
+        self, preferencelist: typing.Sequence[typing.Literal["related", "html", "plain"]] = ("related", "html", "plain")
+    ) -> typing.Optional[EmailMessage]:
+        return self.email_message.get_body(preferencelist)  # type: ignore[return-value]
 
     def iter_attachments(self) -> typing.Iterator[Message]:
         yield from self.email_message.iter_attachments()
@@ -511,7 +685,7 @@ class Email:
         return self
 
     def is_attachment(self) -> bool:
-        return self.email_message.is_attachment()
+        return self._message.is_attachment()
 
     def __bool__(self) -> bool:
         """
@@ -546,4 +720,4 @@ class Email:
                 self.tree_view(message=sub_part, file=file, level=level + 1)
 
     def __iter__(self) -> typing.Iterator[str]:
-        yield from self.email_message
+        yield from self._message
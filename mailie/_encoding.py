@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import copy
+import dataclasses
+import io
+import re
+import secrets
+import smtplib
+import typing
+from email.generator import BytesGenerator
+from email.message import EmailMessage
+from email.message import Message
+from email.policy import EmailPolicy
+from email.policy import Policy
+
+from ._headers import replace_headers
+
+CONTENT_TRANSFER_ENCODING_HEADER = "Content-Transfer-Encoding"
+BINARY = "binary"
+BASE64 = "base64"
+EIGHT_BIT = "8bit"
+QUOTED_PRINTABLE = "quoted-printable"
+# RFC-5322 2.1.1, lines must not exceed 998 octets (excluding the CRLF).
+MAX_LINE_LENGTH = 998
+
+_M = typing.TypeVar("_M", bound=Message)
+
+
+@dataclasses.dataclass(frozen=True)
+class Negotiation:
+    """
+    The result of negotiating how a message should be transmitted given the servers EHLO features.
+    `message` may be a transformed copy of the original, `mail_options` are the MAIL FROM parameters
+    to use and `utf8` indicates that the envelope (and headers) should be sent with SMTPUTF8.
+    """
+
+    message: EmailMessage
+    mail_options: typing.Tuple[str, ...]
+    utf8: bool
+
+
+def _copy_part(part: _M) -> _M:
+    """
+    A copy of a single part, with headers of its own but sharing the payload (and sub parts) of `part`.
+    """
+    clone = copy.copy(part)
+    replace_headers(clone, part.raw_items())
+    return clone
+
+
+def _replace_parts(message: _M, replace: typing.Callable[[Message], typing.Optional[Message]]) -> _M:
+    """
+    Return the message with its leaf parts substituted by `replace`, which returns `None` to keep a part.
+    Only the multipart parts containing a substitute are copied, all other parts are shared with `message`.
+    """
+    if not message.is_multipart():
+        return typing.cast(_M, replace(message) or message)
+    parts = typing.cast(typing.List[Message], message.get_payload())
+    replaced: typing.List[typing.Union[Message, str]] = [_replace_parts(part, replace) for part in parts]
+    if all(new is old for new, old in zip(replaced, parts)):
+        return message
+    clone = _copy_part(message)
+    clone.set_payload(replaced)
+    return clone
+
+
+def has_base64_parts(message: Message) -> bool:
+    """
+    Returns `True` if any leaf part of the message is base64 encoded, e.g an attachment.
+    """
+    return any(
+        part.get(CONTENT_TRANSFER_ENCODING_HEADER, "").lower() == BASE64
+        for part in message.walk()
+        if not part.is_multipart()
+    )
+
+
+def _transfer_encoding(part: Message) -> str:
+    return str(part.get(CONTENT_TRANSFER_ENCODING_HEADER, "")).lower()
+
+
+def _eight_bit_candidate(part: Message) -> typing.Optional[bytes]:
+    """
+    Returns the decoded payload of a base64/quoted-printable text part if it can be safely sent as 8bit,
+    i.e there are no NUL octets, bare carriage returns or lines longer than 998 octets.
+    """
+    if part.is_multipart() or part.get_content_maintype() != "text" or part.get_content_disposition() is not None:
+        return None
+    if _transfer_encoding(part) not in (BASE64, QUOTED_PRINTABLE) or not isinstance(part.get_payload(), str):
+        return None
+    raw = part.get_payload(decode=True)
+    if not isinstance(raw, bytes) or b"\0" in raw or b"\r" in raw.replace(b"\r\n", b""):
+        return None
+    if max(map(len, raw.splitlines()), default=0) > MAX_LINE_LENGTH:
+        return None
+    return raw
+
+
+def to_eight_bit(message: EmailMessage) -> EmailMessage:
+    """
+    Return a copy of the message where base64 & quoted-printable encoded text parts are re-encoded as
+    `8bit`.  Only suitable for servers that advertise 8BITMIME.  Only the re-encoded parts (and the
+    multiparts containing them) are copied, if there is nothing to re-encode the original message is
+    returned as-is.
+    """
+
+    def as_eight_bit(part: Message) -> typing.Optional[Message]:
+        raw = _eight_bit_candidate(part)
+        if raw is None:
+            return None
+        eight_bit = _copy_part(part)
+        eight_bit.set_payload(raw.decode("ascii", "surrogateescape"))
+        eight_bit.replace_header(CONTENT_TRANSFER_ENCODING_HEADER, EIGHT_BIT)
+        return eight_bit
+
+    return _replace_parts(message, as_eight_bit)
+
+
+def has_eight_bit_parts(message: Message) -> bool:
+    """
+    Returns `True` if any leaf part of the message contains 8bit (or binary) content.
+    """
+    return any(
+        _transfer_encoding(part) in (EIGHT_BIT, BINARY) or not str(part.get_payload()).isascii()
+        for part in message.walk()
+        if not part.is_multipart()
+    )
+
+
+def set_mail_option(options: typing.List[str], option: str) -> None:
+    """
+    Add the MAIL FROM parameter `option` to options, replacing any existing parameter of the same keyword.
+    """
+    keyword = option.partition("=")[0].upper()
+    options[:] = [existing for existing in options if existing.partition("=")[0].upper() != keyword]
+    options.append(option)
+
+
+def negotiate(
+    message: EmailMessage,
+    features: typing.Iterable[str],
+    *,
+    envelope: typing.Iterable[str] = (),
+    mail_options: typing.Sequence[str] = (),
+) -> Negotiation:
+    """
+    Decide how to transmit a message given the servers (E)SMTP `features`, e.g the keys of
+    `SyncClient.smtp_options()`:
+
+        :: 8BITMIME advertised; base64 & quoted-printable text parts are re-encoded as 8bit and
+        `BODY=8BITMIME` is added to the mail options.
+        :: 8BITMIME absent; any 8bit text is downgraded to a 7bit safe transfer encoding.
+        :: Non ASCII envelope addresses require SMTPUTF8, which is added to the mail options (raising
+        `smtplib.SMTPNotSupportedError` if the server does not support it).
+    """
+    features = {feature.lower() for feature in features}
+    options = list(mail_options)
+    utf8 = not all(address.isascii() for address in envelope)
+    if utf8:
+        if "smtputf8" not in features:
+            raise smtplib.SMTPNotSupportedError(
+                "One or more source or delivery addresses require internationalized email support, "
+                "but the server does not advertise the required SMTPUTF8 capability"
+            )
+        set_mail_option(options, "SMTPUTF8")
+    if "8bitmime" in features:
+        message = to_eight_bit(message)
+        if utf8 or has_eight_bit_parts(message):
+            set_mail_option(options, "BODY=8BITMIME")
+    elif has_eight_bit_parts(message):
+        # Flattening with a 7bit policy re-encodes 8bit text parts with their charsets body encoding.
+        message = _copy_part(message)
+        message.policy = message.policy.clone(cte_type="7bit")
+    return Negotiation(message, tuple(options), utf8)
+
+
+def flatten(message: Message, policy: Policy, *, utf8: bool = False) -> bytes:
+    """
+    Serialize the message to bytes with CRLF line endings, writing 8bit parts untouched.
+    """
+    buffer = io.BytesIO()
+    policy = policy.clone(linesep="\r\n", cte_type="8bit")
+    if isinstance(policy, EmailPolicy):
+        policy = policy.clone(utf8=utf8)
+    BytesGenerator(buffer, mangle_from_=False, policy=policy).flatten(message, unixfrom=False)
+    return buffer.getvalue()
+
+
+def flatten_binary(message: Message, policy: Policy, *, utf8: bool = False) -> bytes:
+    """
+    Serialize the message (see `flatten`) with every base64 encoded leaf part decoded back to its raw bytes
+    and marked as `Content-Transfer-Encoding: binary`.  Such content can only be transmitted to servers that
+    support BINARYMIME (RFC-3030) and must be sent via BDAT, but avoids the 33% base64 inflation.
+
+    The generator rewrites the line endings of the payloads it writes, which corrupts binary data, so each
+    binary payload is flattened as a unique placeholder that is then replaced by the raw bytes.  Only the
+    re-encoded parts (and the multiparts containing them) are copied, `message` is left untouched.
+    """
+    payloads: typing.Dict[bytes, bytes] = {}
+
+    def as_binary(part: Message) -> typing.Optional[Message]:
+        raw = part.get_payload(decode=True) if _transfer_encoding(part) == BASE64 else None
+        if not isinstance(raw, bytes):
+            return None
+        placeholder = f"mailie-binary-{secrets.token_hex(16)}"
+        payloads[placeholder.encode("ascii")] = raw
+        binary = _copy_part(part)
+        binary.set_payload(placeholder)
+        binary.replace_header(CONTENT_TRANSFER_ENCODING_HEADER, BINARY)
+        return binary
+
+    flattened = flatten(_replace_parts(message, as_binary), policy, utf8=utf8)
+    if not payloads:
+        return flattened
+    return re.sub(b"|".join(map(re.escape, payloads)), lambda match: payloads[match.group()], flattened)
+
+
+def iter_chunks(data: bytes, chunk_size: int) -> typing.Iterator[typing.Tuple[memoryview, bool]]:
+    """
+    Yield (chunk, is_last) pairs of `data` for BDAT transmission, without copying.  An empty payload
+    yields a single empty (last) chunk.
+    """
+    view = memoryview(data)
+    offsets = range(0, len(data), chunk_size) or range(1)
+    for offset in offsets:
+        end = offset + chunk_size
+        yield view[offset:end], end >= len(data)
@@ -2,9 +2,17 @@
 :: MailException
     :: InvalidAttachmentException
         :: FilePathNotAttachmentException
+    :: InvalidEmailAddressException
+    :: DKIMSigningException
+    :: AuthenticationException
     :: SMTPException
+        :: StartTLSNotSupportedException
+        :: DeadlineExceededException
+        :: RelaysUnavailableException
 """
 
+import typing
+
 
 class MailieException(Exception):
     """Generic Mailie exception, everything will stem from this"""
@@ -22,6 +30,22 @@ class EmptyAttachmentFolderException(InvalidAttachmentException):
     """Raised when an attachment path provided is a directory; however no files exist in the directory"""
 
 
+class InvalidEmailAddressException(MailieException):
+    """Raised when one or more email addresses are not RFC-5321 compliant"""
+
+    def __init__(self, message: str, invalid: typing.Optional[typing.Dict[str, str]] = None) -> None:
+        super().__init__(message)
+        self.invalid = invalid or {}
+
+
+class DKIMSigningException(MailieException):
+    """Raised when a message cannot be DKIM signed, e.g the private key is invalid or unsupported"""
+
+
+class AuthenticationException(MailieException):
+    """Raised when credentials for SMTP AUTH cannot be obtained, e.g the OAuth2 token endpoint failed"""
+
+
 class SMTPException(MailieException):
     """Raised when an exception occurs during the SMTP conversation with the smtp server"""
 
@@ -30,5 +54,13 @@ class StartTLSNotSupportedException(SMTPException):
     """Raised when starttls() fails for the smtp connection as the server does not support the extension"""
 
 
+class DeadlineExceededException(SMTPException, TimeoutError):
+    """Raised when a send does not complete within its deadline, the connection is closed as a result"""
+
+
+class RelaysUnavailableException(SMTPException):
+    """Raised when every relay of a `RelayClient` has failed or has its circuit breaker open"""
+
+
 class MailieClientClosedException(MailieException):
     """Raised when attempting to use an instance of the mailie client to send mail after it has been closed"""
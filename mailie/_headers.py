@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import typing
+from email.message import Message
+
+
+class HeaderIndex:
+    """
+    A case insensitive index of the headers of a message, mapping each lower cased field name to the
+    positions of its fields.  `email.message.Message` scans (and case folds) its whole header list on every
+    lookup; with the index a lookup is a single dictionary access.
+
+    The index never holds state the message does not: it is validated on every access against the identity
+    and length of the messages header list, which every mutation either rebinds (deletion, `set_content`,
+    `set_boundary` ...) or grows (appends are indexed incrementally).  `replace_header` rewrites a field in
+    place, under the same name, so positions remain valid.  Parsed header values are cached per field and
+    reused only while the stored field is unchanged.
+    """
+
+    __slots__ = ("_headers", "_count", "_last", "_positions", "_fetched")
+
+    def __init__(self) -> None:
+        self._headers: typing.Optional[typing.List[typing.Tuple[str, typing.Any]]] = None
+        self._count = 0
+        self._last: typing.Optional[typing.Tuple[str, typing.Any]] = None
+        self._positions: typing.Dict[str, typing.List[int]] = {}
+        self._fetched: typing.Dict[int, typing.Tuple[typing.Any, typing.Any]] = {}
+
+    def positions(self, message: Message, name: str) -> typing.List[int]:
+        """
+        The positions of the fields named `name` in the messages header list, in order.
+        """
+        headers: typing.List[typing.Tuple[str, typing.Any]] = message._headers  # type: ignore[attr-defined]
+        if headers is not self._headers or len(headers) != self._count or (headers and headers[-1] is not self._last):
+            self._index(headers)
+        return self._positions.get(name.lower(), [])
+
+    def _index(self, headers: typing.List[typing.Tuple[str, typing.Any]]) -> None:
+        start = self._count
+        # A list that only grew (from appends) keeps the fields already indexed where they were.
+        appended = headers is self._headers and len(headers) > start and (not start or headers[start - 1] is self._last)
+        if not appended:
+            start = 0
+            self._positions, self._fetched = {}, {}
+        for position in range(start, len(headers)):
+            self._positions.setdefault(headers[position][0].lower(), []).append(position)
+        self._headers, self._count = headers, len(headers)
+        self._last = headers[-1] if headers else None
+
+    def fetch(self, message: Message, position: int) -> typing.Any:
+        """
+        The parsed value of the field at `position`, as `Message.get` would return it.
+        """
+        name, value = message._headers[position]  # type: ignore[attr-defined]
+        cached = self._fetched.get(position)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        fetched = message.policy.header_fetch_parse(name, value)
+        self._fetched[position] = (value, fetched)
+        return fetched
+
+
+def replace_headers(message: Message, headers: typing.Iterable[typing.Tuple[str, typing.Any]]) -> None:
+    """
+    Replace every header of the message with the (name, value) pairs of `headers`, in order.  Values are
+    stored as they are (e.g pre-folded strings or parsed header objects), as by `Message.set_raw`.
+    """
+    headers = list(headers)
+    for name in {name.lower() for name in message.keys()}:
+        del message[name]
+    for name, value in headers:
+        message.set_raw(name, value)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import collections
+import logging
+import threading
+import time
+import typing
+
+from ._metrics import HookMetrics
+from ._metrics import MetricsRegistry
+from ._metrics import metrics as default_metrics
+
+log = logging.getLogger(__name__)
+
+# The points a hook can be registered at, with the arguments each hook is called with:
+#   pre: (email) before the send starts
+#   post: (response) after a successful send
+#   recipient: (address, (code, text)) the RCPT reply for every recipient attempted
+#   error: (email, exception) after a failed send
+#   retry: (relay, exception) when `RelayClient` fails a send over to another relay
+HOOK_POINTS = ("pre", "post", "recipient", "error", "retry")
+
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+HOOK_ALIAS = typing.Callable[..., typing.Any]
+
+
+def validate_hooks(hooks: typing.Optional[typing.Mapping[str, HOOK_ALIAS]]) -> typing.Dict[str, HOOK_ALIAS]:
+    hooks = dict(hooks or {})
+    unknown = set(hooks) - set(HOOK_POINTS)
+    if unknown:
+        raise ValueError(f"Unknown hooks: {', '.join(sorted(unknown))}, expected any of: {', '.join(HOOK_POINTS)}")
+    return hooks
+
+
+class HookDispatcher:
+    """
+    Calls hooks inline, on the thread performing the send; the default.  Exceptions raised by hooks
+    propagate to the caller of `send`, except after a failed send when the original exception does.
+    """
+
+    def dispatch(self, point: str, hook: HOOK_ALIAS, *args: typing.Any) -> None:
+        hook(*args)
+
+    def flush(self, timeout: typing.Optional[float] = None) -> bool:
+        """
+        Wait for every dispatched hook to complete, returns `False` if `timeout` elapsed first.
+        """
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        ...
+
+    def __enter__(self) -> HookDispatcher:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class ThreadedHookDispatcher(HookDispatcher):
+    """
+    Calls hooks on a pool of background threads so that slow hooks (i.e writing audit records to a
+    database) never add to send latency.  Hooks are queued, up to `max_queued`, and called in order per
+    worker; exceptions raised by hooks are logged and counted in `mailie_hook_errors_total`.
+
+    When the queue is full `overflow` decides between delivery and instrumentation:
+
+        :: `block` The send waits for space (back-pressure), for at most `block_timeout` seconds after
+        which the hook is dropped
+        :: `drop_newest` The hook being dispatched is dropped
+        :: `drop_oldest` The oldest queued hook is dropped to make room
+
+    Dropped hooks are counted in `dropped` and `mailie_hooks_dropped_total`.  `flush` waits for the queue
+    to drain, `close(wait=False)` drops whatever is still queued.
+
+    :param workers: The number of threads calling hooks, with more than one hooks may complete out of order.
+    :param max_queued: The most hooks waiting to be called.
+    :param overflow: `block`, `drop_newest` or `drop_oldest`, see above.
+    :param block_timeout: (optional) The most seconds `block` waits for space, `None` waits indefinitely.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 1,
+        max_queued: int = 1024,
+        overflow: str = BLOCK,
+        block_timeout: typing.Optional[float] = None,
+        metrics: MetricsRegistry = default_metrics,
+    ) -> None:
+        if overflow not in (BLOCK, DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown overflow: {overflow}, expected one of: {BLOCK}, {DROP_NEWEST}, {DROP_OLDEST}")
+        if workers < 1 or max_queued < 1:
+            raise ValueError("At least one worker and one queued hook are required.")
+        self.max_queued = max_queued
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.metrics = HookMetrics.register(metrics)
+        self.dropped = 0
+        self._queue: typing.Deque[typing.Tuple[str, HOOK_ALIAS, typing.Tuple[typing.Any, ...]]] = collections.deque()
+        self._active = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"mailie-hooks-{index}", daemon=True) for index in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def dispatch(self, point: str, hook: HOOK_ALIAS, *args: typing.Any) -> None:
+        with self._condition:
+            if self._closed:
+                self._drop(point)
+                return
+            if len(self._queue) >= self.max_queued and not self._make_room(point):
+                return
+            self._queue.append((point, hook, args))
+            self._condition.notify_all()
+
+    def _make_room(self, point: str) -> bool:
+        """
+        Apply the overflow policy to a full queue, returns `False` if the hook being dispatched was dropped.
+        """
+        if self.overflow == DROP_OLDEST:
+            self._drop(self._queue.popleft()[0])
+            return True
+        if self.overflow == BLOCK:
+            ends = None if self.block_timeout is None else time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.max_queued and not self._closed:
+                remaining = None if ends is None else ends - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if len(self._queue) < self.max_queued and not self._closed:
+                return True
+        self._drop(point)
+        return False
+
+    def _drop(self, point: str) -> None:
+        self.dropped += 1
+        self.metrics.dropped.inc(hook=point)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                point, hook, args = self._queue.popleft()
+                self._active += 1
+                self._condition.notify_all()
+            try:
+                hook(*args)
+            except Exception:
+                log.exception("The %s hook %r raised", point, hook)
+                self.metrics.errors.inc(hook=point)
+            finally:
+                with self._condition:
+                    self._active -= 1
+                    self._condition.notify_all()
+
+    def flush(self, timeout: typing.Optional[float] = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queue and not self._active, timeout)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the workers, once the queued hooks have been called if `wait` (otherwise they are dropped).
+        """
+        with self._condition:
+            self._closed = True
+            if not wait:
+                while self._queue:
+                    self._drop(self._queue.popleft()[0])
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
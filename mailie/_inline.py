@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import collections
+import copy
+import dataclasses
+import hashlib
+import mimetypes
+import os
+import threading
+import typing
+from email.message import MIMEPart
+from email.policy import SMTP as SMTP_DEFAULT_POLICY
+
+from ._headers import replace_headers
+
+CID_DOMAIN = "mailie.inline"
+
+
+@dataclasses.dataclass(frozen=True)
+class InlineImage:
+    """
+    An image encoded (once) as a MIME part ready to be embedded in multipart/related HTML.  The content id is
+    derived from the image content, so it is stable across messages and processes.
+    """
+
+    cid: str
+    part: MIMEPart
+
+    def copy(self) -> MIMEPart:
+        """
+        A copy of the encoded part for a single message; the (immutable) encoded payload is shared, the
+        headers are not.
+        """
+        part = copy.copy(self.part)
+        replace_headers(part, self.part.raw_items())
+        return part
+
+
+class InlineImageCache:
+    """
+    A bounded (least recently used) cache of `InlineImage`s keyed on the path, size and modification time of
+    the image, so that logos and banners repeated across many messages are read and base64 encoded once.
+    Thread safe.
+
+    :param maxsize: The most images retained.
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._images: typing.OrderedDict[typing.Tuple[str, int, int], InlineImage] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get(self, path: typing.Union[str, os.PathLike[str]]) -> InlineImage:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self.hits += 1
+                self._images.move_to_end(key)
+                return image
+            self.misses += 1
+        image = encode_inline_image(path)
+        with self._lock:
+            self._images[key] = image
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def clear(self) -> None:
+        with self._lock:
+            self._images.clear()
+
+
+def encode_inline_image(path: typing.Union[str, os.PathLike[str]]) -> InlineImage:
+    """
+    Read and encode an image as an inline MIME part with a content derived `Content-ID`.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    c_type, encoding = mimetypes.guess_type(os.fspath(path))
+    if c_type is None or encoding is not None:
+        c_type = "application/octet-stream"
+    maintype, subtype = c_type.split("/", 1)
+    cid = f"{hashlib.sha256(data).hexdigest()[:32]}@{CID_DOMAIN}"
+    part = MIMEPart(policy=SMTP_DEFAULT_POLICY)
+    part.set_content(data, maintype, subtype, disposition="inline", filename=os.path.basename(path), cid=f"<{cid}>")
+    return InlineImage(cid, part)
+
+
+inline_image_cache = InlineImageCache()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import typing
+
+# The attribute of log records holding the structured event, i.e `record.mailie["status"]`.
+EVENT_ATTRIBUTE = "mailie"
+
+
+class LogSampler:
+    """
+    Decides which events are logged; every `successes`th successful event and every `failures`th failed
+    one, `1` logs all of them and `0` none.  Sampling is deterministic (a counter rather than a random
+    draw) and lock free, so it is cheap enough to consult for every message.  Each event (e.g `email built`
+    and `send completed`) is counted separately, so that one event cannot starve another of samples.
+
+    Events are only counted (and built) when their level is enabled, disabled levels cost a single check.
+
+    :param successes: Log one in this many successes, e.g `1000` at high volume.
+    :param failures: Log one in this many failures.
+    """
+
+    def __init__(self, successes: int = 1, failures: int = 1) -> None:
+        self.successes = successes
+        self.failures = failures
+        self._counters: typing.Dict[typing.Tuple[str, bool], typing.Iterator[int]] = {}
+
+    def sample(self, failed: bool = False, event: str = "") -> bool:
+        every = self.failures if failed else self.successes
+        if every <= 0:
+            return False
+        key = (event, failed)
+        counter = self._counters.get(key) or self._counters.setdefault(key, itertools.count())
+        # next() on itertools.count (and dict.setdefault) is atomic under the GIL.
+        return next(counter) % every == 0
+
+
+def log_event(
+    logger: logging.Logger,
+    level: int,
+    message: str,
+    build: typing.Callable[[], typing.Dict[str, typing.Any]],
+    *,
+    sampler: LogSampler,
+    failed: bool = False,
+) -> None:
+    """
+    Log a structured event, calling `build` for its fields only if the level is enabled and the sampler
+    selects the event.  The fields are attached to the record as `record.mailie`.
+    """
+    if logger.isEnabledFor(level) and sampler.sample(failed, message):
+        logger.log(level, message, extra={EVENT_ATTRIBUTE: build()})
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line; the time, level, logger and message followed by the
+    fields of the structured event (if any).  Event fields never replace those of the record.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in getattr(record, EVENT_ATTRIBUTE, {}).items():
+            document.setdefault(key, value)
+        if record.exc_info:
+            document["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(document, separators=(",", ":"), default=str)
+
+
+log_sampler = LogSampler()
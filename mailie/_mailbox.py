@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
+import os
+import re
+import socket
+import threading
+import time
+import typing
+
+from ._email import Email
+from ._exceptions import MailieException
+
+RENDERED_MESSAGE_ALIAS = typing.Tuple[str, bytes]
+
+_MBOX_FROM_LINE = re.compile(rb"^(>*From )", re.MULTILINE)
+_CRLF = re.compile(rb"\r\n")
+_UNSAFE_HOSTNAME = re.compile(r"[/:]")
+
+
+class MailboxWriter:
+    """
+    Base class for writing rendered messages to local storage in batches.  `write_batch` must make every
+    message in the batch durable (subject to `fsync`) before returning.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike[str]], *, fsync: bool = True) -> None:
+        self.path = os.fspath(path)
+        self.fsync = fsync
+        self.count = 0
+
+    def __enter__(self) -> MailboxWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def write_batch(self, messages: typing.Sequence[RENDERED_MESSAGE_ALIAS]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        ...
+
+
+class MaildirWriter(MailboxWriter):
+    """
+    Write messages into a Maildir, one file per message.  Each batch is written to `tmp/` concurrently by a
+    small pool of threads, synced, then renamed into `new/` with a single directory sync for the whole batch
+    rather than one per message.
+
+    :param io_threads: The number of threads writing message files.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike[str]], *, fsync: bool = True, io_threads: int = 8) -> None:
+        super().__init__(path, fsync=fsync)
+        for sub_directory in ("tmp", "new", "cur"):
+            os.makedirs(os.path.join(self.path, sub_directory), exist_ok=True)
+        self._hostname = _UNSAFE_HOSTNAME.sub("_", socket.gethostname())
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._pool = concurrent.futures.ThreadPoolExecutor(io_threads, thread_name_prefix="mailie-maildir")
+
+    def _unique_name(self) -> str:
+        with self._lock:
+            sequence = next(self._sequence)
+        return f"{time.time_ns()}.P{os.getpid()}Q{sequence}.{self._hostname}"
+
+    def _write_tmp(self, message: RENDERED_MESSAGE_ALIAS) -> str:
+        name = self._unique_name()
+        with open(os.path.join(self.path, "tmp", name), "xb") as file:
+            file.write(message[1])
+            if self.fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        return name
+
+    def write_batch(self, messages: typing.Sequence[RENDERED_MESSAGE_ALIAS]) -> None:
+        for name in self._pool.map(self._write_tmp, messages):
+            os.rename(os.path.join(self.path, "tmp", name), os.path.join(self.path, "new", name))
+        if self.fsync:
+            _fsync_directory(os.path.join(self.path, "new"))
+        self.count += len(messages)
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+
+class MboxWriter(MailboxWriter):
+    """
+    Append messages to an mbox (mboxrd) file through a large write buffer, syncing once per batch.
+
+    :param buffer_size: The size of the write buffer in bytes.
+    """
+
+    def __init__(
+        self, path: typing.Union[str, os.PathLike[str]], *, fsync: bool = True, buffer_size: int = 1048576
+    ) -> None:
+        super().__init__(path, fsync=fsync)
+        self._file = open(self.path, "ab", buffering=buffer_size)
+
+    def write_batch(self, messages: typing.Sequence[RENDERED_MESSAGE_ALIAS]) -> None:
+        stamp = time.asctime(time.gmtime()).encode("ascii")
+        for sender, data in messages:
+            self._file.write(b"From " + (sender or "MAILER-DAEMON").encode("utf-8") + b" " + stamp + b"\n")
+            self._file.write(_MBOX_FROM_LINE.sub(rb">\1", data))
+            self._file.write(b"\n" if data.endswith(b"\n") else b"\n\n")
+        if self.fsync:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.count += len(messages)
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+_WRITERS: typing.Dict[str, typing.Type[MailboxWriter]] = {"maildir": MaildirWriter, "mbox": MboxWriter}
+
+
+def _fsync_directory(path: str) -> None:
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def open_mailbox(target: str, *, fsync: bool = True) -> MailboxWriter:
+    """
+    Open a writer for a `maildir:/path` or `mbox:/path` target.
+
+    :raises MailieException: If the target scheme is not supported.
+    """
+    scheme, _, path = target.partition(":")
+    writer = _WRITERS.get(scheme.lower())
+    if writer is None or not path:
+        raise MailieException(f"Unsupported output: {target!r}, expected one of: maildir:/path, mbox:/path")
+    return writer(path, fsync=fsync)
+
+
+def render_message(email: Email) -> RENDERED_MESSAGE_ALIAS:
+    """
+    Render an email to bytes with unix line endings, as stored in local mailboxes.
+    """
+    return email.mail_from or "", _CRLF.sub(b"\n", email.as_bytes())
+
+
+def write_messages(
+    emails: typing.Iterable[Email],
+    target: typing.Union[str, MailboxWriter],
+    *,
+    batch_size: int = 512,
+    fsync: bool = True,
+) -> int:
+    """
+    Render every email and write it to a Maildir or mbox, without sending anything; useful for inspecting
+    a campaign before it goes out.  Messages are rendered in the calling process and written `batch_size` at
+    a time, with a single sync per batch; the writer overlaps the file IO of each batch.  Emails are consumed
+    lazily, so arbitrarily large iterables are supported.
+
+    :param target: `maildir:/path`, `mbox:/path` or a `MailboxWriter`.
+    :returns: The number of messages written.
+    """
+    writer = open_mailbox(target, fsync=fsync) if isinstance(target, str) else target
+    iterator = iter(emails)
+    try:
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                break
+            writer.write_batch([render_message(email) for email in batch])
+    finally:
+        if isinstance(target, str):
+            writer.close()
+    return writer.count
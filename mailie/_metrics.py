@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import dataclasses
+import math
+import os
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    import http.server
+
+LABELS_ALIAS = typing.Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    """
+    Base class for metrics.  Hot path updates go to a shard owned by the calling thread, so recording a
+    value never contends on a lock; the (rare) collection merges the shards.  The shards of threads that
+    have exited are folded into a retired total, when collecting or creating a shard, so short lived
+    threads do not accumulate.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: typing.List[typing.Tuple[threading.Thread, typing.Dict[LABELS_ALIAS, typing.Any]]] = []
+        self._retired: typing.Dict[LABELS_ALIAS, typing.Any] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> typing.Dict[LABELS_ALIAS, typing.Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: typing.Dict[LABELS_ALIAS, typing.Any] = {}
+            with self._lock:
+                self._retire()
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _retire(self) -> None:
+        """
+        Fold the shards of exited threads into the retired total.  Must be called holding the lock.
+        """
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._fold(self._retired, shard)
+        self._shards = live
+
+    def _fold(self, into: typing.Dict[LABELS_ALIAS, typing.Any], shard: typing.Dict[LABELS_ALIAS, typing.Any]) -> None:
+        """
+        Add the values of `shard` into `into`.
+        """
+        raise NotImplementedError
+
+    def _key(self, labels: typing.Mapping[str, str]) -> LABELS_ALIAS:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels: {self.labelnames}, got: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _merged(self) -> typing.Dict[LABELS_ALIAS, typing.Any]:
+        merged: typing.Dict[LABELS_ALIAS, typing.Any] = {}
+        with self._lock:
+            self._retire()
+            self._fold(merged, self._retired)
+            for _, shard in self._shards:
+                self._fold(merged, shard)
+        return merged
+
+    def _format_labels(self, key: LABELS_ALIAS, extra: typing.Sequence[typing.Tuple[str, str]] = ()) -> str:
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def samples(self) -> typing.Iterator[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.type}\n"
+        return header + "".join(f"{sample}\n" for sample in self.samples())
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter(_Metric):
+    """
+    A monotonically increasing value, e.g messages sent.
+    """
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._merged().get(self._key(labels), 0)
+
+    def _fold(self, into: typing.Dict[LABELS_ALIAS, typing.Any], shard: typing.Dict[LABELS_ALIAS, typing.Any]) -> None:
+        for key, value in shard.copy().items():
+            into[key] = into.get(key, 0) + value
+
+    def samples(self) -> typing.Iterator[str]:
+        for key, value in sorted(self._merged().items()):
+            yield f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """
+    A value that can go up and down, e.g connections in use.  Gauges are updated under a lock, they are
+    not expected on hot paths.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: typing.Dict[LABELS_ALIAS, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _merged(self) -> typing.Dict[LABELS_ALIAS, typing.Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> typing.Iterator[str]:
+        for key, value in sorted(self._merged().items()):
+            yield f"{self.name}{self._format_labels(key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets, e.g per phase latency in seconds.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # [per bucket counts (+Inf last), sum]
+            state = shard[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> typing.Iterator[None]:
+        """
+        Observe the duration of the `with` block in seconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        state = self._merged().get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def _fold(self, into: typing.Dict[LABELS_ALIAS, typing.Any], shard: typing.Dict[LABELS_ALIAS, typing.Any]) -> None:
+        for key, (counts, total) in shard.copy().items():
+            state = into.setdefault(key, [[0] * len(counts), 0.0])
+            state[0] = [a + b for a, b in zip(state[0], counts)]
+            state[1] += total
+
+    def samples(self) -> typing.Iterator[str]:
+        for key, (counts, total) in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = self._format_labels(key, [("le", _format_value(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._format_labels(key)} {cumulative}"
+
+
+_M = typing.TypeVar("_M", bound=_Metric)
+
+
+class MetricsRegistry:
+    """
+    A collection of metrics that can be exported in the Prometheus text exposition format, either by writing
+    a file (e.g for the node_exporter textfile collector) or by serving a local HTTP endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: typing.Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> typing.Iterator[_Metric]:
+        return iter(list(self._metrics.values()))
+
+    def _get_or_create(self, kind: typing.Type[_M], name: str, *args: typing.Any, **kwargs: typing.Any) -> _M:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = kind(name, *args, **kwargs)
+            elif not isinstance(metric, kind):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def exposition(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        return "".join(metric.expose() for metric in self)
+
+    def write_to_file(self, path: typing.Union[str, os.PathLike[str]]) -> None:
+        """
+        Atomically (write then rename) write the exposition to `path`, so scrapers never see a partial file.
+        """
+        import tempfile
+
+        directory = os.path.dirname(os.fspath(path)) or "."
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as file:
+            file.write(self.exposition())
+        os.replace(file.name, path)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> http.server.ThreadingHTTPServer:
+        """
+        Serve the exposition over HTTP on a background daemon thread.  The server is returned, see
+        `server.server_address` for the bound port and call `server.shutdown()` to stop it.
+        """
+        import http.server
+
+        registry = self
+
+        class _Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = registry.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: typing.Any) -> None:
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, name="mailie-metrics", daemon=True).start()
+        return server
+
+
+@dataclasses.dataclass(frozen=True)
+class ClientMetrics:
+    """
+    The metrics recorded by `SyncClient`, registered against a given registry.
+    """
+
+    messages_sent: Counter
+    messages_failed: Counter
+    recipients_refused: Counter
+    bytes_written: Counter
+    phase_duration: Histogram
+
+    @classmethod
+    def register(cls, registry: MetricsRegistry) -> ClientMetrics:
+        return cls(
+            registry.counter("mailie_messages_sent_total", "Messages accepted by the server."),
+            registry.counter("mailie_messages_failed_total", "Messages that could not be sent.", ("error",)),
+            registry.counter("mailie_recipients_refused_total", "Recipients refused by the server."),
+            registry.counter("mailie_bytes_written_total", "Bytes written to SMTP connections."),
+            registry.histogram("mailie_phase_duration_seconds", "Time spent in each phase of sending.", ("phase",)),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class AttachmentMetrics:
+    """
+    The metrics recorded by the attachment strategies.
+    """
+
+    attachments: Counter
+    attachment_bytes: Counter
+
+    @classmethod
+    def register(cls, registry: MetricsRegistry) -> AttachmentMetrics:
+        return cls(
+            registry.counter("mailie_attachments_total", "Files loaded as attachments."),
+            registry.counter("mailie_attachment_bytes_total", "Bytes of attachment data loaded from disk."),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class HookMetrics:
+    """
+    The metrics recorded by `ThreadedHookDispatcher`.
+    """
+
+    dropped: Counter
+    errors: Counter
+
+    @classmethod
+    def register(cls, registry: MetricsRegistry) -> HookMetrics:
+        return cls(
+            registry.counter("mailie_hooks_dropped_total", "Hooks dropped by the overflow policy.", ("hook",)),
+            registry.counter("mailie_hook_errors_total", "Hooks that raised an exception.", ("hook",)),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class RelayMetrics:
+    """
+    The metrics recorded by `RelayClient`.
+    """
+
+    failovers: Counter
+    retries: Counter
+    circuit_open: Gauge
+
+    @classmethod
+    def register(cls, registry: MetricsRegistry) -> RelayMetrics:
+        return cls(
+            registry.counter("mailie_relay_failovers_total", "Sends retried on another relay.", ("relay",)),
+            registry.counter(
+                "mailie_relay_retries_total", "Relay failures retried on another relay.", ("relay", "error")
+            ),
+            registry.gauge("mailie_relay_circuit_open", "1 while the relays circuit breaker is open.", ("relay",)),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class PoolMetrics:
+    """
+    The metrics recorded by the connection pools of `Scheduler` and `RelayClient`, labelled by pool; the
+    utilisation of a pool is `in_use / (in_use + idle)`.
+    """
+
+    in_use: Gauge
+    idle: Gauge
+
+    @classmethod
+    def register(cls, registry: MetricsRegistry) -> PoolMetrics:
+        return cls(
+            registry.gauge("mailie_pool_connections_in_use", "Pooled connections sending mail.", ("pool",)),
+            registry.gauge("mailie_pool_connections_idle", "Pooled connections waiting for mail.", ("pool",)),
+        )
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import cProfile
+import dataclasses
+import io
+import os
+import pstats
+import time
+import tracemalloc
+import typing
+
+# Exclusive CPU time is attributed to a category by the file (or builtin) it was spent in; the first
+# matching category wins.  This answers the question "is it MIME building or the network?".
+_CATEGORIES: typing.Tuple[typing.Tuple[str, typing.Tuple[str, ...]], ...] = (
+    ("network", ("smtplib.py", "socket", "ssl", "selectors.py")),
+    ("mime", (f"{os.sep}email{os.sep}", "_encoding.py", "_dkim.py", "base64", "quopri", "binascii")),
+    ("attachments", ("_attachments.py", "mimetypes.py", "pathlib.py", "<built-in method io.open>", "readinto")),
+)
+_OTHER = "other"
+
+
+def categorise(filename: str, function: str) -> str:
+    """
+    Return the category (network, mime, attachments or other) a profiled function belongs to.
+    """
+    location = f"{filename}:{function}"
+    for category, needles in _CATEGORIES:
+        if any(needle in location for needle in needles):
+            return category
+    return _OTHER
+
+
+@dataclasses.dataclass
+class ProfileReport:
+    """
+    The result of a profiling session; CPU time from `cProfile` and (optionally) a `tracemalloc` snapshot.
+    """
+
+    stats: pstats.Stats
+    snapshot: typing.Optional[tracemalloc.Snapshot]
+    wall_time: float
+
+    def breakdown(self) -> typing.Dict[str, float]:
+        """
+        Exclusive CPU seconds per category, see `categorise`.
+        """
+        totals = {category: 0.0 for category, _ in _CATEGORIES}
+        totals[_OTHER] = 0.0
+        for (filename, _, function), (_, _, exclusive, _, _) in self.stats.stats.items():  # type: ignore[attr-defined]
+            totals[categorise(filename, function)] += exclusive
+        return totals
+
+    def summary(self, limit: int = 15) -> str:
+        """
+        A plain text summary: time per category, the most expensive functions (by cumulative time) and, if
+        memory was traced, the lines that allocated the most memory.
+        """
+        out = io.StringIO()
+        breakdown = self.breakdown()
+        total = sum(breakdown.values()) or 1.0
+        out.write(f"Wall time: {self.wall_time:.3f}s\n\n{'category':<12} {'cpu (s)':>10} {'share':>7}\n")
+        for category, seconds in sorted(breakdown.items(), key=lambda item: -item[1]):
+            out.write(f"{category:<12} {seconds:>10.4f} {seconds / total:>7.1%}\n")
+        out.write("\n")
+        stats = pstats.Stats(stream=out)
+        stats.add(self.stats)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        if self.snapshot is not None:
+            statistics = self.snapshot.statistics("lineno")
+            out.write(f"Allocated: {sum(stat.size for stat in statistics) / 1024:.1f} KiB, top allocations:\n")
+            for stat in statistics[:limit]:
+                out.write(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {stat.traceback}\n")
+        return out.getvalue()
+
+    def dump(self, path: typing.Union[str, os.PathLike[str]]) -> None:
+        """
+        Write the CPU profile to `path` in the standard `pstats` format (viewable with snakeviz, gprof2dot,
+        `python -m pstats` etc.) and, if memory was traced, the allocation snapshot to `<path>.tracemalloc`
+        (load with `tracemalloc.Snapshot.load`).
+        """
+        self.stats.dump_stats(os.fspath(path))
+        if self.snapshot is not None:
+            self.snapshot.dump(f"{os.fspath(path)}.tracemalloc")
+
+
+class Profiler:
+    """
+    A context manager that profiles CPU time with `cProfile` and, optionally, allocations with `tracemalloc`
+    for the duration of the `with` block.  The `ProfileReport` is available as `profiler.report` on exit.
+
+    :param memory: Trace allocations; this slows execution noticeably, disable it to only profile CPU.
+    :param frames: The number of frames tracemalloc stores per allocation.
+    :param dump: (Optional) a path the report is dumped to on exit, see `ProfileReport.dump`.
+    """
+
+    def __init__(
+        self,
+        *,
+        memory: bool = True,
+        frames: int = 1,
+        dump: typing.Optional[typing.Union[str, os.PathLike[str]]] = None,
+    ) -> None:
+        self.memory = memory
+        self.frames = frames
+        self.dump = dump
+        self.report: typing.Optional[ProfileReport] = None
+        self._profile = cProfile.Profile()
+        self._started_tracing = False
+        self._started = 0.0
+
+    def __enter__(self) -> Profiler:
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._profile.disable()
+        wall_time = time.perf_counter() - self._started
+        snapshot = None
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.report = ProfileReport(pstats.Stats(self._profile), snapshot, wall_time)
+        if self.dump is not None:
+            self.report.dump(self.dump)
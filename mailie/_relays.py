@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import smtplib
+import threading
+import time
+import typing
+
+from ._client import SyncClient
+from ._deadline import Deadline
+from ._deadline import current_deadline
+from ._exceptions import RelaysUnavailableException
+from ._hooks import HookDispatcher
+from ._metrics import MetricsRegistry
+from ._metrics import PoolMetrics
+from ._metrics import RelayMetrics
+from ._metrics import metrics as default_metrics
+from ._response import SMTPResponse
+from ._types import EMAIL_PROVIDER_TYPES
+
+LEAST_OUTSTANDING = "least_outstanding"
+LATENCY = "latency"
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclasses.dataclass(frozen=True)
+class Relay:
+    """
+    An SMTP relay, `weight` scales the share of sends it receives.
+    """
+
+    host: str
+    port: int = 25
+    weight: float = 1.0
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+@dataclasses.dataclass
+class RelayHealth:
+    """
+    The health of a relay; an exponentially weighted moving average of the latency of successful sends
+    and of the error rate (`1` for a relay failure, `0` otherwise), plus the state of its circuit breaker.
+    """
+
+    latency: typing.Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+    consecutive_failures: int = 0
+    outstanding: int = 0
+    state: str = CLOSED
+    opened_at: float = 0.0
+
+
+class _RelayState:
+    def __init__(self, relay: Relay) -> None:
+        self.relay = relay
+        self.health = RelayHealth()
+        self.idle: typing.List[SyncClient] = []
+        self.probing = False
+
+
+def is_relay_failure(exc: BaseException) -> bool:
+    """
+    Returns `True` if an exception raised by `SyncClient.send` is a fault of the relay (unreachable, timed
+    out, disconnected or a transient 4xx reply) and the send should be retried elsewhere, rather than a
+    permanent rejection of the message itself.  Recipients refused only with 4xx replies are transient too.
+    """
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPNotSupportedError):
+        return False
+    return isinstance(exc, OSError)
+
+
+class RelayClient:
+    """
+    Send through any of several relays, balancing load across them, tracking their health and failing
+    over transparently.  The client is thread safe; each relay keeps a pool of `SyncClient` connections
+    which are borrowed for the duration of a send.
+
+    Relays are chosen by `balance`:
+
+        :: `least_outstanding` The relay with the fewest sends in progress (relative to its weight), ties
+        are broken by latency
+        :: `latency` The relay with the lowest expected wait; latency x (sends in progress + 1) / weight
+
+    Every relay has a circuit breaker.  After `trip_after` consecutive failures, or once its error rate
+    exceeds `max_error_rate` (after `min_samples` sends), the relay is ejected for `cooldown` seconds.  A
+    single probe send is then let through; success restores the relay, failure ejects it again.
+
+    Sends that fail because of the relay are retried on the next best relay, up to `max_attempts` relays.
+    When a relay fails after some batches of recipients were accepted (see `batch_size`), only the remaining
+    recipients are failed over and the response covers those alone.  Permanent (5xx) rejections of the
+    message are raised immediately.  With a `deadline` the budget covers every attempt.  A `retry` hook
+    (passed in `hooks` with those of the clients) is called with the relay and the exception whenever a send
+    fails over.
+
+    :param relays: `Relay` instances or (host, port) tuples, e.g `Providers.GMAIL`.
+    :param balance: `least_outstanding` or `latency`, see above.
+    :param alpha: The smoothing factor of the moving averages, higher reacts faster.
+    :param max_attempts: The most relays a send is attempted on, defaults to all of them.
+    :param deadline: (optional) The total seconds a send may take, across all attempts.
+    :param client_kwargs: Passed to every `SyncClient`.
+    """
+
+    def __init__(
+        self,
+        relays: typing.Sequence[typing.Union[Relay, EMAIL_PROVIDER_TYPES]],
+        *,
+        balance: str = LEAST_OUTSTANDING,
+        alpha: float = 0.2,
+        trip_after: int = 3,
+        max_error_rate: float = 0.5,
+        min_samples: int = 10,
+        cooldown: float = 30.0,
+        max_attempts: typing.Optional[int] = None,
+        deadline: typing.Optional[float] = None,
+        metrics: MetricsRegistry = default_metrics,
+        **client_kwargs: typing.Any,
+    ) -> None:
+        if not relays:
+            raise ValueError("At least one relay is required.")
+        if balance not in (LEAST_OUTSTANDING, LATENCY):
+            raise ValueError(f"Unknown balance: {balance}, expected one of: {LEAST_OUTSTANDING}, {LATENCY}")
+        self._relays = [_RelayState(relay if isinstance(relay, Relay) else Relay(*relay)) for relay in relays]
+        self.balance = balance
+        self.alpha = alpha
+        self.trip_after = trip_after
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.max_attempts = max_attempts or len(self._relays)
+        self.deadline = deadline
+        self.client_kwargs = {**client_kwargs, "metrics": metrics}
+        self.metrics = RelayMetrics.register(metrics)
+        self.pool_metrics = PoolMetrics.register(metrics)
+        self._retry_hook = (client_kwargs.get("hooks") or {}).get("retry")
+        self._hook_dispatcher: HookDispatcher = client_kwargs.get("hook_dispatcher") or HookDispatcher()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> RelayClient:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def health(self) -> typing.Dict[str, RelayHealth]:
+        """
+        A snapshot of the health of every relay, keyed on host:port.
+        """
+        with self._lock:
+            return {str(state.relay): dataclasses.replace(state.health) for state in self._relays}
+
+    def send(self, *, deadline: typing.Optional[float] = None, **kwargs: typing.Any) -> SMTPResponse:
+        """
+        Send an email through the best available relay, see `SyncClient.send` for the arguments.
+
+        :raises RelaysUnavailableException: If no relay is available, or every attempt failed because of
+        the relay (the last failure is chained).
+        """
+        budget = self.deadline if deadline is None else deadline
+        with Deadline(budget) if budget is not None else contextlib.nullcontext():
+            return self._send(kwargs)
+
+    def _send(self, kwargs: typing.Dict[str, typing.Any]) -> SMTPResponse:
+        tried: typing.List[_RelayState] = []
+        last: typing.Optional[BaseException] = None
+        while len(tried) < self.max_attempts:
+            acquired = self._acquire(tried)
+            if acquired is None:
+                break
+            state, client = acquired
+            if tried:
+                self.metrics.failovers.inc(relay=str(state.relay))
+            tried.append(state)
+            started = time.perf_counter()
+            try:
+                client = client or SyncClient(**self._client_arguments(state.relay))
+                response = client.send(**kwargs)
+            except Exception as exc:
+                accepted = client.accepted_recipients if client is not None else []
+                relay_failure = is_relay_failure(exc)
+                self._release(state, client, time.perf_counter() - started, failed=relay_failure)
+                deadline = current_deadline()
+                if not relay_failure or (deadline is not None and deadline.expired):
+                    raise
+                last = exc
+                if accepted:
+                    kwargs = {**kwargs, "to_addrs": self._remaining(kwargs, accepted)}
+                self.metrics.retries.inc(relay=str(state.relay), error=type(exc).__name__)
+                if self._retry_hook is not None:
+                    self._hook_dispatcher.dispatch("retry", self._retry_hook, state.relay, exc)
+                continue
+            self._release(state, client, time.perf_counter() - started, failed=False)
+            return response
+        raise RelaysUnavailableException(
+            f"No relay available, attempted: {', '.join(str(state.relay) for state in tried) or 'none'}"
+        ) from last
+
+    @staticmethod
+    def _remaining(kwargs: typing.Dict[str, typing.Any], accepted: typing.List[str]) -> typing.List[str]:
+        """
+        The envelope recipients of a send that were not accepted by the relay that failed it.
+        """
+        recipients = kwargs.get("to_addrs") or kwargs["email"].rcpt_to
+        recipients = [recipients] if isinstance(recipients, str) else recipients
+        return [address for address in recipients if address not in accepted]
+
+    def _client_arguments(self, relay: Relay) -> typing.Dict[str, typing.Any]:
+        return {**self.client_kwargs, "host": relay.host, "port": relay.port}
+
+    def _available(self, state: _RelayState, now: float) -> bool:
+        health = state.health
+        if health.state == OPEN and now - health.opened_at >= self.cooldown:
+            health.state = HALF_OPEN
+        if health.state == HALF_OPEN:
+            return not state.probing
+        return health.state == CLOSED
+
+    def _cost(self, state: _RelayState) -> typing.Tuple[float, float]:
+        health, weight = state.health, state.relay.weight
+        latency = health.latency or 0.0
+        if self.balance == LATENCY:
+            return latency * (health.outstanding + 1) / weight, health.outstanding / weight
+        return health.outstanding / weight, latency
+
+    def _acquire(
+        self, exclude: typing.Sequence[_RelayState]
+    ) -> typing.Optional[typing.Tuple[_RelayState, typing.Optional[SyncClient]]]:
+        """
+        Choose the best available relay, reserving it and borrowing one of its idle connections (if any).
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [state for state in self._relays if state not in exclude and self._available(state, now)]
+            if not candidates:
+                return None
+            state = min(candidates, key=self._cost)
+            if state.health.state == HALF_OPEN:
+                state.probing = True
+            state.health.outstanding += 1
+            self.pool_metrics.in_use.inc(pool=str(state.relay))
+            if not state.idle:
+                return state, None
+            self.pool_metrics.idle.dec(pool=str(state.relay))
+            return state, state.idle.pop()
+
+    def _release(self, state: _RelayState, client: typing.Optional[SyncClient], elapsed: float, failed: bool) -> None:
+        relay, health = str(state.relay), state.health
+        with self._lock:
+            health.outstanding -= 1
+            self.pool_metrics.in_use.dec(pool=relay)
+            health.samples += 1
+            health.error_rate += self.alpha * (float(failed) - health.error_rate)
+            state.probing = False
+            if failed:
+                health.consecutive_failures += 1
+                tripped = health.consecutive_failures >= self.trip_after or (
+                    health.samples >= self.min_samples and health.error_rate > self.max_error_rate
+                )
+                if health.state == HALF_OPEN or tripped:
+                    health.state, health.opened_at = OPEN, time.monotonic()
+                    self.metrics.circuit_open.set(1, relay=relay)
+            else:
+                health.latency = (
+                    elapsed if health.latency is None else health.latency + self.alpha * (elapsed - health.latency)
+                )
+                health.consecutive_failures = 0
+                if health.state != CLOSED:
+                    health.state = CLOSED
+                    self.metrics.circuit_open.set(0, relay=relay)
+            if client is not None and not failed:
+                state.idle.append(client)
+                self.pool_metrics.idle.inc(pool=relay)
+                client = None
+        if client is not None:
+            # The connection is suspect after a relay failure, start afresh.
+            with contextlib.suppress(Exception):
+                client.delegate.close()
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [client for state in self._relays for client in state.idle]
+            for state in self._relays:
+                self.pool_metrics.idle.dec(len(state.idle), pool=str(state.relay))
+                state.idle.clear()
+        for client in clients:
+            with contextlib.suppress(Exception):
+                client.delegate.quit()
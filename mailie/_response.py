@@ -1,12 +1,67 @@
+import re
 import typing
 
+SMTP_REPLY_ALIAS = typing.Tuple[int, bytes]
+
+# How popular MTAs report the queue id in their final reply to DATA/BDAT, first match wins.
+QUEUE_ID_PATTERNS: typing.Tuple[typing.Pattern[str], ...] = (
+    re.compile(r"queued as ([\w.\-]+)", re.IGNORECASE),  # Postfix, aiosmtpd et al.
+    re.compile(r"\bid=([\w.\-]+)"),  # Exim
+    re.compile(r"InternalId=(\d+)"),  # Exchange
+    re.compile(r"^(?:\d\.\d\.\d+ )?(\w+) Message accepted", re.IGNORECASE),  # Sendmail
+    re.compile(r"^(?:\d\.\d\.\d+ )?OK\s+(?:\d+\s+)?([\w.\-]+) - gsmtp", re.IGNORECASE),  # Gmail
+)
+
+
+def parse_queue_id(text: typing.Union[str, bytes]) -> typing.Optional[str]:
+    """
+    Extract the servers queue id from the text of its reply to the message content, `None` if the
+    format is not recognised.
+    """
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", "replace")
+    for pattern in QUEUE_ID_PATTERNS:
+        match = pattern.search(text)
+        if match is not None:
+            return match.group(1)
+    return None
+
 
 class SMTPResponse:
     """
     An encapsulation of SMTP responses.  This is a multi-recipient response and stores all information
     for all email addresses attempted.
+
+    `result` holds the refused recipients, `recipients` the reply to every RCPT and `reply` the final reply
+    to the message content (see `queue_id`).  When the recipients were split across several transactions
+    `transactions` holds the final reply of each, `reply` being the last.  `timings` records the seconds spent
+    greeting the server (if this send opened the session) and sending in total.  For LMTP `deliveries` holds
+    the reply to the content for each accepted recipient, which reports whether it was actually delivered.
     """
 
-    def __init__(self, result: typing.Dict[typing.Any, typing.Any], enforce_all: bool) -> None:
+    def __init__(
+        self,
+        result: typing.Dict[typing.Any, typing.Any],
+        enforce_all: bool,
+        *,
+        envelope: typing.Sequence[str] = (),
+        message_id: typing.Optional[str] = None,
+        recipients: typing.Optional[typing.Dict[str, SMTP_REPLY_ALIAS]] = None,
+        reply: typing.Optional[SMTP_REPLY_ALIAS] = None,
+        timings: typing.Optional[typing.Dict[str, float]] = None,
+        transactions: typing.Optional[typing.List[typing.Optional[SMTP_REPLY_ALIAS]]] = None,
+        deliveries: typing.Optional[typing.Dict[str, SMTP_REPLY_ALIAS]] = None,
+    ) -> None:
         self.enforce_all = enforce_all
         self.result = result
+        self.envelope = list(envelope)
+        self.message_id = message_id
+        self.recipients = recipients if recipients is not None else {}
+        self.reply = reply
+        self.timings = timings if timings is not None else {}
+        self.transactions = transactions if transactions is not None else []
+        self.deliveries = deliveries if deliveries is not None else {}
+
+    @property
+    def queue_id(self) -> typing.Optional[str]:
+        return parse_queue_id(self.reply[1]) if self.reply is not None else None
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import smtplib
+import threading
+import time
+import typing
+
+from ._response import SMTPResponse
+
+SENT = "sent"
+PARTIAL = "partial"
+FAILED = "failed"
+
+
+class ResultSink:
+    """
+    Base class for sinks that record the outcome of every send, see `SyncClient(result_sink=...)`.
+    Successful sends are recorded with their `SMTPResponse`, failures with the exception that was raised.
+    """
+
+    def __enter__(self) -> ResultSink:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def record(self, response: SMTPResponse, error: typing.Optional[BaseException] = None) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        ...
+
+
+def _decode(text: typing.Union[str, bytes]) -> str:
+    return text.decode("utf-8", "replace") if isinstance(text, bytes) else text
+
+
+def build_record(response: SMTPResponse, error: typing.Optional[BaseException] = None) -> typing.Dict[str, typing.Any]:
+    """
+    Build the (JSON serialisable) record for a send outcome.  Every record has the same keys, so the output
+    loads directly into e.g `pandas.read_json(path, lines=True)`.
+    """
+    # For LMTP the delivery reply supersedes the RCPT reply.
+    replies = {**response.recipients, **response.deliveries}
+    recipients = {address: [code, _decode(text)] for address, (code, text) in replies.items()}
+    reply: typing.Optional[typing.Tuple[int, typing.Union[bytes, str]]] = response.reply
+    if error is not None:
+        status = FAILED
+        if isinstance(error, smtplib.SMTPResponseException):
+            reply = (error.smtp_code, error.smtp_error)
+        elif isinstance(error, smtplib.SMTPRecipientsRefused):
+            recipients.update({a: [code, _decode(text)] for a, (code, text) in error.recipients.items()})
+    else:
+        status = PARTIAL if response.result else SENT
+    return {
+        "ts": round(time.time(), 6),
+        "status": status,
+        "message_id": response.message_id,
+        "mail_from": response.envelope[0] if response.envelope else None,
+        "rcpt_to": response.envelope[1:],
+        "recipients": recipients,
+        "code": reply[0] if reply is not None else None,
+        "reply": _decode(reply[1]) if reply is not None else None,
+        "queue_id": response.queue_id if error is None else None,
+        "timings": {phase: round(seconds, 6) for phase, seconds in response.timings.items()},
+        "error": f"{type(error).__name__}: {error}" if error is not None else None,
+    }
+
+
+class NDJSONResultSink(ResultSink):
+    """
+    Append one compact JSON record per send to a newline delimited JSON file (see `build_record`).  Records
+    go through a large write buffer and nothing is retained once written, so memory use is constant however
+    many messages are sent.  Records are written under a lock, a single sink may be shared by clients on
+    different threads.
+
+    :param path: The file records are appended to.
+    :param buffer_size: The size of the write buffer in bytes.
+    :param max_bytes: Rotate once the file reaches this size; the full file is renamed to `<path>.1`,
+    `<path>.2`, ... (ascending, oldest first) and a new file is started.  `0` never rotates.
+    :param flush_every: Flush the buffer after this many records; `0` only flushes when the buffer fills.
+    """
+
+    def __init__(
+        self,
+        path: typing.Union[str, os.PathLike[str]],
+        *,
+        buffer_size: int = 1048576,
+        max_bytes: int = 0,
+        flush_every: int = 0,
+    ) -> None:
+        self.path = os.fspath(path)
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(self.path, "ab", buffering=buffer_size)
+        self._size = self._file.tell()
+        self._unflushed = 0
+        self._rotations = self._existing_rotations()
+
+    def _existing_rotations(self) -> int:
+        directory, name = os.path.split(self.path)
+        suffixes = (entry.rpartition(".")[2] for entry in os.listdir(directory or ".") if entry.startswith(f"{name}."))
+        return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+
+    def record(self, response: SMTPResponse, error: typing.Optional[BaseException] = None) -> None:
+        line = json.dumps(build_record(response, error), separators=(",", ":"), ensure_ascii=False) + "\n"
+        self.write(line.encode("utf-8"))
+
+    def write(self, line: bytes) -> None:
+        """
+        Append an already encoded record.
+        """
+        with self._lock:
+            if self.max_bytes and self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line)
+            self.count += 1
+            self._unflushed += 1
+            if self.flush_every and self._unflushed >= self.flush_every:
+                self._file.flush()
+                self._unflushed = 0
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._rotations += 1
+        os.rename(self.path, f"{self.path}.{self._rotations}")
+        self._file = open(self.path, "ab", buffering=self.buffer_size)
+        self._size = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+            self._unflushed = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
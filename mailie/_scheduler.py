@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import dataclasses
+import smtplib
+import threading
+import time
+import typing
+
+from ._client import SyncClient
+from ._email import Email
+from ._exceptions import MailieException
+from ._metrics import MetricsRegistry
+from ._metrics import PoolMetrics
+from ._metrics import metrics as default_metrics
+from ._response import SMTPResponse
+
+TRANSACTIONAL = "transactional"
+BULK = "bulk"
+
+_POOL = "scheduler"
+
+
+@dataclasses.dataclass(frozen=True)
+class Lane:
+    """
+    A priority lane of the `Scheduler`.
+
+    :param name: The name emails are submitted to the lane with.
+    :param weight: The share of connections the lane receives relative to the other lanes with queued work.
+    :param reserved: Connections kept free for this lane; other lanes never use them, even when idle.
+    :param limit: The most connections the lane may use at once, `0` for no limit.
+    :param max_wait: Starvation protection; once the oldest email in the lane has waited this many seconds
+    it is sent next regardless of weights.  `None` relies on weights alone.
+    :param max_queued: `submit` blocks while this many emails are queued in the lane, `0` for no bound.
+    """
+
+    name: str
+    weight: int = 1
+    reserved: int = 0
+    limit: int = 0
+    max_wait: typing.Optional[float] = None
+    max_queued: int = 0
+
+
+DEFAULT_LANES = (
+    Lane(TRANSACTIONAL, weight=10, reserved=1, max_wait=1.0),
+    Lane(BULK, weight=1, max_wait=30.0, max_queued=10000),
+)
+
+
+@dataclasses.dataclass
+class _Job:
+    future: concurrent.futures.Future[SMTPResponse]
+    email: Email
+    kwargs: typing.Dict[str, typing.Any]
+    enqueued: float
+
+
+class _LaneState:
+    def __init__(self, lane: Lane) -> None:
+        self.lane = lane
+        self.queue: typing.Deque[_Job] = collections.deque()
+        self.in_flight = 0
+        self.current = 0  # smooth weighted round robin
+
+
+def _connection_lost(exc: Exception) -> bool:
+    """
+    Returns `True` if `exc` means the connection can not be reused.  `smtplib.SMTPException` is an `OSError`,
+    but apart from a disconnect it reports a reply (i.e a refused message) on a connection that is still usable.
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
+
+
+class Scheduler:
+    """
+    Send emails over a shared pool of connections, taking work from weighted priority lanes so that
+    transactional mail (password resets etc) is not stuck behind a large bulk send.  Each connection is a
+    `SyncClient` owned by a worker thread and reused for every email that worker sends.
+
+    Whenever a connection becomes free the next email is chosen from the lanes with queued work:
+
+        :: Lanes at their `limit`, or that would take a connection `reserved` by another lane, are skipped
+        :: If the oldest email of a lane has waited longer than its `max_wait`, the oldest such email is sent
+        :: Otherwise lanes are picked by smooth weighted round robin, in proportion to their `weight`
+
+    Within a lane emails are sent in the order they were submitted, so a newly submitted high priority
+    email overtakes everything queued in the lower priority lanes.
+
+    :param client_factory: A callable returning a new (unopened) `SyncClient`, called per connection.
+    :param connections: The number of connections (and worker threads).
+    :param lanes: The lanes, see `Lane`.  The default has a `transactional` lane with one reserved
+    connection and a `bulk` lane.
+    :param metrics: The registry the utilisation of the connections is recorded in, as the `scheduler` pool.
+    """
+
+    def __init__(
+        self,
+        client_factory: typing.Callable[[], SyncClient],
+        *,
+        connections: int = 4,
+        lanes: typing.Sequence[Lane] = DEFAULT_LANES,
+        metrics: MetricsRegistry = default_metrics,
+    ) -> None:
+        if len({lane.name for lane in lanes}) != len(lanes):
+            raise ValueError("Lane names must be unique.")
+        if sum(lane.reserved for lane in lanes) > connections:
+            raise ValueError(f"Lanes reserve more than the {connections} available connections.")
+        self.client_factory = client_factory
+        self.connections = connections
+        self.metrics = PoolMetrics.register(metrics)
+        self._lanes = {lane.name: _LaneState(lane) for lane in lanes}
+        self._condition = threading.Condition()
+        self._idle = connections
+        self.metrics.idle.inc(connections, pool=_POOL)
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"mailie-scheduler-{number}", daemon=True)
+            for number in range(connections)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self) -> Scheduler:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def submit(
+        self, email: Email, *, lane: str = BULK, **kwargs: typing.Any
+    ) -> concurrent.futures.Future[SMTPResponse]:
+        """
+        Queue an email in a lane, returning a future for its `SMTPResponse`.  Keyword arguments are passed
+        to `SyncClient.send`.
+
+        :raises MailieException: If the scheduler has been closed.
+        """
+        future: concurrent.futures.Future[SMTPResponse] = concurrent.futures.Future()
+        with self._condition:
+            state = self._lanes[lane]
+            while state.lane.max_queued and len(state.queue) >= state.lane.max_queued and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise MailieException("Cannot submit mail, this scheduler has been closed.")
+            state.queue.append(_Job(future, email, kwargs, time.monotonic()))
+            self._condition.notify_all()
+        return future
+
+    def queued(self, lane: str) -> int:
+        return len(self._lanes[lane].queue)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting emails.  Queued emails are still sent, with `wait=True` this blocks until they have
+        been and every connection is closed.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _select(self) -> typing.Optional[typing.Tuple[_LaneState, _Job]]:
+        """
+        Choose the next email to send, see the class documentation.  Must be called holding the condition.
+        """
+        unmet = {name: max(0, state.lane.reserved - state.in_flight) for name, state in self._lanes.items()}
+        total_unmet = sum(unmet.values())
+        eligible = [
+            state
+            for name, state in self._lanes.items()
+            if state.queue
+            and not (state.lane.limit and state.in_flight >= state.lane.limit)
+            and self._idle - 1 >= total_unmet - unmet[name]
+        ]
+        if not eligible:
+            return None
+        now = time.monotonic()
+        overdue = [
+            state
+            for state in eligible
+            if state.lane.max_wait is not None and now - state.queue[0].enqueued >= state.lane.max_wait
+        ]
+        if overdue:
+            chosen = min(overdue, key=lambda state: state.queue[0].enqueued)
+        else:
+            for state in eligible:
+                state.current += state.lane.weight
+            chosen = max(eligible, key=lambda state: state.current)
+            chosen.current -= sum(state.lane.weight for state in eligible)
+        return chosen, chosen.queue.popleft()
+
+    def _next(self) -> typing.Optional[typing.Tuple[_LaneState, _Job]]:
+        with self._condition:
+            while True:
+                selected = self._select()
+                if selected is not None:
+                    selected[0].in_flight += 1
+                    self._idle -= 1
+                    self.metrics.idle.dec(pool=_POOL)
+                    self.metrics.in_use.inc(pool=_POOL)
+                    self._condition.notify_all()
+                    return selected
+                if self._closed and not any(state.queue for state in self._lanes.values()):
+                    return None
+                self._condition.wait()
+
+    def _work(self) -> None:
+        client: typing.Optional[SyncClient] = None
+        try:
+            while True:
+                selected = self._next()
+                if selected is None:
+                    return
+                state, job = selected
+                try:
+                    if not job.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        if client is None:
+                            client = self.client_factory().__enter__()
+                        response: SMTPResponse = client.send(email=job.email, **job.kwargs)
+                    except Exception as exc:
+                        job.future.set_exception(exc)
+                        if client is not None and _connection_lost(exc):
+                            # The next email gets a new connection.
+                            client.__exit__(type(exc), exc, exc.__traceback__)
+                            client = None
+                    else:
+                        job.future.set_result(response)
+                finally:
+                    with self._condition:
+                        state.in_flight -= 1
+                        self._idle += 1
+                        self.metrics.in_use.dec(pool=_POOL)
+                        self.metrics.idle.inc(pool=_POOL)
+                        self._condition.notify_all()
+        finally:
+            self.metrics.idle.dec(pool=_POOL)
+            if client is not None:
+                client.__exit__(None, None, None)
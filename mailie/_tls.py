@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import ssl
+import threading
+import typing
+
+TLS_SESSION_KEY_ALIAS = typing.Tuple[str, int]
+
+_SESSION_KEY: contextvars.ContextVar[typing.Optional[TLS_SESSION_KEY_ALIAS]] = contextvars.ContextVar(
+    "mailie_tls_session_key", default=None
+)
+
+
+@contextlib.contextmanager
+def tls_session_key(host: str, port: int) -> typing.Iterator[None]:
+    """
+    Key the TLS sessions of client connections wrapped within the block on `host` & `port`, i.e those of the
+    `SyncClient` connecting.  The socket itself cannot be relied upon for this, its peer may be a proxy or
+    a unix socket.
+    """
+    token = _SESSION_KEY.set((host.lower(), port))
+    try:
+        yield
+    finally:
+        _SESSION_KEY.reset(token)
+
+
+class TLSSessionCache:
+    """
+    A thread safe store of the most recent `ssl.SSLSession` negotiated with each (host, port), along with
+    resumption statistics.  Sessions are only valid for the `ssl.SSLContext` they were created by, so a
+    cache belongs to a single `ResumingSSLContext`.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._sessions: typing.Dict[TLS_SESSION_KEY_ALIAS, ssl.SSLSession] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, key: TLS_SESSION_KEY_ALIAS) -> typing.Optional[ssl.SSLSession]:
+        return self._sessions.get(key)
+
+    def put(self, key: TLS_SESSION_KEY_ALIAS, session: typing.Optional[ssl.SSLSession]) -> None:
+        if session is None:
+            return
+        with self._lock:
+            self._sessions[key] = session
+
+    def discard(self, key: TLS_SESSION_KEY_ALIAS) -> None:
+        with self._lock:
+            self._sessions.pop(key, None)
+
+    def record(self, reused: bool) -> None:
+        with self._lock:
+            if reused:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def handshakes(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        The fraction of handshakes that resumed a previous session, `0.0` if there have been none.
+        """
+        return self.hits / self.handshakes if self.handshakes else 0.0
+
+
+class _ResumingSSLSocket(ssl.SSLSocket):
+    """
+    An `ssl.SSLSocket` that hands its session back to the context's cache when it is closed.  Capturing the
+    session at close (rather than after the handshake) matters for TLS 1.3, where session tickets arrive
+    after the handshake has completed.
+    """
+
+    _session_key: typing.Optional[TLS_SESSION_KEY_ALIAS] = None
+
+    def close(self) -> None:
+        context, key = self.context, self._session_key
+        if key is not None and isinstance(context, ResumingSSLContext):
+            self._session_key = None
+            try:
+                context.sessions.put(key, self.session)
+            except (ssl.SSLError, ValueError):
+                pass
+        super().close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    An `ssl.SSLContext` that transparently resumes TLS sessions for client connections.  The session of
+    every closed connection is cached against the servers hostname & port and offered on the next
+    handshake to the same server, saving a round trip and the asymmetric key exchange.  This works for
+    implicit TLS (`smtplib.SMTP_SSL`) and STARTTLS alike as both call `wrap_socket`.  Sessions are keyed on
+    the host & port of the `SyncClient` connecting (see `tls_session_key`), other connections are not
+    resumed.
+
+    Resumption statistics are available via `context.sessions`.
+    """
+
+    sslsocket_class = _ResumingSSLSocket
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT, *args: typing.Any, **kwargs: typing.Any) -> None:
+        # `ssl.SSLContext` is fully constructed in `__new__`, only the cache needs attaching here.
+        self.sessions = TLSSessionCache()
+
+    def wrap_socket(  # type: ignore[override]
+        self,
+        sock: typing.Any,
+        server_side: bool = False,
+        do_handshake_on_connect: bool = True,
+        suppress_ragged_eofs: bool = True,
+        server_hostname: typing.Optional[str] = None,
+        session: typing.Optional[ssl.SSLSession] = None,
+    ) -> ssl.SSLSocket:
+        key = None if server_side else _SESSION_KEY.get()
+        if key is not None:
+            session = session or self.sessions.get(key)
+        try:
+            wrapped = super().wrap_socket(
+                sock,
+                server_side=server_side,
+                do_handshake_on_connect=do_handshake_on_connect,
+                suppress_ragged_eofs=suppress_ragged_eofs,
+                server_hostname=server_hostname,
+                session=session,
+            )
+        except ssl.SSLError:
+            if key is not None:
+                self.sessions.discard(key)
+            raise
+        if key is not None and isinstance(wrapped, _ResumingSSLSocket):
+            wrapped._session_key = key
+            if do_handshake_on_connect:
+                self.sessions.record(bool(wrapped.session_reused))
+        return wrapped
+
+
+def create_resuming_context(cafile: typing.Optional[str] = None) -> ResumingSSLContext:
+    """
+    Build a client `ResumingSSLContext` with the same secure defaults as `ssl.create_default_context()`.
+    """
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    if cafile is None:
+        context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+    else:
+        context.load_verify_locations(cafile=cafile)
+    return context
+
+
+@functools.lru_cache(maxsize=None)
+def default_tls_context() -> ResumingSSLContext:
+    """
+    The process wide `ResumingSSLContext` shared by every client that is not given an explicit context.
+    Loading the trust store is expensive, as is discarding cached sessions, so this is built once.
+    """
+    return create_resuming_context()
@@ -13,9 +13,12 @@ EMAIL_PARAM_TYPE_ALIAS = typing.Union[str, typing.Tuple[typing.Optional[str], ty
 EMAIL_HEADER_TYPE_ALIAS = typing.Any
 EMAIL_ITERABLE_ALIAS = typing.Union[str, typing.Iterable[str]]
 EMAIL_ATTACHMENT_PATH_ALIAS = typing.Union[typing.List[str], typing.List["os.PathLike[str]"], str, "os.PathLike[str]"]
+EMAIL_HTML_ALIAS = typing.Union[
+    str, typing.Tuple[str], typing.Tuple[str, typing.Sequence[typing.Union[str, "os.PathLike[str]"]]]
+]
 EMAIL_ATTACHMENT_FILTER_ALIAS = typing.Union[str, re.Pattern]
 SMTP_AUTH_ALIAS = Auth
 EMAIL_HEADER_TYPES = typing.Optional[typing.Union[typing.Sequence[str], typing.MutableMapping[str, str]]]
-HOOKS_ALIAS = typing.Optional[typing.Callable[[typing.Any], typing.Any]]
+HOOKS_ALIAS = typing.Optional[typing.Callable[..., typing.Any]]
 EMAIL_PROVIDER_TYPES = typing.Tuple[str, int]
 EMAIL_FROM_TO_TYPES = typing.Union[typing.Sequence[str], str]
@@ -2,6 +2,8 @@ import csv
 import pathlib
 import typing
 
+from ._address import is_email
+from ._address import normalise_addresses
 from ._types import EMAIL_HEADER_TYPES
 from ._types import EMAIL_ITERABLE_ALIAS
 
@@ -21,14 +23,16 @@ def split_headers_per_rfc(
 def emails_to_list(emails: typing.Optional[EMAIL_ITERABLE_ALIAS] = None) -> typing.List[str]:
     """
     Given a single email address, or an iterable of emails, returns
-    distinct email addresses in a new list.  if emails is not provided,
-    an empty list is returned.
+    distinct, normalised email addresses in a new list, preserving the
+    order in which they were provided.  if emails is not provided, an
+    empty list is returned.
 
     :param emails: A single email address or iterable of emails.
+    :raises InvalidEmailAddressException: If any of the emails are invalid.
     """
     if emails is None:
         return []
-    return [emails] if isinstance(emails, str) else [email for email in set(emails)]
+    return normalise_addresses([emails] if isinstance(emails, str) else emails)
 
 
 def headers_to_list(headers: EMAIL_HEADER_TYPES = None) -> typing.List[str]:
@@ -43,9 +47,11 @@ def headers_to_list(headers: EMAIL_HEADER_TYPES = None) -> typing.List[str]:
     return list(headers)
 
 
-def check_is_email(email: str):
-    # TODO: Validate valid emails here - easier said than done me thinks;
-    ...
+def check_is_email(email: str) -> bool:
+    """
+    Returns `True` if the email is a syntactically valid RFC-5321 address.
+    """
+    return is_email(email)
 
 
 def unpack_recipients_from_csv(recipient_or_path: str) -> typing.List[str]:
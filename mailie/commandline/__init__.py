@@ -0,0 +1,18 @@
+import sys
+import typing
+
+
+def run(argv: typing.Optional[typing.List[str]] = None) -> None:
+    """
+    The `mailie` console script entry point.  `mailie --version` is answered without importing typer (or
+    the rest of mailie) as it is frequently invoked from scripts, everything else is delegated to the typer app.
+    """
+    args = sys.argv[1:] if argv is None else argv
+    if args == ["--version"]:
+        import mailie
+
+        print(f"Mailie version: {mailie.version}")
+        return
+    from .cli import app
+
+    app(args=args)
@@ -2,11 +2,7 @@ import typing
 
 import typer
 
-from mailie import version
-
-from .._email import Email
-from .._policy import policy_factory
-from .._utility import unpack_recipients_from_csv
+import mailie
 
 app = typer.Typer(name="mail")
 
@@ -48,7 +44,7 @@ app = typer.Typer(name="mail")
 
 def version_callback(value: bool):
     if value:
-        typer.secho(f"Mailie version: {version}", fg=typer.colors.BRIGHT_GREEN, bold=True)
+        typer.secho(f"Mailie version: {mailie.version}", fg=typer.colors.BRIGHT_GREEN, bold=True)
         raise typer.Exit()
 
 
@@ -69,6 +65,8 @@ def unpack_recipients(ctx: typer.Context, recipients: typing.List[str]) -> typin
     on `,`.  The emails are then squashed into a flat list and handed off to the
     `Email` instance.
     """
+    from .._utility import unpack_recipients_from_csv
+
     if not ctx.resilient_parsing:
         return [
             email for group in [unpack_recipients_from_csv(recipient) for recipient in recipients] for email in group
@@ -103,9 +101,46 @@ def mail(
     port: int = typer.Option(25, "--port", "-p"),
     tls: bool = typer.Option(False, "--tls"),
     provider: str = typer.Option(None, "--provider", callback=validate_provider),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Render the message without sending it."),
+    out: str = typer.Option(None, "--out", help="Where --dry-run writes messages: maildir:/path or mbox:/path."),
+    profile: str = typer.Option(None, "--profile", help="Profile CPU & memory, dumping the profile to this path."),
+) -> None:
+    arguments = from_addr, to_addrs, cc, bcc, policy, subject, message, html, charset, headers, verbosity, dry_run, out
+    if not profile:
+        return _mail(*arguments)
+
+    from .._profiling import Profiler
+
+    with Profiler(dump=profile) as profiler:
+        _mail(*arguments)
+    # Each -v adds more rows to the summary.
+    typer.echo(profiler.report.summary(limit=10 * (verbosity + 1)))  # type: ignore[union-attr]
+    typer.secho(f"Profile written to: {profile} (allocations: {profile}.tracemalloc)", fg=typer.colors.GREEN)
+
+
+def _mail(
+    from_addr: str,
+    to_addrs: typing.List[str],
+    cc: typing.List[str],
+    bcc: typing.List[str],
+    policy: str,
+    subject: str,
+    message: str,
+    html: str,
+    charset: str,
+    headers: typing.List[str],
+    verbosity: int,
+    dry_run: bool,
+    out: str,
 ) -> None:
+    # Deferred so that the `email` package is only imported by commands that actually build mail.
+    from .._email import Email
+    from .._policy import policy_factory
+
+    if dry_run and not out:
+        raise typer.BadParameter("--dry-run requires --out maildir:/path or --out mbox:/path")
     typer.secho(f"Mailie loaded.. (verbosity: {verbosity})", fg=typer.colors.BRIGHT_GREEN, bold=True)
-    Email(
+    email = Email(
         mail_from=from_addr,
         rcpt_to=to_addrs,
         cc=cc,
@@ -117,6 +152,11 @@ def mail(
         charset=charset,
         headers=headers,  # noqa
     )
+    if dry_run:
+        from .._mailbox import write_messages
+
+        written = write_messages([email], out)
+        typer.secho(f"Dry run: wrote {written} message(s) to {out}", fg=typer.colors.BRIGHT_GREEN)
 
 
 @app.callback()
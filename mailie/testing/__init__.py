@@ -0,0 +1,9 @@
+from ._sink import DEFAULT_EXTENSIONS
+from ._sink import SinkMessage
+from ._sink import SMTPSinkServer
+
+__all__ = [
+    "DEFAULT_EXTENSIONS",
+    "SinkMessage",
+    "SMTPSinkServer",
+]
@@ -0,0 +1,493 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import dataclasses
+import logging
+import re
+import ssl
+import threading
+import typing
+
+log = logging.getLogger(__name__)
+
+SINK_REPLY_ALIAS = typing.Tuple[int, str]
+SINK_RESPONSE_ALIAS = typing.Union[SINK_REPLY_ALIAS, typing.Callable[[str], typing.Optional[SINK_REPLY_ALIAS]]]
+
+DEFAULT_EXTENSIONS = ("PIPELINING", "SIZE", "8BITMIME", "CHUNKING")
+DEFAULT_MAX_SIZE = 33554432
+
+_PATH_PATTERN = re.compile(r"^(?:FROM|TO):\s*<?([^>\s]*)>?\s*(.*)$", re.IGNORECASE)
+_DATA_TERMINATOR = b"\r\n.\r\n"
+
+
+@dataclasses.dataclass(frozen=True)
+class SinkMessage:
+    """
+    A single message accepted by the `SMTPSinkServer`.  Only retained when the server is
+    instantiated with `keep_messages=True`.
+    """
+
+    mail_from: str
+    rcpt_tos: typing.Tuple[str, ...]
+    data: bytes
+    mail_options: typing.Tuple[str, ...] = ()
+
+
+@dataclasses.dataclass
+class _Session:
+    """Per connection SMTP transaction state."""
+
+    greeted: bool = False
+    encrypted: bool = False
+    authenticated: bool = False
+    mail_from: typing.Optional[str] = None
+    mail_options: typing.Tuple[str, ...] = ()
+    rcpt_tos: typing.List[str] = dataclasses.field(default_factory=list)
+    chunks: typing.List[bytes] = dataclasses.field(default_factory=list)
+
+    def reset(self) -> None:
+        self.mail_from = None
+        self.mail_options = ()
+        self.rcpt_tos = []
+        self.chunks = []
+
+
+class SMTPSinkServer:
+    """
+    An in-process, asyncio based SMTP server that accepts (and discards) everything it is sent.  The
+    sink is intended for benchmarking and regression testing the mailie sending pipeline without a real
+    relay.  Messages and bytes are tallied in memory, nothing is written to disk.
+
+    The server runs its own event loop on a background daemon thread, `start()` blocks until the socket
+    is listening so there is no need to sleep in tests.  It can also be used as a context manager.
+
+    :param host: The interface to bind on.
+    :param port: The port to bind on, `0` (the default) picks a free ephemeral port, see `server.port`.
+    :param extensions: The ESMTP extensions broadcast in the EHLO response.  SIZE is advertised with the
+    value of `max_size`.  Keywords such as PIPELINING, CHUNKING (BDAT), 8BITMIME, BINARYMIME and SMTPUTF8
+    are all understood by the sink.
+    :param max_size: The maximum message size in bytes, larger messages are refused with a 552.
+    :param latency: Seconds to sleep before writing every reply.  A mapping of SMTP verb to seconds can be
+    provided to only slow down particular commands e.g `{"DATA": 0.5}`.
+    :param responses: A mapping of SMTP verb to an injected reply.  The value can either be a `(code, text)`
+    tuple or a callable accepting the command argument and returning a reply tuple (or `None` to continue
+    as normal).  Injected replies for `DATA` and `BDAT` are issued *after* the message content has been
+    consumed, in place of the final acceptance reply.  For `BDAT` they apply per chunk, callables receive
+    the `<size> [LAST]` argument; a chunk other than the last that is refused fails the transaction, so
+    further chunks are refused with a 503.
+    :param keep_messages: Retain every accepted message in `server.messages`, useful for assertions but
+    unsuitable for load testing.
+    :param hostname: The hostname the server identifies itself as in the greeting and EHLO response.
+    :param tls_context: A server side `ssl.SSLContext`.  When provided STARTTLS is advertised (until the
+    session is encrypted), or every connection is encrypted from the outset if `implicit_tls=True`.
+    STARTTLS requires python 3.11 or later, older versions reply with a 454.
+    :param implicit_tls: Serve SMTPS (RFC-8314) rather than offering STARTTLS, requires `tls_context`.
+    :param credentials: A mapping of username to password (or OAuth2 bearer token).  When provided AUTH
+    PLAIN, LOGIN & XOAUTH2 are advertised and MAIL is refused until the session has authenticated.
+    :param max_recipients: The most RCPTs accepted per transaction, further RCPTs are refused with a 452 (too
+    many recipients).  If `LIMITS` is included in `extensions` the limit is advertised as `RCPTMAX` (RFC-9422).
+    `0` accepts any number of recipients.
+    :param lmtp: Serve LMTP (RFC-2033) rather than SMTP; clients greet with LHLO and, after the content, a
+    reply is issued for every accepted recipient.  Injected `DATA` / `BDAT` replies then apply per recipient,
+    callables receive the recipient address, so individual deliveries can be failed.
+    :param path: Listen on a unix domain socket at this path rather than on `host` & `port`.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        extensions: typing.Iterable[str] = DEFAULT_EXTENSIONS,
+        max_size: int = DEFAULT_MAX_SIZE,
+        latency: typing.Union[float, typing.Mapping[str, float]] = 0.0,
+        responses: typing.Optional[typing.Mapping[str, SINK_RESPONSE_ALIAS]] = None,
+        keep_messages: bool = False,
+        hostname: str = "mailie.sink",
+        tls_context: typing.Optional[ssl.SSLContext] = None,
+        implicit_tls: bool = False,
+        credentials: typing.Optional[typing.Mapping[str, str]] = None,
+        max_recipients: int = 0,
+        lmtp: bool = False,
+        path: typing.Optional[str] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.extensions = tuple(extension.upper() for extension in extensions)
+        self.max_size = max_size
+        self.latency = latency
+        self.responses = {verb.upper(): reply for verb, reply in (responses or {}).items()}
+        self.keep_messages = keep_messages
+        self.hostname = hostname
+        self.tls_context = tls_context
+        self.implicit_tls = implicit_tls
+        self.credentials = credentials
+        self.max_recipients = max_recipients
+        self.lmtp = lmtp
+        self.path = path
+        self.auth_count = 0
+        self.messages: typing.List[SinkMessage] = []
+        self.message_count = 0
+        self.recipient_count = 0
+        self.byte_count = 0
+        self.connection_count = 0
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        self._writers: typing.Set[asyncio.StreamWriter] = set()
+        self._thread: typing.Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._startup_error: typing.Optional[BaseException] = None
+
+    def __enter__(self) -> SMTPSinkServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @property
+    def address(self) -> typing.Tuple[str, int]:
+        return self.host, self.port
+
+    def start(self, timeout: float = 5.0) -> SMTPSinkServer:
+        """
+        Start the server on a background thread and block until it is accepting connections.
+        """
+        self._thread = threading.Thread(target=self._run, name="mailie-smtp-sink", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"SMTP sink did not start listening within {timeout} seconds")
+        if self._startup_error is not None:
+            raise self._startup_error
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the server, closing any open client connections.  This is a no-op if the server is not running.
+        """
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    close = stop
+
+    def reset(self) -> None:
+        """
+        Reset all counters and retained messages.
+        """
+        self.messages = []
+        self.message_count = self.recipient_count = self.byte_count = self.connection_count = self.auth_count = 0
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        try:
+            tls = self.tls_context if self.implicit_tls else None
+            if self.path is not None:
+                serving = asyncio.start_unix_server(self._handle, self.path, limit=self.max_size + 1024, ssl=tls)
+            else:
+                serving = asyncio.start_server(self._handle, self.host, self.port, limit=self.max_size + 1024, ssl=tls)
+            self._server = loop.run_until_complete(serving)
+            if self.path is None:
+                self.port = self._server.sockets[0].getsockname()[1]
+        except BaseException as exc:  # Bubble bind failures to the thread calling `start()`.
+            self._startup_error = exc
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            self._loop = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connection_count += 1
+        self._writers.add(writer)
+        session = _Session(encrypted=self.implicit_tls)
+        try:
+            await self._reply(writer, "CONNECT", 220, f"{self.hostname} {'LMTP' if self.lmtp else 'ESMTP'} mailie sink")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.rstrip(b"\r\n").decode("utf-8", "surrogateescape").partition(" ")
+                verb = command.upper()
+                if verb == "QUIT":
+                    await self._reply(writer, verb, 221, "Bye")
+                    break
+                handler = self._handlers.get(verb)
+                if handler is None:
+                    await self._reply(writer, verb, 500, f"Command not recognized: {command}")
+                    continue
+                await handler(self, session, reader, writer, verb, argument.strip())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _reply(self, writer: asyncio.StreamWriter, verb: str, code: int, text: str) -> None:
+        delay = self.latency.get(verb, 0.0) if isinstance(self.latency, typing.Mapping) else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        lines = text.splitlines() or [""]
+        payload = "".join(f"{code}-{line}\r\n" for line in lines[:-1]) + f"{code} {lines[-1]}\r\n"
+        writer.write(payload.encode("utf-8"))
+        await writer.drain()
+
+    def _injected(self, verb: str, argument: str) -> typing.Optional[SINK_REPLY_ALIAS]:
+        response = self.responses.get(verb)
+        if response is None or isinstance(response, tuple):
+            return response
+        return response(argument)
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, verb: str, argument: str, code: int, text: str
+    ) -> typing.Optional[SINK_REPLY_ALIAS]:
+        """
+        Write the injected reply for `verb` if one is configured, otherwise the default `code` & `text`.
+        Returns the injected reply (if any) so callers can abort the command.
+        """
+        injected = self._injected(verb, argument)
+        await self._reply(writer, verb, *(injected or (code, text)))
+        return injected
+
+    def _ehlo_lines(self, session: _Session) -> typing.List[str]:
+        lines = [self.hostname]
+        for extension in self.extensions:
+            if extension == "LIMITS":
+                if self.max_recipients:
+                    lines.append(f"LIMITS RCPTMAX={self.max_recipients}")
+                continue
+            lines.append(f"SIZE {self.max_size}" if extension == "SIZE" else extension)
+        if self.tls_context is not None and not session.encrypted:
+            lines.append("STARTTLS")
+        if self.credentials is not None:
+            lines.append("AUTH PLAIN LOGIN XOAUTH2")
+        return lines
+
+    async def _smtp_ehlo(self, session, reader, writer, verb, argument) -> None:
+        if (verb == "LHLO") != self.lmtp:
+            await self._reply(writer, verb, 500, f"Command not recognized: {verb}")
+            return
+        session.reset()
+        session.greeted = True
+        await self._respond(writer, verb, argument, 250, "\n".join(self._ehlo_lines(session)))
+
+    async def _smtp_helo(self, session, reader, writer, verb, argument) -> None:
+        if self.lmtp:
+            await self._reply(writer, verb, 500, f"Command not recognized: {verb}")
+            return
+        session.reset()
+        session.greeted = True
+        await self._respond(writer, verb, argument, 250, self.hostname)
+
+    async def _smtp_mail(self, session, reader, writer, verb, argument) -> None:
+        match = _PATH_PATTERN.match(argument)
+        if match is None:
+            await self._reply(writer, verb, 501, "Syntax: MAIL FROM:<address>")
+            return
+        if session.mail_from is not None:
+            await self._reply(writer, verb, 503, "Error: nested MAIL command")
+            return
+        if self.credentials is not None and not session.authenticated:
+            await self._reply(writer, verb, 530, "Authentication required")
+            return
+        options = tuple(match.group(2).split())
+        for option in options:
+            key, _, value = option.partition("=")
+            if key.upper() == "SIZE" and value.isdigit() and int(value) > self.max_size:
+                await self._reply(writer, verb, 552, "Error: message size exceeds fixed maximum message size")
+                return
+        if await self._respond(writer, verb, argument, 250, "OK") is None:
+            session.mail_from = match.group(1)
+            session.mail_options = options
+
+    async def _smtp_rcpt(self, session, reader, writer, verb, argument) -> None:
+        match = _PATH_PATTERN.match(argument)
+        if session.mail_from is None:
+            await self._reply(writer, verb, 503, "Error: need MAIL command")
+            return
+        if match is None:
+            await self._reply(writer, verb, 501, "Syntax: RCPT TO:<address>")
+            return
+        if self.max_recipients and len(session.rcpt_tos) >= self.max_recipients:
+            await self._reply(writer, verb, 452, "4.5.3 Too many recipients")
+            return
+        if await self._respond(writer, verb, match.group(1), 250, "OK") is None:
+            session.rcpt_tos.append(match.group(1))
+
+    async def _smtp_data(self, session, reader, writer, verb, argument) -> None:
+        if not session.rcpt_tos:
+            await self._reply(writer, verb, 503, "Error: need RCPT command")
+            return
+        if "BODY=BINARYMIME" in (option.upper() for option in session.mail_options):
+            await self._reply(writer, verb, 503, "Error: BINARYMIME content must be sent with BDAT")
+            return
+        await self._reply(writer, verb, 354, "End data with <CR><LF>.<CR><LF>")
+        try:
+            # The CRLF preceding the terminating `.` belongs to the final line of the message.
+            content = (await reader.readuntil(_DATA_TERMINATOR))[:-3]
+        except asyncio.LimitOverrunError as exc:
+            await self._discard_data(reader, exc.consumed)
+            await self._refuse_oversized(session, writer, verb)
+            return
+        if content.startswith(b".."):
+            content = content[1:]
+        await self._deliver(session, writer, verb, argument, content.replace(b"\r\n..", b"\r\n."))
+
+    async def _smtp_bdat(self, session, reader, writer, verb, argument) -> None:
+        size, _, last = argument.partition(" ")
+        if "CHUNKING" not in self.extensions or not size.isdigit():
+            await self._reply(writer, verb, 501, "Syntax: BDAT <size> [LAST]")
+            return
+        chunk = await reader.readexactly(int(size))  # The chunk must always be consumed, even on failure.
+        if not session.rcpt_tos:
+            await self._reply(writer, verb, 503, "Error: need RCPT command")
+            return
+        session.chunks.append(chunk)
+        if last.strip().upper() != "LAST":
+            injected = self._injected(verb, argument)
+            if injected is not None:
+                session.reset()
+            await self._reply(writer, verb, *(injected or (250, f"{len(chunk)} octets received")))
+            return
+        await self._deliver(session, writer, verb, argument, b"".join(session.chunks))
+
+    @staticmethod
+    async def _discard_data(reader: asyncio.StreamReader, consumed: int) -> None:
+        """
+        Discard a message too large for the stream limit, up to and including the terminating `.` line.
+        `consumed` is the number of buffered bytes that can be dropped, as reported by `LimitOverrunError`.
+        """
+        while True:
+            await reader.readexactly(consumed)
+            try:
+                await reader.readuntil(_DATA_TERMINATOR)
+                return
+            except asyncio.LimitOverrunError as exc:
+                consumed = exc.consumed
+
+    async def _refuse_oversized(self, session, writer, verb) -> None:
+        # LMTP replies once per recipient, SMTP once per message.
+        replies = len(session.rcpt_tos) if self.lmtp else 1
+        session.reset()
+        for _ in range(replies):
+            await self._reply(writer, verb, 552, "Error: message size exceeds fixed maximum message size")
+
+    async def _deliver(self, session, writer, verb, argument, content: bytes) -> None:
+        if len(content) > self.max_size:
+            await self._refuse_oversized(session, writer, verb)
+            return
+        if self.lmtp:
+            injected = [self._injected(verb, address) for address in session.rcpt_tos]
+            delivered = tuple(address for address, reply in zip(session.rcpt_tos, injected) if reply is None)
+        else:
+            injected = [self._injected(verb, argument)]
+            delivered = tuple(session.rcpt_tos) if injected[0] is None else ()
+        if delivered:
+            # Tally before replying so that clients observe the message as soon as it is acknowledged.
+            self.message_count += 1
+            self.recipient_count += len(delivered)
+            self.byte_count += len(content)
+            if self.keep_messages:
+                self.messages.append(SinkMessage(session.mail_from or "", delivered, content, session.mail_options))
+        session.reset()
+        for reply in injected:
+            await self._reply(writer, verb, *(reply or (250, f"OK: queued as {self.message_count:X}")))
+
+    async def _smtp_rset(self, session, reader, writer, verb, argument) -> None:
+        session.reset()
+        await self._respond(writer, verb, argument, 250, "OK")
+
+    async def _smtp_noop(self, session, reader, writer, verb, argument) -> None:
+        await self._respond(writer, verb, argument, 250, "OK")
+
+    async def _smtp_vrfy(self, session, reader, writer, verb, argument) -> None:
+        await self._respond(writer, verb, argument, 252, "Cannot VRFY user")
+
+    async def _smtp_starttls(self, session, reader, writer, verb, argument) -> None:
+        if self.tls_context is None or session.encrypted:
+            await self._reply(writer, verb, 503, "Error: TLS not available")
+            return
+        if not hasattr(writer, "start_tls"):
+            await self._reply(writer, verb, 454, "TLS not available due to temporary reason")
+            return
+        if await self._respond(writer, verb, argument, 220, "Ready to start TLS") is None:
+            await writer.start_tls(self.tls_context)
+            # RFC-3207 4.2, the client must discard any knowledge obtained prior to the handshake.
+            session.reset()
+            session.greeted = session.authenticated = False
+            session.encrypted = True
+
+    @staticmethod
+    async def _challenge(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, challenge: str) -> str:
+        writer.write(f"334 {base64.b64encode(challenge.encode()).decode()}\r\n".encode("ascii"))
+        await writer.drain()
+        line = (await reader.readline()).strip()
+        if line == b"*":
+            raise ValueError("authentication cancelled")
+        return base64.b64decode(line, validate=True).decode("utf-8")
+
+    async def _smtp_auth(self, session, reader, writer, verb, argument) -> None:
+        if self.credentials is None:
+            await self._reply(writer, verb, 502, "Error: AUTH not supported")
+            return
+        if session.authenticated:
+            await self._reply(writer, verb, 503, "Error: already authenticated")
+            return
+        mechanism, _, initial = argument.partition(" ")
+        mechanism = mechanism.upper()
+        try:
+            response = base64.b64decode(initial, validate=True).decode("utf-8") if initial else None
+            if mechanism == "PLAIN":
+                _, username, secret = (response or await self._challenge(reader, writer, "")).split("\0")
+            elif mechanism == "LOGIN":
+                username = response or await self._challenge(reader, writer, "Username:")
+                secret = await self._challenge(reader, writer, "Password:")
+            elif mechanism == "XOAUTH2":
+                fields = dict(
+                    field.split("=", 1)
+                    for field in (response or await self._challenge(reader, writer, "")).split("\1")
+                    if field
+                )
+                username, secret = fields["user"], fields["auth"].partition("Bearer ")[2]
+            else:
+                await self._reply(writer, verb, 504, f"Unrecognized authentication type: {mechanism}")
+                return
+        except (ValueError, KeyError, binascii.Error):
+            await self._reply(writer, verb, 501, "Syntax error in authentication exchange")
+            return
+        if self.credentials.get(username) != secret:
+            if mechanism == "XOAUTH2":
+                await self._challenge(reader, writer, '{"status":"401","schemes":"bearer"}')
+            await self._reply(writer, verb, 535, "Authentication credentials invalid")
+            return
+        if await self._respond(writer, verb, argument, 235, "Authentication successful") is None:
+            session.authenticated = True
+            self.auth_count += 1
+
+    _handlers: typing.Dict[str, typing.Callable[..., typing.Awaitable[None]]] = {
+        "EHLO": _smtp_ehlo,
+        "HELO": _smtp_helo,
+        "LHLO": _smtp_ehlo,
+        "MAIL": _smtp_mail,
+        "RCPT": _smtp_rcpt,
+        "DATA": _smtp_data,
+        "BDAT": _smtp_bdat,
+        "RSET": _smtp_rset,
+        "NOOP": _smtp_noop,
+        "VRFY": _smtp_vrfy,
+        "STARTTLS": _smtp_starttls,
+        "AUTH": _smtp_auth,
+    }
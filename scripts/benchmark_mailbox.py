@@ -0,0 +1,86 @@
+"""
+Benchmark the dry-run mailbox writers against writing (and syncing) one message at a time.
+
+    python scripts/benchmark_mailbox.py --count 2000
+
+Each approach renders the same emails and makes every message durable, the timings include rendering.
+Rendering in a process pool is timed too: the built `Email` objects have to be pickled to the workers,
+which is why `write_messages` renders in the calling process.
+"""
+
+import argparse
+import concurrent.futures
+import os
+import tempfile
+import time
+import typing
+
+from mailie import Email
+from mailie import write_messages
+from mailie._mailbox import render_message
+
+
+def _emails(count: int) -> typing.List[Email]:
+    return [
+        Email(
+            mail_from="news@bar.com",
+            rcpt_to=f"user{index}@qux.com",
+            subject=f"Newsletter #{index}",
+            text="Plain text body.\n" * 50,
+            html="<p>Html body.</p>" * 50,
+        )
+        for index in range(count)
+    ]
+
+
+def _one_at_a_time(emails: typing.List[Email], path: str) -> None:
+    for sub_directory in ("tmp", "new", "cur"):
+        os.makedirs(os.path.join(path, sub_directory))
+    for index, email in enumerate(emails):
+        _, data = render_message(email)
+        tmp, new = os.path.join(path, "tmp", str(index)), os.path.join(path, "new", str(index))
+        with open(tmp, "xb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.rename(tmp, new)
+        descriptor = os.open(os.path.join(path, "new"), os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+
+def _render_in_processes(emails: typing.List[Email], _: str) -> None:
+    workers = os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        list(pool.map(render_message, emails, chunksize=max(1, len(emails) // (workers * 4))))
+
+
+def _render_serially(emails: typing.List[Email], _: str) -> None:
+    list(map(render_message, emails))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="The number of emails to write.")
+    parser.add_argument("--dir", default=None, help="Where to write, defaults to a temporary directory.")
+    arguments = parser.parse_args()
+    emails = _emails(arguments.count)
+    runs: typing.Dict[str, typing.Callable[[typing.List[Email], str], typing.Any]] = {
+        "one message at a time (maildir)": _one_at_a_time,
+        "write_messages (maildir)": lambda batch, path: write_messages(batch, f"maildir:{path}"),
+        "write_messages (mbox)": lambda batch, path: write_messages(batch, f"mbox:{path}.mbox"),
+        "render only, serially": _render_serially,
+        f"render only, {os.cpu_count() or 1} process(es)": _render_in_processes,
+    }
+    with tempfile.TemporaryDirectory(dir=arguments.dir) as directory:
+        for index, (name, run) in enumerate(runs.items()):
+            started = time.perf_counter()
+            run(emails, os.path.join(directory, str(index)))
+            elapsed = time.perf_counter() - started
+            print(f"{name:<36} {elapsed:8.3f}s {arguments.count / elapsed:10.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
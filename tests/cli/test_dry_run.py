@@ -0,0 +1,18 @@
+def test_dry_run_to_maildir(run_mailie, tmp_path):
+    out = f"maildir:{tmp_path / 'maildir'}"
+    result = run_mailie(cmds=["mail", "-f", "a@b.com", "-t", "c@d.com", "-m", "bar", "--dry-run", "--out", out])
+    assert result.exit_code == 0
+    assert len(list((tmp_path / "maildir" / "new").iterdir())) == 1
+
+
+def test_dry_run_requires_out(run_mailie):
+    result = run_mailie(cmds=["mail", "-f", "a@b.com", "-t", "c@d.com", "--dry-run"])
+    assert result.exit_code != 0
+
+
+def test_profile(run_mailie, tmp_path):
+    dump = tmp_path / "mail.prof"
+    result = run_mailie(cmds=["mail", "-f", "a@b.com", "-t", "c@d.com", "-m", "bar", "--profile", str(dump)])
+    assert result.exit_code == 0
+    assert "category" in result.output
+    assert dump.exists()
@@ -1,12 +1,9 @@
-import time
-
 import pytest
-from server import BackgroundSMTPServer
+
+from mailie.testing import SMTPSinkServer
 
 
 @pytest.fixture(scope="function")
-def integration_mail_server(request):
-    server = BackgroundSMTPServer()
-    server.start()
-    request.addfinalizer(server.close)
-    time.sleep(3)  # Todo: Wait for server to be ready!
+def integration_mail_server():
+    with SMTPSinkServer(keep_messages=True) as server:
+        yield server
@@ -0,0 +1,137 @@
+import http.server
+import json
+import smtplib
+import threading
+import time
+import urllib.parse
+
+import pytest
+
+from mailie import AccessToken
+from mailie import AuthenticationException
+from mailie import Email
+from mailie import LoginAuth
+from mailie import OAuth2Auth
+from mailie import OAuth2TokenProvider
+from mailie import PlainAuth
+from mailie import SyncClient
+from mailie import TokenProvider
+from mailie.testing import SMTPSinkServer
+
+
+class _TokenEndpoint(http.server.BaseHTTPRequestHandler):
+    issued = []
+    expires_in = 3600
+
+    def do_POST(self):
+        form = urllib.parse.parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        token = f"token-{len(self.issued)}"
+        self.issued.append((form["grant_type"][0], token))
+        body = json.dumps({"access_token": token, "expires_in": self.expires_in}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def token_endpoint():
+    _TokenEndpoint.issued = []
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _TokenEndpoint)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/token"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mail():
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="hi")
+
+
+@pytest.mark.parametrize("scheme", [PlainAuth, LoginAuth])
+def test_password_auth(scheme, mail) -> None:
+    with SMTPSinkServer(credentials={"foo": "secret"}) as sink:
+        with SyncClient(host=sink.host, port=sink.port, auth=scheme("foo", "secret")) as client:
+            client.send(email=mail)
+            client.send(email=mail)
+        assert sink.message_count == 2
+        assert sink.auth_count == 1
+
+
+def test_rejected_credentials(mail) -> None:
+    with SMTPSinkServer(credentials={"foo": "secret"}) as sink:
+        with SyncClient(host=sink.host, port=sink.port, auth=PlainAuth("foo", "wrong")) as client:
+            with pytest.raises(smtplib.SMTPAuthenticationError):
+                client.send(email=mail)
+
+
+def test_oauth2_tokens_are_cached_per_account(token_endpoint, mail) -> None:
+    provider = OAuth2TokenProvider(token_endpoint, "client-id", refresh_tokens={"foo": "refresh"})
+    with SMTPSinkServer(credentials={"foo": "token-0"}) as sink:
+        for _ in range(3):
+            with SyncClient(host=sink.host, port=sink.port, auth=OAuth2Auth("foo", provider)) as client:
+                client.send(email=mail)
+        assert sink.message_count == 3
+    assert _TokenEndpoint.issued == [("refresh_token", "token-0")]
+
+
+def test_oauth2_rejected_token_is_evicted(token_endpoint, mail) -> None:
+    provider = OAuth2TokenProvider(token_endpoint, "client-id")
+    with SMTPSinkServer(credentials={"foo": "token-1"}) as sink:
+        with SyncClient(host=sink.host, port=sink.port, auth=OAuth2Auth("foo", provider)) as client:
+            with pytest.raises(smtplib.SMTPAuthenticationError):
+                client.send(email=mail)
+        with SyncClient(host=sink.host, port=sink.port, auth=OAuth2Auth("foo", provider)) as client:
+            client.send(email=mail)
+    assert [grant for grant, _ in _TokenEndpoint.issued] == ["client_credentials"] * 2
+
+
+def test_tokens_refreshed_ahead_of_expiry(token_endpoint) -> None:
+    _TokenEndpoint.expires_in = 30
+    try:
+        provider = OAuth2TokenProvider(token_endpoint, "client-id", refresh_ahead=10)
+        assert provider.token("foo") == "token-0"
+        provider._refresh_at["foo"] = 0.0
+        # The token is inside the refresh window; it is still served while a replacement is fetched.
+        assert provider.token("foo") == "token-0"
+        deadline = time.monotonic() + 5
+        while provider.fetch_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert provider.fetch_count == 2
+    finally:
+        _TokenEndpoint.expires_in = 3600
+
+
+def test_token_endpoint_failure() -> None:
+    provider = OAuth2TokenProvider("http://127.0.0.1:1/token", "client-id", timeout=1)
+    with pytest.raises(AuthenticationException):
+        provider.token("foo")
+
+
+def test_expired_tokens_are_fetched_synchronously() -> None:
+    class CountingProvider(TokenProvider):
+        def fetch(self, account):
+            return AccessToken(f"{account}-{self.fetch_count}", time.monotonic() - 1)
+
+    provider = CountingProvider()
+    assert provider.token("foo") == "foo-0"
+    assert provider.token("foo") == "foo-1"
+
+
+def test_short_lived_tokens_are_refreshed_once_per_window() -> None:
+    class ShortLivedProvider(TokenProvider):
+        def fetch(self, account):
+            return AccessToken(f"{account}-{self.fetch_count}", time.monotonic() + 60)
+
+    # The token lives for less than `refresh_ahead`, it is refreshed half way through its lifetime.
+    provider = ShortLivedProvider(refresh_ahead=3600)
+    for _ in range(100):
+        assert provider.token("foo") == "foo-0"
+    assert provider.fetch_count == 1
+    assert provider._refresh_at["foo"] == pytest.approx(time.monotonic() + 30, abs=1)
@@ -0,0 +1,70 @@
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import SyncClient
+from mailie.testing import DEFAULT_EXTENSIONS
+from mailie.testing import SMTPSinkServer
+
+RECIPIENTS = [f"user{index}@bar.com" for index in range(7)]
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to=RECIPIENTS, text="hi")
+
+
+def _delivered(sink) -> list:
+    return [address for message in sink.messages for address in message.rcpt_tos]
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_explicit_batch_size(raw) -> None:
+    email = _email()
+    if raw:
+        email = Email.from_bytes(bytes(email), headers_only=True, mail_from="foo@bar.com", rcpt_to=RECIPIENTS)
+    with SMTPSinkServer(keep_messages=True) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            response = client.send(email=email, batch_size=3)
+    assert sink.message_count == 3
+    assert [len(message.rcpt_tos) for message in sink.messages] == [3, 3, 1]
+    assert _delivered(sink) == RECIPIENTS
+    assert response.result == {} and set(response.recipients) == set(RECIPIENTS)
+    assert [reply[1] for reply in response.transactions] == [b"OK: queued as %d" % n for n in (1, 2, 3)]
+    assert response.reply == response.transactions[-1] and response.queue_id == "3"
+
+
+def test_limit_is_learnt_from_deferrals() -> None:
+    with SMTPSinkServer(keep_messages=True, max_recipients=3) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            assert client.send(email=_email()).result == {}
+            assert client.max_recipients == 3
+            assert [len(message.rcpt_tos) for message in sink.messages] == [3, 3, 1]
+            sink.reset()
+            # Further sends are batched upfront, no recipient is deferred.
+            response = client.send(email=_email())
+    assert sink.message_count == 3 and _delivered(sink) == RECIPIENTS
+    assert all(code == 250 for code, _ in response.recipients.values())
+
+
+def test_advertised_limit() -> None:
+    with SMTPSinkServer(keep_messages=True, max_recipients=4, extensions=(*DEFAULT_EXTENSIONS, "LIMITS")) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            response = client.send(email=_email())
+            assert client.max_recipients is None
+    assert [len(message.rcpt_tos) for message in sink.messages] == [4, 3]
+    assert all(code == 250 for code, _ in response.recipients.values())
+
+
+def test_refusals_are_merged_across_batches() -> None:
+    refuse = {"user1@bar.com", "user5@bar.com", "user6@bar.com"}
+    rcpt = {"RCPT": lambda address: (550, "no such user") if address in refuse else None}
+    with SMTPSinkServer(keep_messages=True, responses=rcpt) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            response = client.send(email=_email(), batch_size=2)
+            assert set(response.result) == refuse
+            # A batch refused entirely is not fatal, unless every batch is.
+            with pytest.raises(smtplib.SMTPRecipientsRefused) as exc:
+                client.send(email=Email(mail_from="foo@bar.com", rcpt_to=sorted(refuse), text="hi"), batch_size=2)
+    assert set(exc.value.recipients) == refuse
+    assert len(response.transactions) == 3 and sink.message_count == 3
@@ -0,0 +1,87 @@
+import email
+import pathlib
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import SyncClient
+from mailie import _client
+from mailie._encoding import flatten_binary
+from mailie.testing import SMTPSinkServer
+
+
+@pytest.fixture
+def binary_sink():
+    extensions = ("PIPELINING", "SIZE", "8BITMIME", "CHUNKING", "BINARYMIME")
+    with SMTPSinkServer(extensions=extensions, keep_messages=True) as sink:
+        yield sink
+
+
+@pytest.fixture
+def attachment_mail(png_path):
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="see attached", attachments=png_path)
+
+
+def test_attachments_sent_as_binary_via_bdat(binary_sink, attachment_mail, png_path) -> None:
+    client = SyncClient(host=binary_sink.host, port=binary_sink.port, chunk_size=4096)
+    client.send(email=attachment_mail)
+    message = binary_sink.messages[0]
+    assert "BODY=BINARYMIME" in message.mail_options
+    assert b"Content-Transfer-Encoding: binary" in message.data
+    parsed = email.message_from_bytes(message.data)
+    attachment = [part for part in parsed.walk() if part.get_content_type() == "image/png"][0]
+    assert attachment.get_payload(decode=True) == pathlib.Path(png_path).read_bytes()
+
+
+def test_binary_transfer_is_smaller_than_base64(binary_sink, attachment_mail) -> None:
+    SyncClient(host=binary_sink.host, port=binary_sink.port).send(email=attachment_mail)
+    SyncClient(host=binary_sink.host, port=binary_sink.port, binary_transfer=False).send(email=attachment_mail)
+    binary, base64 = binary_sink.messages
+    assert "BODY=BINARYMIME" not in base64.mail_options
+    assert len(binary.data) < len(base64.data) * 0.8
+
+
+def test_data_used_without_binarymime(attachment_mail) -> None:
+    with SMTPSinkServer(keep_messages=True) as sink:
+        SyncClient(host=sink.host, port=sink.port).send(email=attachment_mail)
+    assert b"Content-Transfer-Encoding: base64" in sink.messages[0].data
+
+
+def test_binary_content_is_encoded_once_for_every_batch(binary_sink, png_path, monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(
+        _client, "flatten_binary", lambda *args, **kwargs: calls.append(args) or flatten_binary(*args, **kwargs)
+    )
+    recipients = ["a@qux.com", "b@qux.com", "c@qux.com"]
+    mail = Email(mail_from="foo@bar.com", rcpt_to=recipients, text="see attached", attachments=png_path)
+    SyncClient(host=binary_sink.host, port=binary_sink.port).send(email=mail, batch_size=1)
+    assert len(calls) == 1
+    assert binary_sink.message_count == 3
+    assert len({message.data for message in binary_sink.messages}) == 1
+
+
+def test_refused_chunk_leaves_the_session_in_sync(attachment_mail) -> None:
+    chunks = []
+
+    def refuse_second_chunk(argument):
+        chunks.append(argument)
+        return (554, "chunk refused") if len(chunks) == 2 else None
+
+    extensions = ("PIPELINING", "SIZE", "8BITMIME", "CHUNKING", "BINARYMIME")
+    with SMTPSinkServer(extensions=extensions, keep_messages=True, responses={"BDAT": refuse_second_chunk}) as sink:
+        with SyncClient(host=sink.host, port=sink.port, chunk_size=1024) as client:
+            with pytest.raises(smtplib.SMTPDataError) as exc:
+                client.send(email=attachment_mail)
+            assert exc.value.smtp_code == 554
+            # The replies to the chunks pipelined after the refusal were consumed, the next send succeeds.
+            assert client.send(email=attachment_mail).result == {}
+    assert sink.message_count == 1
+
+
+def test_binary_flattening_leaves_the_email_untouched(attachment_mail, png_path) -> None:
+    message = attachment_mail.email_message
+    before = message.as_bytes()
+    content = flatten_binary(message, message.policy)
+    assert message.as_bytes() == before
+    assert pathlib.Path(png_path).read_bytes() in content and b"Content-Transfer-Encoding: binary" in content
@@ -0,0 +1,87 @@
+import pytest
+
+from mailie import Campaign
+from mailie import CampaignLog
+from mailie import CampaignResult
+from mailie import Email
+from mailie import FileSource
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+
+class Crash(Exception):
+    pass
+
+
+def _render(address):
+    return Email(mail_from="news@bar.com", rcpt_to=address, text=f"Hello {address}")
+
+
+@pytest.fixture
+def sink():
+    refuse = {"RCPT": lambda argument: (550, "No such user") if "bounce" in argument else None}
+    with SMTPSinkServer(keep_messages=True, responses=refuse) as server:
+        yield server
+
+
+@pytest.fixture
+def recipients(tmp_path):
+    path = tmp_path / "recipients.txt"
+    path.write_text("# header\n" + "".join(f"user{i}@qux.com\n" for i in range(10)) + "bounce@qux.com\n")
+    return path
+
+
+def test_campaign_resumes_after_crash(sink, recipients, tmp_path) -> None:
+    log = tmp_path / "campaign.log"
+
+    def crashing_render(address):
+        if address == "user6@qux.com":
+            raise Crash
+        return _render(address)
+
+    with SyncClient(host=sink.host, port=sink.port) as client:
+        with Campaign(client, crashing_render, FileSource(recipients), log, fsync_every=1) as campaign:
+            with pytest.raises(Crash):
+                campaign.run()
+    assert sink.message_count == 6
+
+    with SyncClient(host=sink.host, port=sink.port) as client:
+        with Campaign(client, _render, FileSource(recipients), log) as campaign:
+            result = campaign.run()
+            assert campaign.status("user0@qux.com") == "sent"
+            assert campaign.status("bounce@qux.com") == "refused"
+    assert (result.sent, result.refused) == (4, 1)
+    delivered = [message.rcpt_tos[0] for message in sink.messages]
+    assert delivered == [f"user{i}@qux.com" for i in range(10)]
+
+
+def test_torn_log_record_is_discarded(tmp_path) -> None:
+    log = tmp_path / "campaign.log"
+    log.write_bytes(b"1\tsent\t250\ta@b.com\n2\tsent\t250\tc@d")
+    with CampaignLog(log) as campaign_log:
+        assert campaign_log.cursor == 1
+        assert "a@b.com" in campaign_log and "c@d" not in campaign_log
+    assert log.read_bytes() == b"1\tsent\t250\ta@b.com\n"
+
+
+def test_duplicates_and_limits(sink, tmp_path) -> None:
+    addresses = ["a@qux.com", "b@qux.com", "a@qux.com", "c@qux.com"]
+    with SyncClient(host=sink.host, port=sink.port) as client:
+        with Campaign(client, _render, addresses, tmp_path / "campaign.log") as campaign:
+            assert campaign.run(limit=1).sent == 1
+            result = campaign.run()
+    assert (result.sent, result.skipped) == (2, 1)
+    assert sink.message_count == 3
+
+
+def test_invalid_addresses_are_recorded(sink, tmp_path) -> None:
+    log = tmp_path / "campaign.log"
+    addresses = ["a@qux.com", "not an address", "b@qux.com"]
+    with SyncClient(host=sink.host, port=sink.port) as client:
+        with Campaign(client, _render, addresses, log) as campaign:
+            result = campaign.run()
+            assert campaign.status("not an address") == "refused"
+        with Campaign(client, _render, addresses, log) as campaign:
+            assert campaign.run() == CampaignResult()
+    assert (result.sent, result.refused) == (2, 1)
+    assert sink.message_count == 2
@@ -0,0 +1,62 @@
+import pytest
+
+from mailie import CapabilityCache
+from mailie import Email
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+
+@pytest.fixture
+def greetings():
+    return []
+
+
+@pytest.fixture
+def counting_sink(greetings):
+    with SMTPSinkServer(responses={"EHLO": greetings.append}) as sink:
+        yield sink
+
+
+def test_smtp_options_only_greets_once(counting_sink, greetings) -> None:
+    cache = CapabilityCache()
+    with SyncClient(host=counting_sink.host, port=counting_sink.port, capability_cache=cache) as client:
+        assert client.capabilities is None
+        first = client.smtp_options()
+        assert client.smtp_options() == first
+        client.send(email=Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="hi"))
+        assert len(greetings) == 1
+        client.smtp_options(refresh=True)
+        assert len(greetings) == 2
+    assert client.capabilities.supports("PIPELINING")
+    assert client.capabilities.max_size == counting_sink.max_size
+
+
+def test_capabilities_shared_across_clients(counting_sink) -> None:
+    cache = CapabilityCache()
+    with SyncClient(host=counting_sink.host, port=counting_sink.port, capability_cache=cache) as client:
+        client.send(email=Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="hi"))
+    other = SyncClient(host=counting_sink.host, port=counting_sink.port, capability_cache=cache)
+    assert other.capabilities is client.capabilities
+
+
+def test_cache_expiry_and_probe(counting_sink, greetings) -> None:
+    cache = CapabilityCache(ttl=0)
+    probed = cache.lookup(counting_sink.host, counting_sink.port)
+    assert probed.supports("chunking") and probed.does_esmtp
+    assert cache.get(counting_sink.host, counting_sink.port) is None
+    cache.ttl = 60
+    assert cache.lookup(counting_sink.host.upper(), counting_sink.port) is probed
+    assert len(greetings) == 1
+    cache.invalidate(counting_sink.host, counting_sink.port)
+    assert len(cache) == 0
+
+
+def test_invalidate_every_port_of_a_host() -> None:
+    cache = CapabilityCache()
+    for host, port in (("mx.example.com", 25), ("MX.example.com", 587), ("other.example.com", 25)):
+        cache.put(host, port, {"size": "1024"})
+    cache.invalidate("mx.example.com")
+    assert cache.get("mx.example.com", 25) is None and cache.get("mx.example.com", 587) is None
+    assert cache.get("other.example.com", 25) is not None
+    cache.invalidate()
+    assert len(cache) == 0
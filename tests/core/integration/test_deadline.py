@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from mailie import Deadline
+from mailie import DeadlineExceededException
+from mailie import Email
+from mailie import SyncClient
+from mailie._deadline import bounded_timeout
+from mailie.testing import SMTPSinkServer
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@bar.com", text="hi")
+
+
+def _slow(seconds: float, times: int = 1):
+    remaining = [times]
+
+    def reply(argument):
+        if remaining[0]:
+            remaining[0] -= 1
+            time.sleep(seconds)
+
+    return reply
+
+
+def test_deadline_bounds_the_sum_of_operations() -> None:
+    slow = {verb: _slow(0.15, times=2) for verb in ("EHLO", "MAIL", "RCPT")}
+    with SMTPSinkServer(responses=slow) as sink:
+        with SyncClient(host=sink.host, port=sink.port, timeout=0.5) as client:
+            # No single operation exceeds the timeout, only their total exceeds the deadline.
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceededException):
+                client.send(email=_email(), deadline=0.3)
+            assert time.monotonic() - started < 0.45
+        with SyncClient(host=sink.host, port=sink.port, timeout=0.5) as client:
+            assert client.send(email=_email()).result == {}
+
+
+def test_next_send_reconnects_after_cancellation() -> None:
+    with SMTPSinkServer(responses={"DATA": _slow(0.3)}, keep_messages=True) as sink:
+        with SyncClient(host=sink.host, port=sink.port, deadline=0.1) as client:
+            with pytest.raises(DeadlineExceededException):
+                client.send(email=_email())
+            time.sleep(0.3)
+            assert client.send(email=_email()).queue_id is not None
+            assert client.send(email=_email()).result == {}
+        # The server stored the first message, the client gave up waiting for its reply.
+        assert sink.message_count == 3
+
+
+def test_bounded_timeout() -> None:
+    assert bounded_timeout(10.0) == 10.0
+    with Deadline(0.5):
+        assert 0 < bounded_timeout(10.0) <= 0.5
+        assert bounded_timeout(0.1) == 0.1
+    with Deadline(0.01) as deadline:
+        time.sleep(0.02)
+        assert deadline.expired and deadline.remaining() == 0
+        with pytest.raises(DeadlineExceededException):
+            bounded_timeout(10.0)
@@ -0,0 +1,107 @@
+import smtplib
+import threading
+import time
+
+import pytest
+
+from mailie import Email
+from mailie import MetricsRegistry
+from mailie import SyncClient
+from mailie import ThreadedHookDispatcher
+from mailie.testing import SMTPSinkServer
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to=["a@bar.com", "b@bar.com"], text="hi")
+
+
+def _recording_hooks(calls):
+    return {
+        "pre": lambda email: calls.append(("pre", email.mail_from)),
+        "recipient": lambda address, reply: calls.append(("recipient", address, reply[0])),
+        "post": lambda response: calls.append(("post", response.queue_id)),
+        "error": lambda email, exc: calls.append(("error", type(exc).__name__)),
+    }
+
+
+def test_hooks_are_called_inline() -> None:
+    calls = []
+    rcpt = {"RCPT": lambda address: (550, "no such user") if address == "b@bar.com" else None}
+    with SMTPSinkServer(responses=rcpt) as sink:
+        with SyncClient(host=sink.host, port=sink.port, hooks=_recording_hooks(calls)) as client:
+            client.send(email=_email())
+            assert calls == [
+                ("pre", "foo@bar.com"),
+                ("recipient", "a@bar.com", 250),
+                ("recipient", "b@bar.com", 550),
+                ("post", "1"),
+            ]
+            calls.clear()
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                client.send(email=_email(), to_addrs=["b@bar.com"])
+    assert calls == [("pre", "foo@bar.com"), ("recipient", "b@bar.com", 550), ("error", "SMTPRecipientsRefused")]
+
+
+def test_failing_error_hook_does_not_mask_the_send_exception(caplog) -> None:
+    def error(email, exc):
+        raise RuntimeError("audit log unavailable")
+
+    with SMTPSinkServer(responses={"RCPT": (550, "no such user")}) as sink:
+        with SyncClient(host=sink.host, port=sink.port, hooks={"error": error}) as client:
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                client.send(email=_email())
+    assert "audit log unavailable" in caplog.text
+
+
+def test_unknown_hooks_are_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown hooks: after"):
+        SyncClient(hooks={"after": print})
+
+
+def test_slow_hooks_do_not_delay_sends() -> None:
+    calls, release = [], threading.Event()
+
+    def audit(response):
+        release.wait(5)
+        calls.append(response.queue_id)
+
+    with ThreadedHookDispatcher(metrics=MetricsRegistry()) as dispatcher, SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port, hooks={"post": audit}, hook_dispatcher=dispatcher) as client:
+            started = time.monotonic()
+            for _ in range(3):
+                client.send(email=_email())
+            assert time.monotonic() - started < 1 and calls == []
+        assert not dispatcher.flush(timeout=0.05)
+        release.set()
+        assert dispatcher.flush(timeout=5)
+    assert calls == ["1", "2", "3"]
+
+
+@pytest.mark.parametrize("overflow, kept", [("drop_newest", [0, 1]), ("drop_oldest", [0, 4]), ("block", [0, 1])])
+def test_overflow_policies(overflow, kept) -> None:
+    calls, release, registry = [], threading.Event(), MetricsRegistry()
+
+    def hook(index):
+        release.wait(5)
+        calls.append(index)
+
+    dispatcher = ThreadedHookDispatcher(max_queued=1, overflow=overflow, block_timeout=0.05, metrics=registry)
+    dispatcher.dispatch("post", hook, 0)
+    time.sleep(0.05)  # The worker is now blocked on the first hook.
+    for index in range(1, 5):
+        dispatcher.dispatch("post", hook, index)
+    release.set()
+    dispatcher.close()
+    assert calls == kept and dispatcher.dropped == 3
+    assert registry.counter("mailie_hooks_dropped_total", "", ("hook",)).value(hook="post") == 3
+
+
+def test_block_applies_back_pressure_and_errors_are_counted() -> None:
+    registry = MetricsRegistry()
+    dispatcher = ThreadedHookDispatcher(max_queued=1, metrics=registry)
+    for _ in range(3):
+        dispatcher.dispatch("post", lambda: time.sleep(0.05))
+    dispatcher.dispatch("error", lambda: 1 / 0)
+    assert dispatcher.flush(timeout=5) and dispatcher.dropped == 0
+    dispatcher.close()
+    assert registry.counter("mailie_hook_errors_total", "", ("hook",)).value(hook="error") == 1
@@ -0,0 +1,57 @@
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+RECIPIENTS = ["a@bar.com", "b@bar.com", "c@bar.com", "d@bar.com"]
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to=RECIPIENTS, bcc=["hidden@bar.com"], text="hi\n.\nbye")
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "lmtp.sock")
+
+
+def test_per_recipient_deliveries_over_unix_socket(socket_path) -> None:
+    data = {"DATA": lambda address: (452, "4.2.2 Mailbox full") if address == "c@bar.com" else None}
+    rcpt = {"RCPT": lambda address: (550, "5.1.1 No such user") if address == "d@bar.com" else None}
+    with SMTPSinkServer(lmtp=True, path=socket_path, keep_messages=True, responses={**data, **rcpt}) as sink:
+        with SyncClient(host=socket_path, delegate_client=smtplib.LMTP) as client:
+            response = client.send(email=_email())
+    assert response.result == {"c@bar.com": (452, b"4.2.2 Mailbox full"), "d@bar.com": (550, b"5.1.1 No such user")}
+    assert response.deliveries == {
+        "a@bar.com": (250, b"OK: queued as 1"),
+        "b@bar.com": (250, b"OK: queued as 1"),
+        "c@bar.com": (452, b"4.2.2 Mailbox full"),
+    }
+    assert response.recipients["c@bar.com"][0] == 250 and response.transactions == [response.reply]
+    (message,) = sink.messages
+    assert message.rcpt_tos == ("a@bar.com", "b@bar.com")
+    assert b"\r\nhi\r\n.\r\nbye" in message.data and b"hidden@bar.com" not in message.data
+
+
+def test_batches_and_failed_deliveries() -> None:
+    refuse = {"DATA": lambda address: (550, "5.2.0 Rejected") if address in ("a@bar.com", "b@bar.com") else None}
+    with SMTPSinkServer(lmtp=True, keep_messages=True, responses=refuse) as sink:
+        with SyncClient(host=sink.host, port=sink.port, delegate_client=smtplib.LMTP) as client:
+            response = client.send(email=_email(), batch_size=2)
+            assert set(response.result) == {"a@bar.com", "b@bar.com"} and len(response.transactions) == 1
+            with pytest.raises(smtplib.SMTPRecipientsRefused) as exc:
+                client.send(email=_email(), to_addrs=["a@bar.com"])
+            assert exc.value.recipients == {"a@bar.com": (550, b"5.2.0 Rejected")}
+            # The session remains usable.
+            assert client.send(email=_email(), to_addrs=["d@bar.com"]).result == {}
+    assert [message.rcpt_tos for message in sink.messages] == [("c@bar.com", "d@bar.com"), ("d@bar.com",)]
+
+
+def test_lmtp_sink_requires_lhlo() -> None:
+    with SMTPSinkServer(lmtp=True) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            with pytest.raises(smtplib.SMTPHeloError):
+                client.send(email=_email())
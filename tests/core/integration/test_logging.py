@@ -0,0 +1,85 @@
+import json
+import logging
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import JSONFormatter
+from mailie import LogSampler
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@bar.com", text="hi")
+
+
+def test_send_events_are_structured(caplog) -> None:
+    caplog.set_level(logging.INFO, logger="mailie._client")
+    with SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port, log_sampler=LogSampler()) as client:
+            client.send(email=_email())
+    (record,) = caplog.records
+    assert record.levelno == logging.INFO and record.getMessage() == "send completed"
+    event = record.mailie
+    assert event["status"] == "sent" and event["rcpt_to"] == ["baz@bar.com"] and event["queue_id"] == "1"
+    assert event["host"] == sink.host and event["bytes"] > 0 and "send" in event["timings"]
+    document = json.loads(JSONFormatter().format(record))
+    assert document["level"] == "INFO" and document["status"] == "sent" and document["bytes"] == event["bytes"]
+
+
+def test_successes_are_sampled_failures_are_not(caplog) -> None:
+    caplog.set_level(logging.INFO, logger="mailie._client")
+    rcpt = {"RCPT": lambda address: (550, "no such user") if address.startswith("bad") else None}
+    with SMTPSinkServer(responses=rcpt) as sink:
+        with SyncClient(host=sink.host, port=sink.port, log_sampler=LogSampler(successes=5)) as client:
+            for _ in range(10):
+                client.send(email=_email())
+            for _ in range(2):
+                with pytest.raises(smtplib.SMTPRecipientsRefused):
+                    client.send(email=_email(), to_addrs=["bad@bar.com"])
+    assert [record.getMessage() for record in caplog.records] == ["send completed"] * 2 + ["send failed"] * 2
+    failed = caplog.records[-1].mailie
+    assert failed["status"] == "failed" and failed["recipients"] == {"bad@bar.com": [550, "no such user"]}
+
+
+def test_disabled_events_are_not_built(caplog, monkeypatch) -> None:
+    caplog.set_level(logging.WARNING, logger="mailie")
+    sampler = LogSampler(successes=0)
+    built = []
+    monkeypatch.setattr(SyncClient, "_log_fields", lambda *args: built.append(args))
+    with SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port, log_sampler=sampler) as client:
+            client.send(email=_email())
+    assert built == [] and caplog.records == []
+    assert not LogSampler(successes=0).sample() and LogSampler(failures=2).sample(failed=True)
+
+
+def test_email_construction_event(caplog) -> None:
+    caplog.set_level(logging.DEBUG, logger="mailie._email")
+    _email()
+    (record,) = caplog.records
+    assert record.getMessage() == "email built"
+    assert record.mailie["mail_from"] == "foo@bar.com" and record.mailie["attachments"] == []
+
+
+def test_event_fields_do_not_replace_record_fields() -> None:
+    record = logging.LogRecord("mailie._client", logging.INFO, __file__, 1, "send completed", None, None)
+    record.mailie = {"level": "DEBUG", "message": "forged", "logger": "other", "ts": 0, "status": "sent"}
+    document = json.loads(JSONFormatter().format(record))
+    assert document["level"] == "INFO" and document["message"] == "send completed"
+    assert document["logger"] == "mailie._client" and document["ts"] == round(record.created, 6)
+    assert document["status"] == "sent"
+
+
+def test_events_are_sampled_independently(caplog, monkeypatch) -> None:
+    caplog.set_level(logging.DEBUG, logger="mailie")
+    sampler = LogSampler(successes=2)
+    monkeypatch.setattr("mailie._email.log_sampler", sampler)
+    with SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port, log_sampler=sampler) as client:
+            for _ in range(4):
+                client.send(email=_email())
+    messages = [record.getMessage() for record in caplog.records if hasattr(record, "mailie")]
+    assert messages == ["email built", "send completed"] * 2
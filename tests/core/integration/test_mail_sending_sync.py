@@ -11,14 +11,25 @@ def test_email_example(integration_mail_server):
         text="plaintext content",
         html="<b> html content </b>",
     )
-    SyncClient(port=9222).send(email=mail)
+    SyncClient(host=integration_mail_server.host, port=integration_mail_server.port).send(email=mail)
+    assert integration_mail_server.message_count == 1
+    assert integration_mail_server.messages[0].rcpt_tos == ("recip@recip.com",)
 
 
 def test_email_boundaries(integration_mail_server, html_multi_attach_mail):
-    SyncClient(port=9222).send(email=html_multi_attach_mail)
+    SyncClient(host=integration_mail_server.host, port=integration_mail_server.port).send(email=html_multi_attach_mail)
+    assert integration_mail_server.message_count == 1
 
 
 def test_esmtp_options(integration_mail_server):
-    expected = {"8bitmime": "", "help": "", "size": "33554432"}
-    options = SyncClient(port=9222).smtp_options()
+    expected = {"pipelining": "", "size": "33554432", "8bitmime": "", "chunking": ""}
+    options = SyncClient(host=integration_mail_server.host, port=integration_mail_server.port).smtp_options()
     assert expected == options
+
+
+def test_non_ascii_text_sent_as_8bit(integration_mail_server):
+    mail = Email(mail_from="a@b.com", rcpt_to="c@d.com", text="Привет мир " * 30)
+    SyncClient(host=integration_mail_server.host, port=integration_mail_server.port).send(email=mail)
+    message = integration_mail_server.messages[0]
+    assert "BODY=8BITMIME" in message.mail_options
+    assert b"Content-Transfer-Encoding: 8bit" in message.data
@@ -0,0 +1,113 @@
+import smtplib
+import socket
+
+import pytest
+
+from mailie import Email
+from mailie import MetricsRegistry
+from mailie import Relay
+from mailie import RelayClient
+from mailie import RelaysUnavailableException
+from mailie.testing import SMTPSinkServer
+
+
+def _email() -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@bar.com", text="hi")
+
+
+@pytest.fixture
+def dead_relay():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return "127.0.0.1", port
+
+
+@pytest.fixture
+def sinks():
+    with SMTPSinkServer(keep_messages=True) as first, SMTPSinkServer(keep_messages=True) as second:
+        yield first, second
+
+
+def test_sends_are_spread_across_relays(sinks) -> None:
+    with RelayClient([sink.address for sink in sinks], metrics=MetricsRegistry()) as client:
+        for _ in range(10):
+            client.send(email=_email())
+        health = client.health()
+    assert sum(sink.message_count for sink in sinks) == 10
+    assert all(sink.message_count for sink in sinks)
+    assert all(relay.latency is not None and relay.outstanding == 0 for relay in health.values())
+
+
+def test_failover_and_circuit_breaker(sinks, dead_relay) -> None:
+    registry = MetricsRegistry()
+    relays, retries = [Relay(*dead_relay, weight=10), sinks[0].address], []
+    hooks = {"retry": lambda relay, exc: retries.append((relay, type(exc)))}
+    with RelayClient(relays, trip_after=2, cooldown=60, metrics=registry, hooks=hooks) as client:
+        for _ in range(5):
+            assert client.send(email=_email()).result == {}
+        dead = client.health()[f"{dead_relay[0]}:{dead_relay[1]}"]
+    assert sinks[0].message_count == 5
+    assert retries == [(relays[0], ConnectionRefusedError)] * 2
+    assert dead.state == "open" and dead.consecutive_failures == 2 and dead.error_rate > 0
+    failovers = registry.counter("mailie_relay_failovers_total", "", ("relay",))
+    assert failovers.value(relay=str(Relay(*sinks[0].address))) == 2
+    retries = registry.counter("mailie_relay_retries_total", "", ("relay", "error"))
+    assert retries.value(relay=str(relays[0]), error="ConnectionRefusedError") == 2
+    in_use = registry.gauge("mailie_pool_connections_in_use", "", ("pool",))
+    idle = registry.gauge("mailie_pool_connections_idle", "", ("pool",))
+    assert in_use.value(pool=str(Relay(*sinks[0].address))) == 0
+    assert idle.value(pool=str(Relay(*sinks[0].address))) == 0
+
+
+def test_half_open_probe_restores_relay(sinks) -> None:
+    replies = iter([(421, "busy"), (421, "busy")])
+    with SMTPSinkServer(responses={"MAIL": lambda _: next(replies, None)}) as flaky:
+        relays = [Relay(*flaky.address, weight=10), sinks[0].address]
+        with RelayClient(relays, trip_after=2, cooldown=0, metrics=MetricsRegistry()) as client:
+            for _ in range(3):
+                client.send(email=_email())
+            health = client.health()[str(Relay(*flaky.address))]
+    assert health.state == "closed" and health.consecutive_failures == 0
+    assert flaky.message_count == 1 and sinks[0].message_count == 2
+
+
+def test_permanent_rejections_are_not_failed_over(sinks) -> None:
+    with SMTPSinkServer(responses={"RCPT": (550, "no such user")}) as rejecting:
+        relays = [Relay(*rejecting.address, weight=10), sinks[0].address]
+        with RelayClient(relays, metrics=MetricsRegistry()) as client:
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                client.send(email=_email())
+            assert client.health()[str(Relay(*rejecting.address))].state == "closed"
+    assert sinks[0].message_count == 0
+
+
+def test_deferred_recipients_are_failed_over(sinks) -> None:
+    retries = []
+    with SMTPSinkServer(responses={"RCPT": (451, "try again later")}) as deferring:
+        relays = [Relay(*deferring.address, weight=10), sinks[0].address]
+        hooks = {"retry": lambda relay, exc: retries.append(type(exc))}
+        with RelayClient(relays, metrics=MetricsRegistry(), hooks=hooks) as client:
+            assert client.send(email=_email()).result == {}
+    assert retries == [smtplib.SMTPRecipientsRefused]
+    assert deferring.message_count == 0 and sinks[0].message_count == 1
+
+
+def test_every_relay_down(dead_relay) -> None:
+    with RelayClient([dead_relay], trip_after=1, metrics=MetricsRegistry()) as client:
+        with pytest.raises(RelaysUnavailableException) as exc:
+            client.send(email=_email())
+        assert isinstance(exc.value.__cause__, OSError)
+        with pytest.raises(RelaysUnavailableException, match="attempted: none"):
+            client.send(email=_email())
+
+
+def test_accepted_batches_are_not_failed_over(sinks) -> None:
+    replies = iter([None, (451, "try again later")])
+    with SMTPSinkServer(responses={"DATA": lambda _: next(replies)}, keep_messages=True) as failing:
+        relays = [Relay(*failing.address, weight=10), sinks[0].address]
+        email = Email(mail_from="foo@bar.com", rcpt_to=["one@bar.com", "two@bar.com"], text="hi")
+        with RelayClient(relays, metrics=MetricsRegistry()) as client:
+            assert client.send(email=email, batch_size=1).result == {}
+    assert [message.rcpt_tos for message in failing.messages] == [("one@bar.com",)]
+    assert [message.rcpt_tos for message in sinks[0].messages] == [("two@bar.com",)]
@@ -0,0 +1,73 @@
+import json
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import NDJSONResultSink
+from mailie import SyncClient
+from mailie._response import parse_queue_id
+from mailie.testing import SMTPSinkServer
+
+
+def _email(**kwargs) -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to=["a@bar.com", "b@bar.com"], text="hi", **kwargs)
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_every_send(tmp_path) -> None:
+    path = tmp_path / "results.ndjson"
+    refuse = {"RCPT": lambda address: (550, "no such user") if address.startswith("b@") else None}
+    with SMTPSinkServer(responses=refuse) as sink, NDJSONResultSink(path) as results:
+        with SyncClient(host=sink.host, port=sink.port, result_sink=results) as client:
+            email = _email()
+            email["Message-ID"] = "<1@bar.com>"
+            response = client.send(email=email)
+            assert response.queue_id == "1"
+            with pytest.raises(smtplib.SMTPRecipientsRefused):
+                client.send(email=_email(), to_addrs=["b@bar.com"])
+    partial, failed = _records(path)
+    assert partial["status"] == "partial"
+    assert partial["message_id"] == "<1@bar.com>"
+    assert partial["mail_from"] == "foo@bar.com"
+    assert partial["rcpt_to"] == ["a@bar.com", "b@bar.com"]
+    assert partial["recipients"] == {"a@bar.com": [250, "OK"], "b@bar.com": [550, "no such user"]}
+    assert partial["code"] == 250 and partial["queue_id"] == "1"
+    assert set(partial["timings"]) == {"greet", "send"}
+    assert failed["status"] == "failed"
+    assert failed["recipients"] == {"b@bar.com": [550, "no such user"]}
+    assert failed["error"].startswith("SMTPRecipientsRefused")
+    assert set(failed["timings"]) == {"send"}
+
+
+def test_rotation(tmp_path, integration_mail_server) -> None:
+    path = tmp_path / "results.ndjson"
+    host, port = integration_mail_server.address
+    with NDJSONResultSink(path, max_bytes=1024) as results:
+        with SyncClient(host=host, port=port, result_sink=results) as client:
+            for _ in range(20):
+                client.send(email=_email())
+    rotated = sorted(tmp_path.glob("results.ndjson.*"), key=lambda p: int(p.suffix[1:]))
+    assert rotated
+    assert all(p.stat().st_size <= 1024 for p in rotated)
+    records = [record for p in (*rotated, path) for record in _records(p)]
+    assert len(records) == 20
+    assert [record["queue_id"] for record in records] == [f"{i:X}" for i in range(1, 21)]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (b"2.0.0 Ok: queued as 4F2x1k0bXyz", "4F2x1k0bXyz"),
+        (b"OK id=1qA2B3-0001Cd-Ef", "1qA2B3-0001Cd-Ef"),
+        (b"2.0.0 3A1B2C3D4 Message accepted for delivery", "3A1B2C3D4"),
+        (b"2.0.0 OK  1700000000 a1-20020a05 - gsmtp", "a1-20020a05"),
+        (b"2.6.0 <x@y> [InternalId=1234, Hostname=EX01] Queued mail for delivery", "1234"),
+        (b"OK", None),
+    ],
+)
+def test_parse_queue_id(text, expected) -> None:
+    assert parse_queue_id(text) == expected
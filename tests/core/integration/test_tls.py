@@ -0,0 +1,143 @@
+import shutil
+import smtplib
+import socket
+import ssl
+import subprocess
+import threading
+import time
+
+import pytest
+
+from mailie import DeadlineExceededException
+from mailie import Email
+from mailie import SyncClient
+from mailie import create_resuming_context
+from mailie._exceptions import StartTLSNotSupportedException
+from mailie._tls import tls_session_key
+from mailie.testing import SMTPSinkServer
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is required to generate a throwaway certificate")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=127.0.0.1",
+            "-addext",
+            "subjectAltName=IP:127.0.0.1",
+            "-keyout",
+            str(key),
+            "-out",
+            str(cert),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+@pytest.fixture
+def server_context(certificate):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*map(str, certificate))
+    return context
+
+
+@pytest.fixture
+def mail():
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="secret")
+
+
+def _send_many(sink, context, mail, count, **kwargs):
+    for _ in range(count):
+        with SyncClient(host=sink.host, port=sink.port, ssl_context=context, **kwargs) as client:
+            client.send(email=mail)
+    return client
+
+
+@pytest.mark.skipif(not hasattr(__import__("asyncio").StreamWriter, "start_tls"), reason="requires python 3.11+")
+def test_starttls_sessions_are_resumed(server_context, certificate, mail) -> None:
+    context = create_resuming_context(cafile=str(certificate[0]))
+    with SMTPSinkServer(tls_context=server_context, keep_messages=True) as sink:
+        client = _send_many(sink, context, mail, 3, starttls=True)
+        assert sink.message_count == 3
+    assert client.tls_sessions is context.sessions
+    assert context.sessions.handshakes == 3
+    assert context.sessions.hits == 2
+    assert client.capabilities is not None and not client.capabilities.supports("starttls")
+
+
+def test_implicit_tls_sessions_are_resumed(server_context, certificate, mail) -> None:
+    context = create_resuming_context(cafile=str(certificate[0]))
+    with SMTPSinkServer(tls_context=server_context, implicit_tls=True) as sink:
+        _send_many(sink, context, mail, 3, delegate_client=smtplib.SMTP_SSL)
+        assert sink.message_count == 3
+    assert context.sessions.hit_rate == pytest.approx(2 / 3)
+
+
+def test_starttls_not_supported(mail) -> None:
+    with SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port, starttls=True) as client:
+            with pytest.raises(StartTLSNotSupportedException):
+                client.send(email=mail)
+
+
+@pytest.fixture
+def stalling_server():
+    """
+    A server that offers STARTTLS, replies 220 to it and then never starts the handshake.
+    """
+    listener = socket.create_server(("127.0.0.1", 0))
+    done = threading.Event()
+
+    def serve() -> None:
+        connection, _ = listener.accept()
+        with connection, connection.makefile("rb") as lines:
+            connection.sendall(b"220 stall ESMTP\r\n")
+            lines.readline()
+            connection.sendall(b"250-stall\r\n250 STARTTLS\r\n")
+            lines.readline()
+            connection.sendall(b"220 Ready to start TLS\r\n")
+            done.wait(5)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield listener.getsockname()
+    done.set()
+    thread.join()
+    listener.close()
+
+
+def test_starttls_handshake_is_bounded_by_the_deadline(stalling_server, mail) -> None:
+    host, port = stalling_server
+    with SyncClient(host=host, port=port, starttls=True, timeout=3, ssl_context=ssl.create_default_context()) as client:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededException):
+            client.send(email=mail, deadline=0.3)
+        assert time.monotonic() - started < 1.5
+
+
+def test_sessions_are_keyed_on_the_client_address(server_context, certificate) -> None:
+    context = create_resuming_context(cafile=str(certificate[0]))
+    client_sock, server_sock = socket.socketpair()  # A unix socket, there is no peer port.
+    accepted = []
+    server = threading.Thread(target=lambda: accepted.append(server_context.wrap_socket(server_sock, server_side=True)))
+    server.start()
+    with tls_session_key("127.0.0.1", 2525):
+        wrapped = context.wrap_socket(client_sock, server_hostname="127.0.0.1")
+    server.join()
+    wrapped.close()
+    accepted[0].close()
+    assert context.sessions.get(("127.0.0.1", 2525)) is not None and context.sessions.misses == 1
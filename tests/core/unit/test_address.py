@@ -0,0 +1,66 @@
+import pytest
+
+from mailie import Email
+from mailie import InvalidEmailAddressException
+from mailie import parse_address
+from mailie import validate_addresses
+from mailie._utility import check_is_email
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "simple@example.com",
+        "very.common+tag@example.co.uk",
+        '"quoted string"@example.com',
+        "user@[127.0.0.1]",
+        "user@[IPv6:2001:db8::1]",
+        "用户@例子.广告",
+        "user@localhost",
+        "postmaster@mailhost",
+    ],
+)
+def test_valid_addresses(address) -> None:
+    assert check_is_email(address)
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "plainaddress",
+        "@example.com",
+        "user@",
+        "user..dots@example.com",
+        ".leading@example.com",
+        "user@-example.com",
+        "user@example..com",
+        f"{'a' * 65}@example.com",
+        "user@[999.1.1.1]",
+    ],
+)
+def test_invalid_addresses(address) -> None:
+    assert not check_is_email(address)
+
+
+def test_domain_normalisation() -> None:
+    address = parse_address("Foo.Bar@ExAmple.COM")
+    assert address.local_part == "Foo.Bar"
+    assert address.domain == "example.com"
+    assert str(parse_address("user@bücher.de")) == "user@xn--bcher-kva.de"
+
+
+def test_parse_address_extracts_angle_addr() -> None:
+    assert str(parse_address("Foo Bar <foo@BAR.com>")) == "foo@bar.com"
+
+
+def test_batch_validation_preserves_order_and_dedupes() -> None:
+    result = validate_addresses(["b@x.com", "a@X.com", "bad", "b@X.COM", "c@x.com"])
+    assert result.valid == ["b@x.com", "a@x.com", "c@x.com"]
+    assert list(result.invalid) == ["bad"]
+    assert not result
+
+
+def test_email_rejects_invalid_recipients() -> None:
+    with pytest.raises(InvalidEmailAddressException) as exc:
+        Email(mail_from="foo@bar.com", rcpt_to=["ok@bar.com", "not-an-address"])
+    assert list(exc.value.invalid) == ["not-an-address"]
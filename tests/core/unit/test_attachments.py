@@ -1,8 +1,13 @@
+import io
+import pathlib
+import zipfile
+
 import pytest
 
 from mailie import Email
 from mailie import EmptyAttachmentFolderException
 from mailie import FilePathNotAttachmentException
+from mailie import ZipDirectoryStrategy
 
 
 def test_attachments_empty_directory(tmp_path) -> None:
@@ -39,3 +44,41 @@ def test_inline_attachment(png_path) -> None:
 </html>
     """,
     )
+
+
+def _report_bundle(root):
+    (root / "logs").mkdir(parents=True)
+    (root / "report.csv").write_text("date,sent,failed\n" + "2021-01-01,100,0\n" * 2000)
+    (root / "logs" / "send.log").write_text("INFO queued\n" * 2000)
+    return root
+
+
+def test_zip_directory_strategy(tmp_path) -> None:
+    bundle = _report_bundle(tmp_path / "bundle")
+    strategy = ZipDirectoryStrategy(recursive=True, compresslevel=9)
+    email = Email(mail_from="foo@bar.com", rcpt_to="hi@bye.com", attachments=bundle, attachment_strategy=strategy)
+    (attachment,) = email.attachments
+    assert attachment.name == "bundle.zip" and attachment.mime_types == ["application", "zip"]
+    with zipfile.ZipFile(io.BytesIO(attachment.data)) as archive:
+        assert archive.namelist() == ["logs/send.log", "report.csv"]
+        assert archive.read("report.csv") == (bundle / "report.csv").read_bytes()
+        total = sum(info.file_size for info in archive.infolist())
+    assert len(attachment.data) * 10 < total
+    (part,) = email.iter_attachments()
+    assert part.get_filename() == "bundle.zip"
+
+
+def test_zip_directory_strategy_options(tmp_path, png_path) -> None:
+    bundle = _report_bundle(tmp_path / "bundle")
+    (attachment,) = ZipDirectoryStrategy(compresslevel=0).generate(bundle)
+    with zipfile.ZipFile(io.BytesIO(attachment.data)) as archive:
+        assert archive.namelist() == ["report.csv"]
+    (bundle / "image.png").write_bytes(pathlib.Path(png_path).read_bytes())
+    (attachment,) = ZipDirectoryStrategy().generate(bundle)
+    with zipfile.ZipFile(io.BytesIO(attachment.data)) as archive:
+        assert archive.getinfo("image.png").compress_type == zipfile.ZIP_STORED
+    small = ZipDirectoryStrategy(threshold=1_000_000).generate([bundle, png_path])
+    assert [attachment.name for attachment in small] == ["image.png", "report.csv", "image.png"]
+    (tmp_path / "empty" / "nested").mkdir(parents=True)
+    with pytest.raises(EmptyAttachmentFolderException):
+        ZipDirectoryStrategy(recursive=True).generate(tmp_path / "empty")
@@ -0,0 +1,179 @@
+import base64
+import hashlib
+import shutil
+import subprocess
+
+import pytest
+
+from mailie import DKIMSigner
+from mailie import DKIMSigningException
+from mailie import Email
+from mailie import SyncClient
+from mailie._dkim import canonicalize_body
+from mailie._dkim import canonicalize_header
+from mailie.testing import SMTPSinkServer
+
+RFC8463_PUBLIC_KEY = (
+    "MIGfMA0GCSqGSIb3DQEBAQUAA4GNADCBiQKBgQDkHlOQoBTzWRiGs5V6NpP3idY6Wk08a5qhdR6wy5bdOKb2jLQiY/J16JYi0Qvx/byYzC"
+    "Nb3W91y3FutACDfzwQ/BC/e/8uBsCR+yz1Lxj+PL6lHvqMKrM3rG4hstT5QjvHO9PzoxZyVYLzBfO2EeC3Ip3G+2kryOTIKT+l/K4w3QIDAQAB"
+)
+RFC8463_BODY_HASH = b"2jUSOH9NhtVGCQWNr9BrIAPreKQjO6Sn7XIkfJVOzv8="
+RFC8463_SIGNATURE = (
+    "F45dVWDfMbQDGHJFlXUNB2HKfbCeLRyhDXgFpEL8GwpsRe0IeIixNTe3DhCVlUrSjV4BwcVcOF6+FF3Zo9Rpo1tFOeS9mPYQTnGdaSGsgeefOsk2Jz"
+    "dA+L10TeYt9BgDfQNZtKdN1WO//KgIqXP7OdEFE4LjFYNcUxZQ4FADY+8="
+)
+
+
+@pytest.fixture(scope="module")
+def private_key(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is required to generate a throwaway RSA key")
+    path = tmp_path_factory.mktemp("dkim") / "key.pem"
+    subprocess.run(["openssl", "genrsa", "-out", str(path), "1024"], check=True, capture_output=True)
+    return path
+
+
+@pytest.fixture
+def signed_email():
+    return Email(
+        mail_from="sender@example.com",
+        rcpt_to="recipient@example.com",
+        headers={"From": "sender@example.com", "To": "recipient@example.com"},
+        subject="Signed",
+        text="Hello  world  \n\n\n",
+    )
+
+
+def test_relaxed_body_canonicalization() -> None:
+    assert canonicalize_body(b" C \r\nD \t E\r\n\r\n\r\n") == b" C\r\nD E\r\n"
+    assert canonicalize_body(b"") == b""
+    assert canonicalize_body(b"", "simple") == b"\r\n"
+
+
+def test_relaxed_header_canonicalization() -> None:
+    assert canonicalize_header(b"SubJect", b" AbC\r\n  dEf ") == b"subject:AbC dEf\r\n"
+
+
+def test_rfc8463_rsa_sha256_example_verifies() -> None:
+    # The rsa-sha256 signature of RFC-8463 appendix A.3, checked against our canonicalization.
+    padding = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.padding")
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives import serialization
+
+    public_key = serialization.load_der_public_key(base64.b64decode(RFC8463_PUBLIC_KEY))
+    signature = (
+        b" v=1; a=rsa-sha256; c=relaxed/relaxed;\r\n d=football.example.com; i=@football.example.com;\r\n"
+        b" q=dns/txt; s=test; t=1528637909; h=from : to : subject :\r\n"
+        b" date : message-id : from : subject : date;\r\n"
+        b" bh=2jUSOH9NhtVGCQWNr9BrIAPreKQjO6Sn7XIkfJVOzv8=;\r\n b="
+    )
+    headers = [
+        (b"From", b" Joe SixPack <joe@football.example.com>"),
+        (b"To", b" Suzie Q <suzie@shopping.example.net>"),
+        (b"Subject", b" Is dinner ready?"),
+        (b"Date", b" Fri, 11 Jul 2003 21:00:37 -0700 (PDT)"),
+        (b"Message-ID", b" <20030712040037.46341.5F8J@football.example.com>"),
+    ]
+    body = b"Hi.\r\n\r\nWe lost the game.  Are you hungry yet?\r\n\r\nJoe.\r\n"
+    assert base64.b64encode(hashlib.sha256(canonicalize_body(body)).digest()) == RFC8463_BODY_HASH
+    signed = b"".join(canonicalize_header(name, value) for name, value in headers)
+    signed += canonicalize_header(b"DKIM-Signature", signature)[:-2]
+    public_key.verify(base64.b64decode(RFC8463_SIGNATURE), signed, padding.PKCS1v15(), hashes.SHA256())
+
+
+def test_signature_is_valid_rsa_sha256(private_key, signed_email) -> None:
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key)
+    signer.sign_email(signed_email)
+    value = signed_email["DKIM-Signature"]
+    tags = dict(tag.strip().split("=", 1) for tag in "".join(str(value).split()).split(";") if tag)
+    assert tags["d"] == "example.com"
+    assert tags["h"].startswith("from:subject:to")
+    key = signer._key.public_key().public_numbers()
+    signature = int.from_bytes(base64.b64decode(tags["b"]), "big")
+    recovered = pow(signature, key.e, key.n).to_bytes(signer._key.key_size // 8, "big")
+    assert recovered.startswith(b"\x00\x01\xff") and len(recovered.split(b"\x00", 2)[2]) == 51
+
+
+def test_resigning_replaces_previous_signature(private_key, signed_email) -> None:
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key)
+    signer.sign_email(signed_email)
+    signer.sign_email(signed_email)
+    assert len(signed_email.get_all("DKIM-Signature")) == 1
+
+
+def test_body_hash_is_memoized_per_body_key(private_key) -> None:
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key, body_cache_size=1)
+    body = b"identical body\r\n"
+    expected = base64.b64encode(hashlib.sha256(body).digest())
+    assert signer.body_hash(body) == expected
+    # Without a key nothing is retained, with one the hash is computed once per key.
+    assert signer.body_hash(body) is not signer.body_hash(body) and not signer._body_hashes
+    assert signer.body_hash(body, "welcome-v1") is signer.body_hash(b"ignored", "welcome-v1")
+    signer.body_hash(body, "welcome-v2")
+    assert list(signer._body_hashes) == ["welcome-v2"]
+
+
+def test_missing_from_header_cannot_be_signed(private_key) -> None:
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key)
+    with pytest.raises(DKIMSigningException):
+        signer.sign(b"Subject: hi\r\n\r\nbody\r\n")
+
+
+def test_invalid_key_raises() -> None:
+    with pytest.raises(DKIMSigningException):
+        DKIMSigner(domain="example.com", selector="broken", private_key=b"not a key")
+
+
+def test_malformed_der_keys_are_rejected(private_key) -> None:
+    der = subprocess.run(
+        ["openssl", "rsa", "-in", str(private_key), "-traditional", "-outform", "DER"], check=True, capture_output=True
+    ).stdout
+    assert DKIMSigner(domain="example.com", selector="der", private_key=der)
+    for index, broken in enumerate((der + b"\x00", der[:-1], der[:2] + b"\x8f" + der[3:], b"\x30\x80" + der[2:])):
+        with pytest.raises(DKIMSigningException):
+            DKIMSigner(domain="example.com", selector=f"broken{index}", private_key=broken)
+
+
+def test_client_signs_before_sending(private_key, signed_email) -> None:
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key)
+    with SMTPSinkServer(keep_messages=True) as sink:
+        SyncClient(host=sink.host, port=sink.port, dkim=signer).send(email=signed_email)
+    assert sink.messages[0].data.startswith(b"DKIM-Signature: v=1; a=rsa-sha256;")
+
+
+def _dns_record(private_key) -> bytes:
+    public_key = subprocess.run(
+        ["openssl", "rsa", "-in", str(private_key), "-pubout", "-outform", "DER"], check=True, capture_output=True
+    ).stdout
+    return b"v=DKIM1; k=rsa; p=" + base64.b64encode(public_key)
+
+
+@pytest.mark.parametrize("canonicalization", [(h, b) for h in ("relaxed", "simple") for b in ("relaxed", "simple")])
+def test_signature_verifies(private_key, signed_email, canonicalization) -> None:
+    dkim = pytest.importorskip("dkim")
+    record = _dns_record(private_key)
+    signer = DKIMSigner(
+        domain="example.com", selector="mailie", private_key=private_key, canonicalization=canonicalization
+    )
+    signer.sign_email(signed_email)
+    message = signed_email.as_bytes(policy=signed_email.email_message.policy.clone(linesep="\r\n"))
+    assert dkim.verify(message, dnsfunc=lambda *args, **kwargs: record)
+
+
+def test_multipart_signature_verifies_after_sending(private_key) -> None:
+    dkim = pytest.importorskip("dkim")
+    record = _dns_record(private_key)
+    email = Email(
+        mail_from="sender@example.com",
+        rcpt_to="recipient@example.com",
+        headers={"From": "sender@example.com", "To": "recipient@example.com"},
+        subject="Signed",
+        text="plain text",
+        html="<p>html</p>",
+    )
+    signer = DKIMSigner(domain="example.com", selector="mailie", private_key=private_key)
+    with SMTPSinkServer(keep_messages=True) as sink:
+        SyncClient(host=sink.host, port=sink.port, dkim=signer).send(email=email)
+    (message,) = sink.messages
+    assert message.data.startswith(b"DKIM-Signature: ")
+    assert dkim.verify(message.data, dnsfunc=lambda *args, **kwargs: record)
@@ -0,0 +1,81 @@
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+MESSAGE = (
+    b"From: foo@bar.com\n"
+    b"To: baz@qux.com\n"
+    b"Subject: Archived\n"
+    b"MIME-Version: 1.0\n"
+    b'Content-Type: multipart/mixed; boundary="XYZ"\n'
+    b"\n"
+    b"--XYZ\n"
+    b"Content-Type: text/plain\n"
+    b"\n"
+    b"hello\n"
+    b".leading dot\n"
+    b"--XYZ--\n"
+)
+
+
+def test_full_parse() -> None:
+    email = Email.from_bytes(MESSAGE)
+    assert email.raw_body is None
+    assert email.subject == "Archived"
+    assert [part.get_content_type() for part in email.walk()] == ["multipart/mixed", "text/plain"]
+
+
+def test_headers_only_defers_body_parsing() -> None:
+    email = Email.from_bytes(MESSAGE, headers_only=True)
+    assert email["subject"] == "Archived"
+    assert email.get_content_type() == "multipart/mixed"
+    assert email.raw_body.obj is MESSAGE
+    assert email.raw_body.tobytes().startswith(b"--XYZ\n")
+    email.replace_header("Subject", "Rerouted")
+    # Touching the body builds the MIME tree, header modifications are retained.
+    assert email.is_multipart()
+    assert email.raw_body is None
+    assert email["subject"] == "Rerouted"
+    assert email.get_payload(0).get_content() == "hello\n.leading dot"
+
+
+def test_raw_bytes_normalises_line_endings(tmp_path) -> None:
+    path = tmp_path / "archived.eml"
+    path.write_bytes(MESSAGE)
+    email = Email.from_file(path, headers_only=True)
+    email["X-Routed"] = "yes"
+    raw = email.raw_bytes()
+    assert b"\n" not in raw.replace(b"\r\n", b"")
+    body = b"--XYZ\r\nContent-Type: text/plain\r\n\r\nhello\r\n.leading dot\r\n--XYZ--\r\n"
+    assert raw.endswith(b"X-Routed: yes\r\n\r\n" + body)
+
+
+def test_headers_only_without_body() -> None:
+    email = Email.from_bytes(b"Subject: empty\r\n", headers_only=True)
+    assert email.subject == "empty"
+    assert email.raw_body.tobytes() == b""
+
+
+def test_lazy_email_sent_without_parsing_body() -> None:
+    email = Email.from_bytes(MESSAGE, headers_only=True, mail_from="foo@bar.com", rcpt_to="baz@qux.com")
+    with SMTPSinkServer(keep_messages=True) as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            client.send(email=email)
+    assert email.raw_body is not None
+    assert sink.messages[0].data.replace(b"\r\n", b"\n") == MESSAGE
+
+
+@pytest.mark.parametrize("lmtp", [False, True])
+def test_lazy_email_bcc_is_not_transmitted(lmtp) -> None:
+    raw = b"From: foo@bar.com\r\nBcc: hidden@qux.com\r\nResent-Bcc: hidden@qux.com\r\nSubject: hi\r\n\r\nbody\r\n"
+    email = Email.from_bytes(raw, headers_only=True, mail_from="foo@bar.com", rcpt_to="hidden@qux.com")
+    with SMTPSinkServer(keep_messages=True, lmtp=lmtp) as sink:
+        delegate = smtplib.LMTP if lmtp else smtplib.SMTP
+        with SyncClient(host=sink.host, port=sink.port, delegate_client=delegate) as client:
+            client.send(email=email)
+    assert sink.messages[0].data == b"From: foo@bar.com\r\nSubject: hi\r\n\r\nbody\r\n"
+    assert email["Bcc"] == "hidden@qux.com"
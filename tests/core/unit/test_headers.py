@@ -1,3 +1,5 @@
+import pytest
+
 from mailie import Email
 
 
@@ -14,3 +16,47 @@ def test_subject_via_mapping_in_headers() -> None:
 def test_subject_as_subject_kwarg() -> None:
     email = Email(mail_from="foo@bar.com", rcpt_to="baz@foo.com", subject="KeywordArg")
     assert email["Subject"] == "KeywordArg"
+
+
+def _assert_consistent(email: Email) -> None:
+    message = email.email_message if email.raw_body is None else email._message
+    for name in {*(key.lower() for key in message.keys()), "x-missing"}:
+        for variant in (name, name.upper(), name.title()):
+            assert (variant in email) == (variant in message)
+            assert email[variant] == message[variant]
+            assert email.get_all(variant) == message.get_all(variant)
+
+
+def test_header_lookups_stay_in_sync_with_mutations() -> None:
+    email = Email(mail_from="foo@bar.com", rcpt_to="baz@foo.com", subject="Indexed", text="hi")
+    _assert_consistent(email)
+    email["X-Tag"] = "one"
+    email.add_header("x-tag", "two")
+    assert email.get_all("X-TAG") == ["one", "two"]
+    _assert_consistent(email)
+    email.replace_header("x-TAG", "uno")
+    assert email.get_all("X-Tag") == ["uno", "two"]
+    _assert_consistent(email)
+    del email["X-Tag"]
+    assert "X-Tag" not in email and email.get_all("X-Tag", []) == []
+    _assert_consistent(email)
+    # Mutations made directly on the underlying message are observed too.
+    email.email_message.set_content("<p>hi</p>", subtype="html")
+    email.email_message.add_header("X-Direct", "yes")
+    email.email_message.replace_header("Subject", "Replaced")
+    assert email["x-direct"] == "yes" and email["SUBJECT"] == "Replaced"
+    _assert_consistent(email)
+    with pytest.raises(KeyError):
+        email.replace_header("X-Missing", "value")
+
+
+def test_parsed_header_values_are_reused_until_replaced() -> None:
+    email = Email.from_bytes(b"Subject: Cached\r\nTo: a@b.com\r\n\r\nbody\r\n", headers_only=True)
+    subject = email["subject"]
+    assert subject == "Cached" and email["Subject"] is subject
+    email.replace_header("Subject", "Fresh")
+    assert email["Subject"] == "Fresh"
+    _assert_consistent(email)
+    email.get_payload()  # Parsing the body retains the (indexed) headers.
+    assert email["subject"] == "Fresh" and email.raw_body is None
+    _assert_consistent(email)
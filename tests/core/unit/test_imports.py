@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import mailie
+
+HEAVY_MODULES = ("smtplib", "ssl", "email.message", "email.generator", "typer", "importlib_metadata")
+
+
+def _run(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_import_is_lazy() -> None:
+    loaded = _run(f"import sys, mailie; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+    assert loaded == "[]"
+
+
+def test_import_module_budget() -> None:
+    # Counted rather than timed: only the package and its (eagerly imported) exceptions are loaded.
+    loaded = _run("import sys, mailie; print(sorted(m for m in sys.modules if m.split('.')[0] == 'mailie'))")
+    assert loaded == "['mailie', 'mailie._exceptions']"
+
+
+def test_lazy_attributes_resolve() -> None:
+    assert mailie.Email.__name__ == "Email"
+    assert set(mailie.__all__) <= set(dir(mailie))
+    assert isinstance(mailie.version, str)
+
+
+def test_cli_version_does_not_import_typer() -> None:
+    output = _run("import sys; from mailie.commandline import run; run(['--version']); print('typer' in sys.modules)")
+    assert output.splitlines() == [f"Mailie version: {mailie.version}", "False"]
@@ -0,0 +1,72 @@
+import base64
+import os
+import pathlib
+
+from PIL import Image
+
+from mailie import Email
+from mailie import InlineImageCache
+
+TEMPLATE = '<p style="color: red;{{}}">Hi</p><img src="cid:{0}"><img src="cid:{1}">'
+
+
+def _related_email(cache, *paths) -> Email:
+    return Email(
+        mail_from="foo@bar.com",
+        rcpt_to="baz@bar.com",
+        text="plaintext content",
+        html=(TEMPLATE, paths),
+        inline_cache=cache,
+    )
+
+
+def test_inline_images_are_related_to_the_html(png_path, tmp_path) -> None:
+    gif_path = tmp_path / "banner.gif"
+    Image.new("RGB", (10, 10), (0, 0, 0)).save(gif_path, "GIF")
+    email = _related_email(InlineImageCache(), png_path, gif_path)
+    structure = [part.get_content_type() for part in email.walk()]
+    assert structure == [
+        "multipart/alternative",
+        "text/plain",
+        "multipart/related",
+        "text/html",
+        "image/png",
+        "image/gif",
+    ]
+    html = email.get_body(("html",)).get_content()
+    logo, banner = email.inline_images
+    assert f'src="cid:{logo.cid}"' in html and f'src="cid:{banner.cid}"' in html
+    assert '<p style="color: red;{}">' in html
+    image = list(email.walk())[4]
+    assert image["Content-ID"] == f"<{logo.cid}>"
+    assert image.get_content_disposition() == "inline" and image.get_filename() == "image.png"
+    assert image.get_content() == pathlib.Path(png_path).read_bytes()
+
+
+def test_encoded_images_are_shared_across_messages(png_path) -> None:
+    cache = InlineImageCache()
+    first, second = (_related_email(cache, png_path, png_path) for _ in range(2))
+    assert (cache.misses, cache.hits, len(cache)) == (1, 3, 1)
+    assert first.inline_images[0] is second.inline_images[0]
+    images = [part for part in first.walk() if part.get_content_maintype() == "image"]
+    assert [image["Content-ID"] for image in images] == [f"<{first.inline_images[0].cid}>"]
+    assert first.get_body(("html",)).get_content().count(f'src="cid:{first.inline_images[0].cid}"') == 2
+    first_part, second_part = (list(email.walk())[4] for email in (first, second))
+    assert first_part is not second_part
+    assert first_part.get_payload() is second_part.get_payload()
+    first_part["X-Mutated"] = "yes"
+    assert "X-Mutated" not in second_part
+    assert base64.b64decode(second_part.get_payload()) == pathlib.Path(png_path).read_bytes()
+
+
+def test_cache_is_bounded_and_invalidated_by_changes(png_path, tmp_path) -> None:
+    cache = InlineImageCache(maxsize=1)
+    other = tmp_path / "other.png"
+    Image.new("RGB", (5, 5), (1, 2, 3)).save(other, "PNG")
+    cid = cache.get(png_path).cid
+    cache.get(other)
+    assert len(cache) == 1
+    assert cache.get(png_path).cid == cid and cache.misses == 3
+    Image.new("RGB", (5, 5), (9, 9, 9)).save(png_path, "PNG")
+    os.utime(png_path, ns=(0, 1))
+    assert cache.get(png_path).cid != cid
@@ -0,0 +1,35 @@
+import mailbox
+
+import pytest
+
+from mailie import Email
+from mailie import MailieException
+from mailie import write_messages
+
+
+def _emails(count):
+    for index in range(count):
+        yield Email(mail_from="news@bar.com", rcpt_to=f"user{index}@qux.com", subject=f"#{index}", text="From here\n")
+
+
+def test_write_maildir(tmp_path) -> None:
+    path = tmp_path / "maildir"
+    assert write_messages(_emails(25), f"maildir:{path}", batch_size=10) == 25
+    assert not list((path / "tmp").iterdir())
+    subjects = sorted(int(message["subject"][1:]) for message in mailbox.Maildir(path, create=False))
+    assert subjects == list(range(25))
+
+
+def test_write_mbox(tmp_path) -> None:
+    path = tmp_path / "campaign.mbox"
+    assert write_messages(_emails(3), f"mbox:{path}", batch_size=2, fsync=False) == 3
+    messages = list(mailbox.mbox(path, create=False))
+    assert [message["subject"] for message in messages] == ["#0", "#1", "#2"]
+    assert messages[0].get_from().startswith("news@bar.com ")
+    # mboxrd quoting keeps body lines starting with `From ` from splitting the message.
+    assert b"\n>From here\n" in path.read_bytes()
+
+
+def test_unsupported_target(tmp_path) -> None:
+    with pytest.raises(MailieException):
+        write_messages([], f"eml:{tmp_path}")
@@ -0,0 +1,88 @@
+import threading
+import urllib.request
+
+import pytest
+
+from mailie import Email
+from mailie import MetricsRegistry
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+
+def test_counter_shards_are_merged_across_threads() -> None:
+    counter = MetricsRegistry().counter("jobs_total", "Jobs.", ("kind",))
+    threads = [threading.Thread(target=lambda: [counter.inc(kind="a") for _ in range(1000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(2.5, kind="b")
+    assert counter.value(kind="a") == 4000
+    assert counter.value(kind="b") == 2.5
+
+
+def test_shards_of_exited_threads_are_retired() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs.")
+    histogram = registry.histogram("job_seconds", "Job duration.", buckets=(1.0,))
+    for _ in range(20):
+        thread = threading.Thread(target=lambda: (counter.inc(), histogram.observe(0.5)))
+        thread.start()
+        thread.join()
+    assert counter.value() == 20 and histogram.count() == 20
+    assert counter._shards == [] and histogram._shards == []
+    counter.inc()
+    assert counter.value() == 21 and len(counter._shards) == 1
+
+
+def test_prometheus_exposition() -> None:
+    registry = MetricsRegistry()
+    registry.counter("mailie_sent_total", "Sent.").inc(3)
+    histogram = registry.histogram("latency_seconds", "Latency.", ("phase",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, phase='da"ta')
+    assert registry.exposition() == (
+        "# HELP mailie_sent_total Sent.\n"
+        "# TYPE mailie_sent_total counter\n"
+        "mailie_sent_total 3\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{phase="da\\"ta",le="0.1"} 2\n'
+        'latency_seconds_bucket{phase="da\\"ta",le="1.0"} 3\n'
+        'latency_seconds_bucket{phase="da\\"ta",le="+Inf"} 4\n'
+        'latency_seconds_sum{phase="da\\"ta"} 5.65\n'
+        'latency_seconds_count{phase="da\\"ta"} 4\n'
+    )
+
+
+def test_registry_rejects_conflicting_types() -> None:
+    registry = MetricsRegistry()
+    registry.counter("thing", "A thing.")
+    assert registry.counter("thing", "A thing.") is registry.counter("thing", "Same thing.")
+    with pytest.raises(ValueError):
+        registry.gauge("thing", "A thing.")
+
+
+def test_client_metrics_exported(tmp_path) -> None:
+    registry = MetricsRegistry()
+    refuse = {"RCPT": lambda argument: (550, "No such user") if "nobody" in argument else None}
+    with SMTPSinkServer(responses=refuse) as sink:
+        with SyncClient(host=sink.host, port=sink.port, metrics=registry) as client:
+            client.send(email=Email(mail_from="foo@bar.com", rcpt_to=["baz@qux.com", "nobody@qux.com"], text="hi"))
+    assert registry.counter("mailie_messages_sent_total", "").value() == 1
+    assert registry.counter("mailie_recipients_refused_total", "").value() == 1
+    assert registry.counter("mailie_bytes_written_total", "").value() > 0
+    phases = registry.histogram("mailie_phase_duration_seconds", "", ("phase",))
+    assert [phases.count(phase=phase) for phase in ("connect", "greet", "send")] == [1, 1, 1]
+
+    path = tmp_path / "mailie.prom"
+    registry.write_to_file(path)
+    assert "mailie_messages_sent_total 1\n" in path.read_text()
+    server = registry.serve()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert response.read().decode() == registry.exposition()
+    finally:
+        server.shutdown()
+        server.server_close()
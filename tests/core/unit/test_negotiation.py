@@ -0,0 +1,55 @@
+import smtplib
+
+import pytest
+
+from mailie import Email
+from mailie import negotiate
+
+LONG_CYRILLIC = "Привет мир " * 30
+
+
+def test_long_text_reencoded_as_8bit() -> None:
+    email = Email(mail_from="a@b.com", rcpt_to="c@d.com", text=LONG_CYRILLIC)
+    assert email["Content-Transfer-Encoding"] == "base64"
+    negotiated = negotiate(email.email_message, {"8bitmime": ""}, envelope=["a@b.com", "c@d.com"])
+    assert negotiated.message["Content-Transfer-Encoding"] == "8bit"
+    assert negotiated.mail_options == ("BODY=8BITMIME",)
+    assert LONG_CYRILLIC.encode() in negotiated.message.as_bytes()
+    assert email["Content-Transfer-Encoding"] == "base64"
+
+
+def test_ascii_message_untouched() -> None:
+    email = Email(mail_from="a@b.com", rcpt_to="c@d.com", text="plain ascii")
+    negotiated = negotiate(email.email_message, {"8bitmime": ""}, mail_options=["X-OPT"])
+    assert negotiated.message is email.email_message
+    assert negotiated.mail_options == ("X-OPT",)
+    assert not negotiated.utf8
+
+
+def test_8bit_downgraded_without_8bitmime() -> None:
+    email = Email(mail_from="a@b.com", rcpt_to="c@d.com", text="Привет")
+    assert email["Content-Transfer-Encoding"] == "8bit"
+    negotiated = negotiate(email.email_message, {"size": "100"})
+    assert negotiated.message.as_bytes().isascii()
+    assert negotiated.mail_options == ()
+
+
+def test_international_envelope_requires_smtputf8() -> None:
+    email = Email(mail_from="用户@例子.广告", rcpt_to="c@d.com", text="hi")
+    negotiated = negotiate(email.email_message, {"smtputf8": "", "8bitmime": ""}, envelope=[email.mail_from])
+    assert negotiated.utf8
+    assert negotiated.mail_options == ("SMTPUTF8", "BODY=8BITMIME")
+    with pytest.raises(smtplib.SMTPNotSupportedError):
+        negotiate(email.email_message, {"8bitmime": ""}, envelope=[email.mail_from])
+
+
+def test_only_reencoded_parts_are_copied(png_path) -> None:
+    email = Email(mail_from="a@b.com", rcpt_to="c@d.com", text=LONG_CYRILLIC, attachments=png_path)
+    before = email.as_bytes()
+    negotiated = negotiate(email.email_message, {"8bitmime": ""})
+    (text, attachment), (original_text, original_attachment) = (
+        list(message.iter_parts()) for message in (negotiated.message, email.email_message)
+    )
+    assert text["Content-Transfer-Encoding"] == "8bit" and text is not original_text
+    assert attachment is original_attachment
+    assert email.as_bytes() == before
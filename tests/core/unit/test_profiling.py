@@ -0,0 +1,40 @@
+import pstats
+import tracemalloc
+
+from mailie import Email
+from mailie import Profiler
+from mailie import SyncClient
+from mailie._profiling import categorise
+from mailie.testing import SMTPSinkServer
+
+
+def test_categorise() -> None:
+    assert categorise("/usr/lib/python3/smtplib.py", "sendmail") == "network"
+    assert categorise("~", "<method 'sendall' of '_socket.socket' objects>") == "network"
+    assert categorise("/usr/lib/python3/email/generator.py", "flatten") == "mime"
+    assert categorise("/site-packages/mailie/_attachments.py", "generate") == "attachments"
+    assert categorise("/app/main.py", "main") == "other"
+
+
+def test_client_profile(tmp_path, png_path) -> None:
+    dump = tmp_path / "send.prof"
+    with SMTPSinkServer() as sink:
+        with SyncClient(host=sink.host, port=sink.port) as client:
+            with client.profile(dump=dump) as profiler:
+                email = Email(mail_from="foo@bar.com", rcpt_to="baz@qux.com", text="hi", attachments=png_path)
+                client.send(email=email)
+    report = profiler.report
+    breakdown = report.breakdown()
+    assert breakdown["network"] > 0 and breakdown["mime"] > 0 and breakdown["attachments"] > 0
+    summary = report.summary(limit=5)
+    assert "network" in summary and "top allocations" in summary
+    assert pstats.Stats(str(dump)).total_calls > 0
+    assert tracemalloc.Snapshot.load(f"{dump}.tracemalloc").traces
+    assert not tracemalloc.is_tracing()
+
+
+def test_cpu_only_profile() -> None:
+    with Profiler(memory=False) as profiler:
+        sum(range(1000))
+    assert profiler.report.snapshot is None
+    assert "Allocated" not in profiler.report.summary()
@@ -0,0 +1,161 @@
+import smtplib
+import threading
+import time
+
+import pytest
+
+from mailie import Email
+from mailie import Lane
+from mailie import MetricsRegistry
+from mailie import Scheduler
+from mailie import SyncClient
+from mailie.testing import SMTPSinkServer
+
+
+class _GatedClient:
+    """
+    Stands in for a `SyncClient`; every send blocks until the gate is open and is recorded in order.
+    """
+
+    def __init__(self, sent, gate, in_flight) -> None:
+        self.sent, self.gate, self.in_flight = sent, gate, in_flight
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    def send(self, *, email):
+        self.in_flight.append(email["Subject"])
+        self.gate.wait()
+        self.sent.append(email["Subject"])
+        return email["Subject"]
+
+
+@pytest.fixture
+def harness():
+    sent, in_flight, gate = [], [], threading.Event()
+    return sent, in_flight, gate, lambda: _GatedClient(sent, gate, in_flight)
+
+
+def _email(subject: str) -> Email:
+    return Email(mail_from="foo@bar.com", rcpt_to="baz@bar.com", subject=subject, text="hi")
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    ends = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > ends:
+            pytest.fail(f"Timed out after {timeout}s waiting for the scheduler")
+        time.sleep(0.005)
+
+
+def test_transactional_overtakes_queued_bulk(harness) -> None:
+    sent, in_flight, gate, factory = harness
+    lanes = (Lane("transactional", weight=100), Lane("bulk"))
+    with Scheduler(factory, connections=1, lanes=lanes) as scheduler:
+        futures = [scheduler.submit(_email(f"bulk-{i}")) for i in range(5)]
+        _wait_for(lambda: in_flight)
+        futures.append(scheduler.submit(_email("reset"), lane="transactional"))
+        gate.set()
+    assert sent == ["bulk-0", "reset", "bulk-1", "bulk-2", "bulk-3", "bulk-4"]
+    assert futures[-1].result() == "reset"
+
+
+def test_weighted_lanes_and_starvation_protection(harness) -> None:
+    sent, in_flight, gate, factory = harness
+    lanes = (Lane("a", weight=3), Lane("b", weight=1))
+    with Scheduler(factory, connections=1, lanes=lanes) as scheduler:
+        scheduler.submit(_email("first"), lane="a")
+        _wait_for(lambda: in_flight)
+        for i in range(6):
+            scheduler.submit(_email(f"a-{i}"), lane="a")
+            scheduler.submit(_email(f"b-{i}"), lane="b")
+        gate.set()
+    assert sent[1:9] == ["a-0", "a-1", "b-0", "a-2", "a-3", "a-4", "b-1", "a-5"]
+
+    sent.clear()
+    in_flight.clear()
+    gate.clear()
+    lanes = (Lane("a", weight=1000), Lane("b", max_wait=0))
+    with Scheduler(factory, connections=1, lanes=lanes) as scheduler:
+        scheduler.submit(_email("first"), lane="a")
+        _wait_for(lambda: in_flight)
+        scheduler.submit(_email("b-0"), lane="b")
+        scheduler.submit(_email("a-0"), lane="a")
+        gate.set()
+    assert sent == ["first", "b-0", "a-0"]
+
+
+def test_reserved_connections(harness) -> None:
+    sent, in_flight, gate, factory = harness
+    registry = MetricsRegistry()
+    in_use = registry.gauge("mailie_pool_connections_in_use", "", ("pool",))
+    idle = registry.gauge("mailie_pool_connections_idle", "", ("pool",))
+    lanes = (Lane("transactional", reserved=1), Lane("bulk"))
+    with Scheduler(factory, connections=2, lanes=lanes, metrics=registry) as scheduler:
+        for i in range(3):
+            scheduler.submit(_email(f"bulk-{i}"))
+        _wait_for(lambda: in_flight)
+        assert scheduler.queued("bulk") == 2
+        assert in_use.value(pool="scheduler") == 1 and idle.value(pool="scheduler") == 1
+        scheduler.submit(_email("reset"), lane="transactional")
+        _wait_for(lambda: len(in_flight) == 2)
+        assert in_flight == ["bulk-0", "reset"]
+        gate.set()
+    assert len(sent) == 4
+    assert in_use.value(pool="scheduler") == 0 and idle.value(pool="scheduler") == 0
+
+
+def test_invalid_lanes() -> None:
+    with pytest.raises(ValueError):
+        Scheduler(lambda: None, connections=1, lanes=(Lane("a", reserved=1), Lane("b", reserved=1)))
+    with pytest.raises(ValueError):
+        Scheduler(lambda: None, connections=1, lanes=(Lane("a"), Lane("a")))
+
+
+def test_sends_over_shared_connections() -> None:
+    refuse = {"RCPT": lambda address: (550, "no such user") if address.startswith("x@") else None}
+    with SMTPSinkServer(responses=refuse) as sink:
+        with Scheduler(lambda: SyncClient(host=sink.host, port=sink.port), connections=2) as scheduler:
+            futures = [scheduler.submit(_email(str(i)), lane=("bulk", "transactional")[i % 2]) for i in range(10)]
+            rejected = scheduler.submit(_email("x"), to_addrs=["x@bar.com"])
+        assert all(future.result().result == {} for future in futures)
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            rejected.result()
+        assert sink.message_count == 10
+
+
+def test_only_lost_connections_are_replaced() -> None:
+    errors = [
+        smtplib.SMTPRecipientsRefused({"baz@bar.com": (550, b"no such user")}),
+        smtplib.SMTPResponseException(552, b"too big"),
+        smtplib.SMTPServerDisconnected("gone"),
+        ConnectionResetError("reset"),
+        None,
+    ]
+    opened = []
+
+    class _FailingClient(_GatedClient):
+        def send(self, *, email):
+            error = errors.pop(0)
+            if error is not None:
+                raise error
+            return email["Subject"]
+
+    def factory():
+        opened.append(_FailingClient(None, None, None))
+        return opened[-1]
+
+    with Scheduler(factory, connections=1, lanes=(Lane("bulk"),)) as scheduler:
+        futures = [scheduler.submit(_email(str(i))) for i in range(5)]
+    assert [type(future.exception()) for future in futures[:4]] == [
+        smtplib.SMTPRecipientsRefused,
+        smtplib.SMTPResponseException,
+        smtplib.SMTPServerDisconnected,
+        ConnectionResetError,
+    ]
+    assert futures[-1].result() == "4"
+    # Refusals keep the connection, after the disconnect and the reset a new one is opened.
+    assert len(opened) == 3
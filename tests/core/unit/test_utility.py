@@ -31,3 +31,8 @@ def test_convert_strings_to_headers_strings() -> None:
     assert len(result) == 2
     assert isinstance(result, list)
     assert result == [["foo", "bar"], ["baz", "boo"]]
+
+
+def test_email_to_list_preserves_order_and_normalises() -> None:
+    data = ("b@Domain.com", "a@domain.com", "b@domain.COM")
+    assert emails_to_list(data) == ["b@domain.com", "a@domain.com"]
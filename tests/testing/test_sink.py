@@ -0,0 +1,80 @@
+import smtplib
+import time
+
+import pytest
+
+from mailie.testing import SMTPSinkServer
+
+
+@pytest.fixture
+def sink():
+    with SMTPSinkServer(keep_messages=True) as server:
+        yield server
+
+
+def test_sink_counts_messages_and_bytes(sink) -> None:
+    with smtplib.SMTP(sink.host, sink.port) as smtp:
+        for _ in range(3):
+            smtp.sendmail("a@b.com", ["c@d.com", "e@f.com"], b"Subject: hi\r\n\r\nbody\r\n")
+    assert sink.message_count == 3
+    assert sink.recipient_count == 6
+    assert sink.byte_count == 3 * len(b"Subject: hi\r\n\r\nbody\r\n")
+    assert sink.messages[0].rcpt_tos == ("c@d.com", "e@f.com")
+
+
+def test_sink_dot_unstuffing(sink) -> None:
+    with smtplib.SMTP(sink.host, sink.port) as smtp:
+        smtp.sendmail("a@b.com", ["c@d.com"], b"Subject: hi\r\n\r\n.leading dot\r\n")
+    assert sink.messages[0].data.endswith(b"\r\n.leading dot\r\n")
+
+
+def test_sink_injected_recipient_refusal() -> None:
+    responses = {"RCPT": lambda address: (550, "No such user") if address.startswith("bad") else None}
+    with SMTPSinkServer(responses=responses) as sink, smtplib.SMTP(sink.host, sink.port) as smtp:
+        refused = smtp.sendmail("a@b.com", ["bad@d.com", "good@d.com"], b"\r\nbody\r\n")
+    assert refused == {"bad@d.com": (550, b"No such user")}
+    assert sink.recipient_count == 1
+
+
+def test_sink_injected_transient_data_failure() -> None:
+    with SMTPSinkServer(responses={"DATA": (451, "Try again later")}) as sink, smtplib.SMTP(*sink.address) as smtp:
+        with pytest.raises(smtplib.SMTPDataError) as exc:
+            smtp.sendmail("a@b.com", ["c@d.com"], b"\r\nbody\r\n")
+    assert exc.value.smtp_code == 451
+    assert sink.message_count == 0
+
+
+def test_sink_latency_per_verb() -> None:
+    with SMTPSinkServer(latency={"NOOP": 0.2}) as sink, smtplib.SMTP(*sink.address) as smtp:
+        start = time.perf_counter()
+        smtp.noop()
+        assert time.perf_counter() - start >= 0.2
+
+
+def test_sink_advertises_configured_extensions() -> None:
+    with SMTPSinkServer(extensions=("SIZE", "SMTPUTF8"), max_size=1024) as sink, smtplib.SMTP(*sink.address) as smtp:
+        smtp.ehlo()
+        assert smtp.esmtp_features == {"size": "1024", "smtputf8": ""}
+        with pytest.raises(smtplib.SMTPSenderRefused):
+            smtp.sendmail("a@b.com", ["c@d.com"], b"x" * 2048)
+
+
+def test_sink_bdat_chunks(sink) -> None:
+    with smtplib.SMTP(*sink.address) as smtp:
+        smtp.ehlo()
+        smtp.mail("a@b.com")
+        smtp.rcpt("c@d.com")
+        smtp.send(b"BDAT 5\r\nhello")
+        assert smtp.getreply()[0] == 250
+        smtp.send(b"BDAT 6 LAST\r\n world")
+        assert smtp.getreply()[0] == 250
+    assert sink.messages[0].data == b"hello world"
+
+
+def test_sink_refuses_data_beyond_the_stream_limit() -> None:
+    with SMTPSinkServer(extensions=(), max_size=1024) as sink, smtplib.SMTP(*sink.address) as smtp:
+        with pytest.raises(smtplib.SMTPDataError) as exc:
+            smtp.sendmail("a@b.com", ["c@d.com"], b"\r\n" + b"x" * 5000 + b"\r\n")
+        assert exc.value.smtp_code == 552
+        smtp.sendmail("a@b.com", ["c@d.com"], b"\r\nbody\r\n")
+    assert sink.message_count == 1